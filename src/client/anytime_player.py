@@ -0,0 +1,91 @@
+from .player import InformedPlayer
+from proto.game_proto import GameMessage
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError, wait
+from loguru import logger
+import threading
+import time
+
+
+ANYTIME_BUDGET = 0.1  # Seconds a bot has to choose each reply
+
+class AnytimePlayer(InformedPlayer):
+    """
+    InformedPlayer that refines its reply for as long as its time budget allows.
+
+    _choose_message(budget)_ runs in a worker thread. It publishes a reply with _publish_ as soon as it has one and
+    keeps publishing better ones while _time_left_ is positive. The reply sent is the last one published when the
+    search returns, fails or the budget runs out, whichever comes first, or the first possible message if nothing was
+    published in time. Publishing after the cutoff has no effect.
+
+    The search must return shortly after _time_left_ reaches 0: the next message waits for it before it changes the
+    player's state, so the search only reads the state of the message it was started for. _self.msg_ is only set by
+    the player, not by the search.
+    """
+
+    def __init__(self, budget: float = ANYTIME_BUDGET, **kwargs):
+        """
+        __init__ method for AnytimePlayer class.
+
+        Keyword Arguments:
+            budget {float} -- seconds to choose each reply (default: ANYTIME_BUDGET)
+
+        Other keyword arguments are passed to InformedPlayer.
+        """
+        self.budget = budget
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        self.search: Future | None = None
+        """Search of the last reply, it may still be finishing after the cutoff."""
+        self.lock = threading.Lock()
+        """Guards the published reply, the search publishes from its own thread."""
+        self.best: str | None = None
+        """Best reply published for the current message."""
+        self.cutoff = 0.0
+        """Time (time.monotonic) the current reply is due at."""
+        self.closed = True
+        """Flag for whether the current reply was sent, and can't be changed anymore."""
+        super().__init__(**kwargs)
+
+    def choose_message(self, budget: float) -> None:
+        """
+        Called in a worker thread when the player is in a state where it can choose a message to send.
+        Reads _self.possible_messages_ and publishes the best of them found so far with _publish_.
+
+        Arguments:
+            budget {float} -- seconds left to choose, see also _time_left_
+        """
+        raise NotImplementedError("choose_message() not implemented.")
+
+    def publish(self, message: str | GameMessage) -> None:
+        """Makes _message_ the reply sent at the cutoff, unless a better one is published before."""
+        with self.lock:
+            if not self.closed:
+                self.best = str(message)
+
+    def time_left(self) -> float:
+        """Returns the seconds left to choose the current reply, 0 once it was sent."""
+        if self.closed:
+            return 0.0
+        return max(0.0, self.cutoff - time.monotonic())
+
+    def update(self, message: str) -> int | None:
+        if self.search is not None:
+            wait([self.search])  # The last search must be done before the message changes the state
+        return super().update(message)
+
+    def decide(self) -> None:
+        self.cutoff = time.monotonic() + self.budget
+        with self.lock:
+            self.best = None
+            self.closed = False
+        self.search = self.executor.submit(self.choose_message, self.budget)
+        try:
+            self.search.result(timeout=self.budget)
+        except TimeoutError:
+            logger.debug(f"Budget of {self.budget}s spent, sending the best reply so far.")
+        except Exception as e:
+            logger.exception(f"Search failed, sending the best reply so far: {e}")
+        finally:
+            with self.lock:
+                self.closed = True
+                best = self.best
+        self.msg = GameMessage(best if best is not None else self.possible_messages[0])
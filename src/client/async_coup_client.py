@@ -0,0 +1,131 @@
+from .coup_client import CoupClient
+from .event_loop import EventCoupClient
+from .player import InformedPlayer
+from .async_player import AsyncInformedPlayer
+from proto.network_proto import network_proto
+from proto.framing import TEXT
+from transport.transport import TCP
+from loguru import logger
+import asyncio
+
+
+READ_SIZE = 65536  # Bytes read from the connection at a time
+
+class AsyncCoupClient(CoupClient):
+    """
+    CoupClient for AsyncInformedPlayer bots, running on an asyncio event loop.
+
+    A reading task receives the messages and queues them, while the playing task hands each batch to the bot and
+    sends its replies, so the connection is still read while the bot awaits its choice. The client closes its
+    connection after EXIT, unless it has more games to play in its room. Transports that can't be waited on fall
+    back to the threaded client, which runs each bundle in an event loop of its own.
+    """
+
+    def __init__(self, host, port, player: AsyncInformedPlayer, framing=TEXT, room: str | None = None, size: int | None = None, games: int = 1, transport=TCP):
+        """
+        __init__ method for AsyncCoupClient class.
+
+        Arguments:
+            host {str} -- server address
+            port {int} -- server port
+            player {AsyncInformedPlayer} -- bot playing through this client
+
+        Keyword Arguments:
+            framing {str} -- message framing, one of FRAMINGS (default: TEXT)
+            room {str | None} -- room to join on a room server, None on a single game server (default: None)
+            size {int | None} -- number of players if the room has to be created (default: None, server default)
+            games {int} -- number of games to play in the room on this connection, 0 for no limit (default: 1)
+            transport {str} -- how to reach the server, one of TRANSPORTS (default: TCP)
+        """
+        super().__init__(host, port, player, framing, room, size, games, transport)
+        self.player: AsyncInformedPlayer = player
+        self.writer: asyncio.StreamWriter | None = None
+
+    def run(self):
+        if not self.transport.selectable:
+            logger.debug(f"Transport {self.transport.name} can't be waited on, using threads.")
+            super().run()
+            return
+        try:
+            asyncio.run(self.main())
+        except KeyboardInterrupt:
+            logger.info("Keyboard interrupt detected, closing connection.")
+        self.signal = False
+
+    async def main(self):
+        """Connects to the server and plays until the client is done or the server closes the connection."""
+        self.__connect__()
+        reader, self.writer = await asyncio.open_connection(sock=self.socket)
+        batches: asyncio.Queue[list[str] | None] = asyncio.Queue()
+        if self.pending_messages:
+            batches.put_nowait(self.pending_messages)
+            self.pending_messages = []
+        reading = asyncio.create_task(self.read(reader, batches))
+        try:
+            self.send_outbound()
+            while self.signal:
+                messages = await batches.get()
+                if messages is None:
+                    break
+                await self.receiver_async(messages)
+                self.send_outbound()
+                await self.writer.drain()
+        except OSError as e:
+            logger.error(f"Error sending message: {e}")
+        finally:
+            self.signal = False
+            reading.cancel()
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+
+    async def read(self, reader: asyncio.StreamReader, batches: asyncio.Queue):
+        """Queues the messages received together until the connection is closed, then queues None."""
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    logger.error("Server has closed the connection.")
+                    break
+                self.reassembler.feed(data)
+                messages = self.reassembler.frames()
+                if messages:
+                    batches.put_nowait(messages)
+        except OSError:
+            logger.error("You have been disconnected from the server.")
+        finally:
+            batches.put_nowait(None)
+
+    async def receiver_async(self, messages: list[str]):
+        """Hands the messages received together to the bot as one bundle."""
+        message = network_proto.term.join(messages)
+        try:
+            terminate = await self.player.receive_bundle_async(self.addr_strip(message))
+            if terminate and not self.next_game():
+                self.signal = False
+        except SyntaxError:
+            logger.warning(f"Invalid message format for message: \"{message}\"")
+        except Exception as e:
+            logger.exception(f"Error in receiver: {e}")
+            self.signal = False
+
+    def send(self, message: str):
+        if self.writer is None:
+            super().send(message)  # Threaded fallback
+        else:
+            self.writer.write(self.framing.encode(message))
+
+    def send_outbound(self):
+        """Sends the replies in the checkout of the bot in one write."""
+        messages = self.drain_checkout()
+        if messages:
+            self.send(messages)
+
+
+def bot_client(host, port, player: InformedPlayer, framing=TEXT, room: str | None = None, size: int | None = None, games: int = 1, transport=TCP) -> CoupClient:
+    """Returns the client running a bot: an AsyncCoupClient for an AsyncInformedPlayer, an EventCoupClient otherwise."""
+    if isinstance(player, AsyncInformedPlayer):
+        return AsyncCoupClient(host, port, player, framing, room, size, games, transport)
+    return EventCoupClient(host, port, player, framing, room, size, games, transport)
@@ -0,0 +1,76 @@
+from .player import InformedPlayer
+from proto.network_proto import network_proto
+from loguru import logger
+import asyncio
+
+
+class AsyncInformedPlayer(InformedPlayer):
+    """
+    InformedPlayer whose _choose_message_ is a coroutine.
+
+    The bot can await while it chooses a message, e.g. I/O or a search run in an executor with
+    _loop.run_in_executor_, and the asyncio client keeps receiving messages in the meantime. Replies are still
+    chosen one message after the other, in the order the messages were received.
+
+    Played by AsyncCoupClient. Clients that call _receive_ or _receive_bundle_ directly (e.g. HeadlessGame or
+    BotHost) run each bundle in an event loop of its own, so they must not call them from a running event loop.
+    """
+
+    async def choose_message(self) -> None:
+        """
+        Called when the player is in a state where it can choose a message to send.
+        Reads _self.possible_messages_, chooses one of them and sets _self.msg_ to it.
+        """
+        raise NotImplementedError("choose_message() not implemented.")
+
+    async def receive_async(self, message: str) -> int:
+        """
+        Informs the player of a message, awaiting the choice of its reply if it has to reply.
+
+        Arguments:
+            message {str} -- request/informative message
+
+        Returns:
+            int -- 1 if the player wants to terminate, 0 otherwise.
+        """
+        try:
+            terminate = self.update(message)
+            if terminate is None:
+                await self.choose_message()
+                self.reply()
+                return 0
+            return terminate
+        except IndexError:
+            logger.error(f"No possible messages.")
+        except Exception as e:
+            logger.exception(f"Error in receive: " + str(e))
+        return 0
+
+    async def receive_bundle_async(self, messages: list[str]) -> int:
+        """
+        Handles the messages of a bundle one after the other and sends all the replies at once.
+
+        Arguments:
+            messages {list[str]} -- request/informative messages
+
+        Returns:
+            int -- 1 if the player wants to terminate, 0 otherwise.
+        """
+        self.replies = []
+        terminate = 0
+        try:
+            for message in messages:
+                if await self.receive_async(message):
+                    terminate = 1
+                    break
+        finally:
+            replies, self.replies = self.replies, None
+        if replies:
+            self.checkout.put(network_proto.term.join(replies))
+        return terminate
+
+    def receive(self, message: str) -> int:
+        return asyncio.run(self.receive_async(message))
+
+    def receive_bundle(self, messages: list[str]) -> int:
+        return asyncio.run(self.receive_bundle_async(messages))
@@ -0,0 +1,140 @@
+from .client import Client
+from .event_loop import EventLoop
+from .player import InformedPlayer
+from .game.core import MAX_PLAYERS
+from proto.network_proto import network_proto, NetworkMessage, SEAT
+from proto.framing import TEXT
+from transport.transport import TCP
+from loguru import logger
+import threading
+
+
+HOST_TIMEOUT = 0.5  # Seconds between checks of the host signal
+
+def table_of(room: str, index: int, size: int, players: int) -> str:
+    """Returns the room of the _index_-th of _players_ bots: _room_, or room-0, room-1, ... when every _size_ bots need a room of their own."""
+    return room if players <= size else f"{room}-{index // size}"
+
+
+class BotHost(EventLoop, Client):
+    """
+    Plays many bots over a single connection to a room server.
+
+    Each bot sits in a numbered seat and the server sees every seat as a client of its own (see Seat), so seats
+    can share a room or play in different rooms. A single receive loop hands each bot the messages of its seat
+    and sends the replies of all the seats in one write, so a host needs one socket and a single thread whatever
+    its number of seats.
+    """
+
+    def __init__(self, host, port, players: list[InformedPlayer], room: str, size: int = MAX_PLAYERS, games: int = 1, framing=TEXT, transport=TCP):
+        """
+        __init__ method for BotHost class.
+
+        Arguments:
+            host {str} -- server address
+            port {int} -- server port
+            players {list[InformedPlayer]} -- bots to host, created with a NullTerminal, one per seat
+            room {str} -- room to play in, every _size_ bots get a room of their own if they don't fit in one
+
+        Keyword Arguments:
+            size {int} -- number of players of each room (default: MAX_PLAYERS)
+            games {int} -- number of games played by each seat, 0 for no limit (default: 1)
+            framing {str} -- message framing, one of FRAMINGS (default: TEXT)
+            transport {str} -- how to reach the server, one of TRANSPORTS (default: TCP)
+
+        Raises:
+            ValueError: If the bots can't be split in full rooms.
+        """
+        if len(players) % size and len(players) > size:
+            raise ValueError(f"{len(players)} bots can't fill rooms of {size} players.")
+        super().__init__(host, port, framing, transport)
+        self.players = {seat: player for seat, player in enumerate(players, 1)}
+        """Bots by seat number."""
+        self.rooms = {seat: table_of(room, seat - 1, size, len(players)) for seat in self.players}
+        self.size = size
+        self.games = games
+        self.played = dict.fromkeys(self.players, 0)
+        """Number of games finished by each seat."""
+        self.active = set(self.players)
+        """Seats that still have games to play."""
+        self.send_lock = threading.Lock()
+        """Serializes the writes of the sender and the receive loop."""
+        self.done = threading.Event()
+
+    def send(self, message: str):
+        with self.send_lock:
+            super().send(message)
+
+    def on_connected(self):
+        # Every seat takes its place and says HELLO in one write, the receive loop sends everything else
+        messages = []
+        for seat in self.players:
+            messages.append(network_proto.SIT(seat, self.rooms[seat], self.size))
+            messages.extend(self.collect(seat))
+        self.send("".join(messages))
+
+    def send_outbound(self):
+        pass  # Replies are sent by receiver_batch
+
+    def sender(self):
+        # Only used by transports that can't be waited on, with a receiver thread
+        try:
+            self.on_connected()
+            while self.signal and not self.done.wait(HOST_TIMEOUT):
+                pass
+        except KeyboardInterrupt:
+            logger.info("Keyboard interrupt detected, closing connection.")
+        self.signal = False
+
+    def receiver_batch(self, messages: list[str]):
+        try:
+            bundles: dict[int, list[str]] = {}
+            for message in messages:
+                for net in NetworkMessage.from_string(message):
+                    if net.msg_type != SEAT:
+                        logger.warning(f"Message not addressed to a seat: \"{net}\"")
+                        continue
+                    bundles.setdefault(int(net.seat), []).append(str(net.msg))
+
+            replies = []
+            for seat, bundle in bundles.items():
+                if seat not in self.active:
+                    continue
+                if self.players[seat].receive_bundle(bundle) and self.next_game(seat):
+                    replies.append(network_proto.SIT(seat, self.rooms[seat], self.size))
+                replies.extend(self.collect(seat))
+            if replies:
+                self.send("".join(replies))
+
+        except SyntaxError:
+            logger.warning(f"Invalid message format for messages: {messages}")
+        except Exception as e:
+            logger.exception(f"Error in receiver: {e}")
+            self.signal = False
+
+    def collect(self, seat: int) -> list[str]:
+        """Takes the replies of the bot of a seat from its checkout, addressed to the Root of the seat's room."""
+        replies = []
+        checkout = self.players[seat].checkout
+        while not checkout.empty():
+            for game_msg in checkout.get_nowait().split(network_proto.term):
+                replies.append(network_proto.SEAT(seat, game_msg))
+        return replies
+
+    def next_game(self, seat: int) -> bool:
+        """
+        Resets the bot of a seat for another game once its game is over, if the seat has games left to play.
+
+        Returns:
+            bool -- True if the seat plays another game, False if it is done
+        """
+        self.played[seat] += 1
+        if 0 < self.games <= self.played[seat]:
+            self.active.discard(seat)
+            if not self.active:
+                logger.info(f"All seats finished their games.")
+                self.done.set()
+                self.stop()
+            return False
+        self.players[seat].reset()
+        return True
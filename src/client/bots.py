@@ -38,8 +38,8 @@ class CoupBot(InformedPlayer):
         
     """
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
 
     def choose_message(self) -> None:
         if len(self.possible_messages) == 0:
@@ -52,8 +52,8 @@ class CoupBot(InformedPlayer):
 class RandomBot(InformedPlayer):
     """RandomBot player class."""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
 
     def choose_message(self):
         if len(self.possible_messages) == 0:
@@ -63,8 +63,8 @@ class RandomBot(InformedPlayer):
 class HonestBot(InformedPlayer):
     """HonestBot player class."""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
 
     def pick_random(self, possible_messages: list[str]):
         """Pick a random message from the possible messages."""
@@ -217,8 +217,8 @@ class HonestBot(InformedPlayer):
 class TestBot(InformedPlayer):
     """TestBot player class."""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
 
     def choose_message(self):
         if len(self.possible_messages) == 0:
@@ -241,4 +241,13 @@ class TestBot(InformedPlayer):
         for m in msgs:
             if m.command == BLOCK and len(self.deck) == 1:
                 self.msg = m
-                return
\ No newline at end of file
+                return
+
+
+BOTS: dict[str, type[InformedPlayer]] = {
+    "CoupBot": CoupBot,
+    "TestBot": TestBot,
+    "RandomBot": RandomBot,
+    "HonestBot": HonestBot,
+}
+"""Bots available to the runner scripts, by name."""
\ No newline at end of file
@@ -1,17 +1,24 @@
 import socket
 import threading
 import sys
+from proto.framing import TEXT, LENGTH, PREAMBLE, NEGOTIATION_TIMEOUT, Framing, TextFraming, ClientFraming
+from proto.reassembler import Reassembler
+from transport.transport import TCP, get_transport
 from loguru import logger
 
 
 DEFAULT_ADDR = True  # Use default address for messages
 
 class Client:
-    def __init__(self, host="localhost", port=12345):
+    def __init__(self, host="localhost", port=12345, framing=TEXT, transport=TCP):
         self.host = host
         self.port = port
+        self.transport = get_transport(transport)
         self.socket = None
         self.signal = True
+        self.framing: Framing = ClientFraming() if framing == LENGTH else TextFraming()
+        self.reassembler = Reassembler(self.framing)
+        self.pending_messages: list[str] = []  # Messages received while negotiating the framing
 
     def sender(self):
         """
@@ -39,6 +46,17 @@ class Client:
 
         print(message)
 
+    def receiver_batch(self, messages: list[str]):
+        """
+        Handles the messages that were received together, by default one at a time with _receiver_.
+
+        Arguments:
+            messages {list[str]} -- messages received, in order
+        """
+
+        for message in messages:
+            self.receiver(message)
+
     # -- Wrappers --
 
     def send(self, message: str):
@@ -70,7 +88,7 @@ class Client:
 
         try:
             if self.socket is not None:
-                self.socket.sendall(message.encode("utf-8"))
+                self.socket.sendall(self.framing.encode(message))
             else:
                 logger.warning("You are not connected to the server.")
                 self.signal = False
@@ -84,29 +102,54 @@ class Client:
         """
 
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect((self.host, self.port))
-            logger.success(f"Connected to server at {self.host}:{self.port}")
+            self.socket = self.transport.connect(self.host, self.port)
+            logger.success(f"Connected to server at {self.transport.describe(self.host, self.port)}")
             self.socket.settimeout(1)
+            if isinstance(self.framing, ClientFraming):
+                self.__negotiate__(self.framing)
         except Exception as e:
             logger.error(f"Could not make a connection to the server: {e}")
             sys.exit(0)
 
+    def __negotiate__(self, framing: ClientFraming):
+        """
+        Asks the server for length-prefixed frames by sending the preamble.
+
+        The server accepts by echoing the preamble. If it does not do so in time, text frames are used.
+        """
+
+        if self.socket is None:
+            return
+        self.socket.sendall(PREAMBLE)
+        self.socket.settimeout(NEGOTIATION_TIMEOUT)
+
+        try:
+            while framing.waiting and self.reassembler.recv_from(self.socket):
+                self.pending_messages.extend(self.reassembler.frames())
+        except socket.timeout:
+            pass
+        self.socket.settimeout(1)
+
+        if framing.waiting:
+            logger.warning("The server does not support length-prefixed frames, using text frames.")
+            framing.give_up()
+
     def __handle_receive__(self):
         """
         Continuously receives messages from the server and calls receiver with any new message
         """
 
-        buffer = ""
+        if self.pending_messages:
+            self.receiver_batch(self.pending_messages)
+        self.pending_messages = []
+
         while self.signal:
             try:
                 if self.socket is not None:
-                    data = self.socket.recv(256)
-                    if data:
-                        buffer += data.decode("utf-8")
-                        while "\n" in buffer:
-                            message, buffer = buffer.split("\n", 1)
-                            self.receiver(message)
+                    if self.reassembler.recv_from(self.socket):
+                        messages = self.reassembler.frames()
+                        if messages:
+                            self.receiver_batch(messages)
                         continue
                 logger.error("Server has closed the connection.")
                 self.signal = False
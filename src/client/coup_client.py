@@ -1,8 +1,10 @@
 from .client import Client
-from .player import Player
+from .player import Player, InformedPlayer
 from .human import Human
 from proto.network_proto import SINGLE, EXCEPT, ALL
 from proto.network_proto import network_proto, NetworkMessage
+from proto.framing import TEXT
+from transport.transport import TCP
 from loguru import logger
 
 
@@ -10,20 +12,44 @@ DEFAULT_ADDR = True  # Use default address for messages
 ROOT_ADDR = 0
 
 class CoupClient(Client):
-    def __init__(self, host, port, player: Player):
-        super().__init__(host, port)
+    def __init__(self, host, port, player: Player, framing=TEXT, room: str | None = None, size: int | None = None, games: int = 1, transport=TCP):
+        """
+        __init__ method for CoupClient class.
+
+        Arguments:
+            host {str} -- server address
+            port {int} -- server port
+            player {Player} -- player playing through this client
+
+        Keyword Arguments:
+            framing {str} -- message framing, one of FRAMINGS (default: TEXT)
+            room {str | None} -- room to join on a room server, None on a single game server (default: None)
+            size {int | None} -- number of players if the room has to be created (default: None, server default)
+            games {int} -- number of games to play in the room on this connection, 0 for no limit (default: 1)
+            transport {str} -- how to reach the server, one of TRANSPORTS (default: TCP)
+        """
+        super().__init__(host, port, framing, transport)
 
         # Get console configuration from player
         self.player = player
+        self.room = room
+        self.size = size
+        self.games = games
+        self.played = 0
+        """Number of games finished on this connection."""
+        self.join_pending = room is not None
+        """Flag for whether the room must be joined before the next message is sent."""
 
     def addr_root(self, message: str):
         return network_proto.SINGLE(ROOT_ADDR, message)
 
-    def addr_strip(self, message: str):
-        net = NetworkMessage(message)
-        if net.msg is not None:
-            return str(net.msg)
-        raise SyntaxError(f"Invalid message format for message: \"{message}\"")
+    def addr_strip(self, message: str) -> list[str]:
+        game_msgs = []
+        for net in NetworkMessage.from_string(message):
+            if net.msg is None:
+                raise SyntaxError(f"Invalid message format for message: \"{message}\"")
+            game_msgs.append(str(net.msg))
+        return game_msgs
 
     def sender(self):
         try:
@@ -32,10 +58,7 @@ class CoupClient(Client):
 
                 # Send the move to the server
                 if message:
-                    if not self.player.is_root:
-                        # Add the root address
-                        message = self.addr_root(message)
-                    self.send(message)
+                    self.send(self.outbound(message))
                     
         except KeyboardInterrupt:
             logger.info("Keyboard interrupt detected, closing connection.")
@@ -45,12 +68,36 @@ class CoupClient(Client):
             logger.error(f"Error in sender: {e}")
         self.signal = False
 
+    def outbound(self, message: str) -> str:
+        """Turns an item of the player's checkout into what is sent to the server, joining the room first if needed."""
+        if not self.player.is_root:
+            # Add the root address to each reply of the bundle
+            message = "".join(map(self.addr_root, message.split(network_proto.term)))
+        if self.join_pending:
+            self.join_pending = False
+            message = network_proto.JOIN(self.room, self.size) + message
+        return message
+
+    def drain_checkout(self) -> str:
+        """Empties the player's checkout and returns its items ready to be sent in one write, or an empty string."""
+        checkout = self.player.checkout
+        messages = []
+        while not checkout.empty():
+            messages.append(self.outbound(checkout.get_nowait()))
+        return "".join(messages)
+
+    def receiver_batch(self, messages: list[str]):
+        # Messages received together are handled as one bundle
+        self.receiver(network_proto.term.join(messages))
+
     def receiver(self, message: str):
         try:
-            # Strip message address
-            if not self.player.is_root:
-                message = self.addr_strip(message)
-            if self.player.receive(message):
+            if self.player.is_root:
+                terminate = self.player.receive(message)
+            else:
+                # Strip message address
+                terminate = self.player.receive_bundle(self.addr_strip(message))
+            if terminate and not self.next_game():
                 self.signal = False
         
         except SyntaxError:
@@ -63,6 +110,24 @@ class CoupClient(Client):
             logger.exception(f"Error in receiver: {e}")
             self.signal = False
 
+    def next_game(self) -> bool:
+        """
+        Starts another game in the same room once a game is over, if the client has games left to play.
+
+        The player is reset and says HELLO again, the sender joins the room again before sending it. A room
+        is closed when its game ends, so the players joining it again get a new game.
+
+        Returns:
+            bool -- True if another game is starting, False if the client is done
+        """
+        self.played += 1
+        if self.room is None or not isinstance(self.player, InformedPlayer) or 0 < self.games <= self.played:
+            return False
+        logger.info(f"Game {self.played} over, joining room {self.room} again.")
+        self.join_pending = True
+        self.player.reset()
+        return True
+
 
 def main():
     # Get host and port
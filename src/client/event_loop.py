@@ -0,0 +1,98 @@
+import selectors
+import socket
+from .coup_client import CoupClient
+from loguru import logger
+
+
+class EventLoop:
+    """
+    Mixin running a Client as a single event loop, instead of a sender thread and a receiver thread.
+
+    The loop sleeps in a selector until the server sends something or the client is stopped, so an idle client
+    costs no CPU: there are no timeouts and nothing is polled. Whatever the client has to send is sent by
+    _send_outbound_, once after connecting and after each batch of received messages. Clients whose transport
+    has no file descriptor to wait on fall back to their threads.
+    """
+
+    socket: socket.socket | None
+
+    def run(self):
+        if not self.transport.selectable:
+            logger.debug(f"Transport {self.transport.name} can't be waited on, using threads.")
+            super().run()
+            return
+
+        self.__connect__()
+        self.wakeup, waker = socket.socketpair()
+        self.waker = waker
+        """Written to by _stop_ to wake the loop up from another thread."""
+        try:
+            self.socket.settimeout(None)
+            self.on_connected()
+            if self.pending_messages:
+                self.receiver_batch(self.pending_messages)
+                self.pending_messages = []
+                self.send_outbound()
+
+            with selectors.DefaultSelector() as selector:
+                selector.register(self.socket, selectors.EVENT_READ)
+                selector.register(self.wakeup, selectors.EVENT_READ)
+                while self.signal:
+                    for key, _ in selector.select():
+                        if key.fileobj is self.socket and self.signal:
+                            self.handle_readable()
+        except KeyboardInterrupt:
+            logger.info("Keyboard interrupt detected, closing connection.")
+        finally:
+            self.signal = False
+            self.socket.close()
+            self.wakeup.close()
+            self.waker.close()
+
+    def handle_readable(self):
+        """Hands everything the server sent to the client and sends the replies."""
+        try:
+            received = self.reassembler.recv_from(self.socket)
+        except OSError:
+            received = 0
+        if not received:
+            logger.error("Server has closed the connection.")
+            self.signal = False
+            return
+        messages = self.reassembler.frames()
+        if messages:
+            self.receiver_batch(messages)
+            self.send_outbound()
+
+    def stop(self):
+        """Makes the loop return, from any thread."""
+        self.signal = False
+        waker = getattr(self, "waker", None)
+        if waker is not None:
+            try:
+                waker.send(b"\0")
+            except OSError:
+                pass
+
+    def on_connected(self):
+        """Called once connected, before anything is received. Sends the first messages by default."""
+        self.send_outbound()
+
+    def send_outbound(self):
+        """Sends what the client has to send, if anything."""
+        raise NotImplementedError
+
+
+class EventCoupClient(EventLoop, CoupClient):
+    """
+    CoupClient for bots, running as a single event loop.
+
+    Bots reply while they handle the messages they receive, so their checkout is emptied right after each batch,
+    e.g. the replies to a whole bundle leave in one write. The client closes its connection after EXIT, unless it
+    has more games to play in its room.
+    """
+
+    def send_outbound(self):
+        messages = self.drain_checkout()
+        if messages:
+            self.send(messages)
@@ -2,6 +2,7 @@ from enum import Enum, auto
 from proto.game_proto import game_proto, GameMessage
 from .core import *
 from itertools import permutations
+from bisect import bisect_right
 
 
 class PlayerState(Enum):
@@ -42,6 +43,21 @@ class PlayerState(Enum):
     R_CHOOSE = auto()
     R_PLAYER = auto()
 
+# Coin amounts at which the possible actions of a turn change
+COIN_BRACKETS = (ASSASSINATION_COST, COUP_COST, COUP_COINS_THRESHOLD)
+
+# States whose responses depend on the cards of the player
+DECK_STATES = frozenset((
+    PlayerState.R_COUP_ME, PlayerState.R_LOSE_ME, PlayerState.R_SHOW, PlayerState.R_CHOOSE,
+    PlayerState.R_CHAL_MY_A, PlayerState.R_CHAL_MY_B, PlayerState.R_CHAL_MY_C, PlayerState.R_CHAL_MY_D, PlayerState.R_CHAL_MY_E,
+))
+
+RESPONSE_TABLE_SIZE = 4096  # Maximum number of entries of the response table
+_response_table: dict[tuple, tuple[str, ...]] = {}
+"""Responses already generated, by everything they depend on (see PlayerSim.response_key)."""
+
+INFO_RESPONSES = [game_proto.OK()]  # Possible messages after an informational message
+
 class Tag(Enum):
     T_NONE = auto()
     T_BLOCKING = auto()
@@ -83,14 +99,48 @@ class PlayerSim:
         """List of possible messages to send."""
         self.msg: GameMessage = GameMessage("OK")
         """Message to send."""
+        self.quiet: bool = False
+        """Flag for whether the player doesn't acknowledge informational messages (see _informational_)."""
     
     def set_state(self, state: PlayerState):
         """Sets the state of the player and generates possible messages for that state."""
         self.state = state
         self.possible_messages = self.generate_responses()
     
-    def generate_responses(self):
-        """Generates a list of possible messages to send."""
+    def informational(self) -> bool:
+        """Returns whether the last message only informed the player, i.e. OK is the only possible reply."""
+        return self.possible_messages == INFO_RESPONSES
+
+    def generate_responses(self) -> list[str]:
+        """
+        Generates a list of possible messages to send.
+
+        Responses are looked up in a table shared by all players, so each distinct situation is only generated once.
+        """
+        if not self.alive or self.state == PlayerState.IDLE:
+            return []
+
+        key = self.response_key()
+        responses = _response_table.get(key)
+        if responses is None:
+            if len(_response_table) >= RESPONSE_TABLE_SIZE:
+                _response_table.clear()
+            responses = _response_table[key] = tuple(self.build_responses())
+        return list(responses)
+
+    def response_key(self) -> tuple:
+        """Returns everything the possible messages depend on in the current state."""
+        state = self.state
+        if state == PlayerState.R_MY_TURN:
+            # The coin bracket decides the actions and the alive opponents are patched in as targets
+            opponents = tuple(player.id for player in self.players.values() if player is not self and player.alive)
+            return state, self.id, bisect_right(COIN_BRACKETS, self.coins), opponents
+        if state in DECK_STATES:
+            return state, self.id, tuple(self.deck), tuple(self.exchange_cards), self.tag == Tag.T_CHALLENGING
+        return state, self.id
+
+    def build_responses(self) -> list[str]:
+        """Builds the list of possible messages to send, without looking at the response table."""
         messages = []
 
         # If the player is dead or can't reply, they can't send any messages
@@ -1,9 +1,10 @@
 from proto.game_proto import game_proto, GameMessage
-from proto.game_proto import ACT, OK, CHAL, BLOCK, SHOW, LOSE, COINS, DECK, CHOOSE, KEEP, HELLO, PLAYER, START, READY, TURN, EXIT, DEAD, ILLEGAL
+from proto.network_proto import network_proto
+from proto.game_proto import ACT, OK, CHAL, BLOCK, SHOW, LOSE, COINS, DECK, CHOOSE, KEEP, HELLO, PLAYER, START, READY, TURN, EXIT, DEAD, ILLEGAL, QUIET
 from .game.state_machine import PlayerState, Tag, PlayerSim
 from .game.core import INCOME, FOREIGN_AID, COUP, TAX, ASSASSINATE, STEAL, EXCHANGE, ACTIONS, TARGET_ACTIONS  # Actions
 from .game.core import ASSASSIN, AMBASSADOR, CAPTAIN, DUKE, CONTESSA, CHARACTERS  # Characters
-from terminal.terminal import Terminal
+from terminal.terminal import Terminal, NullTerminal
 import queue, random
 from loguru import logger
 
@@ -22,10 +23,13 @@ class Player:
         self.term = Terminal(self.checkout) if terminal is None else terminal
         """Terminal used to write messages manually."""
     
-    def sender(self):
+    def sender(self, timeout: float = CHECKOUT_TIMEOUT):
         """
         Gets a message from checkout and returns it.
 
+        Keyword Arguments:
+            timeout {float} -- longest wait for a message (default: CHECKOUT_TIMEOUT)
+
         Returns:
             _str_ | None -- message
         """
@@ -35,7 +39,7 @@ class Player:
                 logger.info("Terminal closed.")
                 raise KeyboardInterrupt
             
-            return self.checkout.get(timeout=CHECKOUT_TIMEOUT)
+            return self.checkout.get(timeout=timeout)
         except queue.Empty:
             print(end="")   # weird way to update the console buffer
             return None
@@ -54,6 +58,21 @@ class Player:
         raise NotImplementedError
         return 0
 
+    def receive_bundle(self, messages: list[str]) -> int:
+        """
+        Informs the player of messages that arrived together, in order.
+
+        Arguments:
+            messages {list[str]} -- request/informative messages
+
+        Returns:
+            int -- 1 if the player wants to terminate, 0 otherwise.
+        """
+        for message in messages:
+            if self.receive(message):
+                return 1
+        return 0
+
 
 class InformedPlayer(Player, PlayerSim):
     """
@@ -72,6 +91,7 @@ class InformedPlayer(Player, PlayerSim):
         players (dict[str, PlayerSim]): Dictionary of players in the game.
         possible_messages (list[str]): List of possible messages the player can send.
         history (list[GameMessage]): History of received messages.
+        quiet (bool): Flag for whether the player doesn't acknowledge informational messages.
         ready (bool): Flag for whether the player is ready or not.
         replied (bool): Flag for whether the player has replied to the last message or not.
         state (PlayerState): State of the player.
@@ -81,39 +101,123 @@ class InformedPlayer(Player, PlayerSim):
         turn (bool): Flag for whether it is the player's turn or not.
     """
 
-    def __init__(self, terminal: Terminal | None = None):
-        Player.__init__(self, terminal)
-        PlayerSim.__init__(self, '0', {})
+    def __init__(self, terminal: Terminal | None = None, quiet: bool = False):
+        """
+        __init__ method for InformedPlayer class.
+
+        Keyword Arguments:
+            terminal {Terminal | None} -- terminal used to write messages manually (default: NullTerminal, bots don't read the console)
+            quiet {bool} -- ask the root not to wait for OK replies to informational messages (default: False)
+        """
+        Player.__init__(self, terminal if terminal is not None else NullTerminal())
         self.terminate_after_death = False
         """Flag for whether the player should terminate after its own death. \n\n- True: The player will terminate when dead. \n- False: The player will continue to receive messages without replying."""
+        self.reset(quiet)
+
+    def reset(self, quiet: bool | None = None) -> None:
+        """
+        Forgets the last game and says HELLO again, so the same player can play game after game.
+
+        Bots keeping state of their own between messages extend it to clear that state too.
+
+        Keyword Arguments:
+            quiet {bool | None} -- ask the root not to wait for OK replies to informational messages (default: same as before)
+        """
+        quiet = self.quiet if quiet is None else quiet
+        PlayerSim.__init__(self, '0', {})
+        self.quiet = quiet
         self.history: list[GameMessage] = [GameMessage(OK)]
         """History of received messages. Current received message is always the last one."""
-        self.msg = GameMessage(HELLO)
+        self.replies: list[str] | None = None
+        """Replies held back while a bundle is being handled, None outside of a bundle."""
+        self.msg = GameMessage(game_proto.HELLO(QUIET if quiet else None))
         self.send_message(self.msg)
 
     def receive(self, message: str) -> int:
         try:
-            logger.success("RECV - " + str(message))
-            self.history.append(GameMessage(message))
-            self.pre_update_state()
-            if self.state == PlayerState.IDLE or self.history[-1].command == DEAD:
-                pass
-            elif self.state == PlayerState.END:
-                logger.info("Game Over, terminating bot.")
-                return 1
-            else:
-                logger.debug(f"State: {self.state}")
-                logger.debug(f"Possible messages: {self.possible_messages}")
-                self.choose_message()
-                self.post_update_state()
-                self.send_message(self.msg)
-                logger.success("SEND - " + str(self.msg))
+            terminate = self.update(message)
+            if terminate is None:
+                self.decide()
+                self.reply()
+                return 0
+            return terminate
         except IndexError:
             logger.error(f"No possible messages.")
         except Exception as e:
             logger.exception(f"Error in receive: " + str(e))
         return 0
 
+    def update(self, message: str) -> int | None:
+        """
+        Updates the state of the player with a received message, up to the point where a reply must be chosen.
+
+        Arguments:
+            message {str} -- request/informative message
+
+        Returns:
+            int | None -- None if the player must choose a reply, otherwise 1 if it wants to terminate, 0 if not
+        """
+        logger.success("RECV - " + str(message))
+        game_msg = GameMessage(message)
+        if str(game_msg) in self.possible_messages:
+            # The root only sends our own replies back when it played them for us
+            self.replace_reply(game_msg)
+            return 0
+        self.history.append(game_msg)
+        self.pre_update_state()
+        if self.state == PlayerState.IDLE or self.history[-1].command == DEAD:
+            return 0
+        if self.state == PlayerState.END:
+            logger.info("Game Over, terminating bot.")
+            return 1
+        if self.quiet and self.informational():
+            # The root acknowledges the message on our behalf
+            self.msg = GameMessage(OK)
+            self.post_update_state()
+            return 0
+        logger.debug(f"State: {self.state}")
+        logger.debug(f"Possible messages: {self.possible_messages}")
+        return None
+
+    def decide(self) -> None:
+        """Sets _self.msg_ to the reply to the last message, by default with _choose_message_."""
+        self.choose_message()
+
+    def reply(self) -> None:
+        """Sends the message chosen by _decide_ and updates the state with it."""
+        self.post_update_state()
+        self.send_message(self.msg)
+        logger.success("SEND - " + str(self.msg))
+
+    def replace_reply(self, message: GameMessage) -> None:
+        """
+        Takes the reply the root played on behalf of the player, because its own came too late, in place of the
+        reply it sent.
+
+        Arguments:
+            message {GameMessage} -- reply played by the root
+        """
+        logger.warning(f"Reply {self.msg} came too late, the root played {message}.")
+        if self.msg.command in (CHAL, BLOCK):
+            self.tag = Tag.T_NONE  # Undo the tag set with the reply that came too late
+        self.msg = message
+        self.post_update_state()
+
+    def receive_bundle(self, messages: list[str]) -> int:
+        """
+        Handles the messages of a bundle one after the other and sends all the replies at once.
+
+        Replies are joined by the network terminator in a single checkout item.
+        """
+        self.replies = []
+        try:
+            terminate = super().receive_bundle(messages)
+        finally:
+            replies, self.replies = self.replies, None
+        if replies:
+            self.checkout.put(network_proto.term.join(replies))
+        return terminate
+
     def pre_update_state(self) -> None:
         """
         Updates the state of the player based on the received message before any action is taken. 
@@ -156,32 +260,7 @@ class InformedPlayer(Player, PlayerSim):
             logger.warning(f"Received unexpected message: KEEP")
         
         elif current_msg.command == ACT:
-            if current_msg.action == INCOME:
-                self.set_state(PlayerState.R_INCOME)
-            elif current_msg.action == FOREIGN_AID:
-                self.set_state(PlayerState.R_FAID)
-            elif current_msg.action == TAX:
-                self.set_state(PlayerState.R_TAX)
-            elif current_msg.action == EXCHANGE:
-                self.set_state(PlayerState.R_EXCHANGE)
-            elif current_msg.action == ASSASSINATE:
-                if current_msg.ID2 == self.id:
-                    self.set_state(PlayerState.R_ASSASS_ME)
-                else:
-                    self.set_state(PlayerState.R_ASSASS)
-            elif current_msg.action == STEAL:
-                if current_msg.ID2 == self.id:
-                    self.set_state(PlayerState.R_STEAL_ME)
-                else:
-                    self.set_state(PlayerState.R_STEAL)
-            elif current_msg.action == COUP:
-                if current_msg.ID2 == self.id:
-                    self.set_state(PlayerState.R_COUP_ME)
-                else:
-                    self.set_state(PlayerState.R_COUP)
-            else:
-                self.set_state(PlayerState.IDLE)
-                logger.error(f"Invalid action: {current_msg.action}")
+            self.set_state(self.act_state(current_msg))
                 
         elif current_msg.command == BLOCK:
             self.tag = Tag.T_NONE
@@ -358,6 +437,25 @@ class InformedPlayer(Player, PlayerSim):
             self.set_state(PlayerState.IDLE)
             logger.error(f"Invalid command: {current_msg.command}")
     
+    def act_state(self, act: GameMessage) -> PlayerState:
+        """Returns the state the player is in once another player announced the action _act_."""
+        if act.action == INCOME:
+            return PlayerState.R_INCOME
+        elif act.action == FOREIGN_AID:
+            return PlayerState.R_FAID
+        elif act.action == TAX:
+            return PlayerState.R_TAX
+        elif act.action == EXCHANGE:
+            return PlayerState.R_EXCHANGE
+        elif act.action == ASSASSINATE:
+            return PlayerState.R_ASSASS_ME if act.ID2 == self.id else PlayerState.R_ASSASS
+        elif act.action == STEAL:
+            return PlayerState.R_STEAL_ME if act.ID2 == self.id else PlayerState.R_STEAL
+        elif act.action == COUP:
+            return PlayerState.R_COUP_ME if act.ID2 == self.id else PlayerState.R_COUP
+        logger.error(f"Invalid action: {act.action}")
+        return PlayerState.IDLE
+
     def choose_message(self) -> None:
         """
         Called when the player is in a state where it can choose a message to send. 
@@ -400,5 +498,8 @@ class InformedPlayer(Player, PlayerSim):
             message {GameMessage} -- message to be sent
         """
         self.msg = message
-        self.checkout.put(str(self.msg))
+        if self.replies is not None:
+            self.replies.append(str(self.msg))
+        else:
+            self.checkout.put(str(self.msg))
  
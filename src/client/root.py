@@ -1,61 +1,151 @@
 from proto.network_proto import network_proto, NetworkMessage
 from proto.network_proto import ALL, SINGLE, EXCEPT, DISCONNECT
 from proto.game_proto import game_proto, GameMessage
-from proto.game_proto import ACT, OK, CHAL, BLOCK, SHOW, LOSE, COINS, DECK, CHOOSE, KEEP, HELLO, PLAYER, START, READY, TURN, EXIT, ILLEGAL
+from proto.game_proto import ACT, OK, CHAL, BLOCK, SHOW, LOSE, COINS, DECK, CHOOSE, KEEP, HELLO, PLAYER, START, READY, TURN, EXIT, ILLEGAL, QUIET
 from .game.core import *
 from .game.state_machine import PlayerState, Tag, PlayerSim
-from .player import Player
-from state_machine.state import State, StateMachine
+from .player import Player, CHECKOUT_TIMEOUT
+from state_machine.state import State, StateMachine, AUTO
+from terminal.terminal import Terminal
 import random
 import itertools
+import threading
+import time
 from loguru import logger
 
 
+ACK = GameMessage(OK)  # Reply applied on behalf of quiet players
+
+
 class Root(Player):
     """
     Root player class.
 
     This player sends and receives addressed messages, e.g. orig@message
+
+    Everything the root sends while handling a received message is put in _checkout_ as a single bundle
+    of network messages, so it leaves in one write and the server can deliver it in one write per client.
+
+    A root can host one game after another: _reset_ brings it back to the start of a new game.
+
+    With a _deadline_, a player that doesn't reply in time gets a default reply (see _default_reply_), which is
+    sent back to it so it can take it in place of its own, and the game goes on. The root doesn't keep time
+    itself: whoever hosts it calls _expire_, at _next_deadline_.
     """
 
-    def __init__(self, mode: str = "manual"):
-        super().__init__()
+    def __init__(self, mode: str = "manual", num_players: int = MAX_PLAYERS, terminal: Terminal | None = None, rng: random.Random | None = None, deadline: float | None = None):
+        """
+        __init__ method for Root class.
+
+        Keyword Arguments:
+            mode {str} -- "auto" to start the game as soon as _num_players_ joined (default: "manual")
+            num_players {int} -- number of players of an auto game (default: MAX_PLAYERS)
+            terminal {Terminal | None} -- terminal to write messages manually (default: None)
+            rng {random.Random | None} -- random generator shuffling the deck and the turn order (default: one seeded from the random module)
+            deadline {float | None} -- seconds each player has to reply to a message, None for no limit (default: None)
+        """
+        super().__init__(terminal)
         self.is_root = True
+        self.mode = mode
+        self.sm = RootStateMachine(self)
+        self.bundle: list[str] = []
+        """Network messages sent since the last flush."""
+        self.deadline = deadline
+        self.lock = threading.Lock()
+        """Serializes _receive_ and the deadline checks of _sender_, which run in different threads of a client."""
+        self.total_timeouts = 0
+        """Number of replies played on behalf of players since the root was created."""
+        self.reset(num_players, rng)
+
+    def reset(self, num_players: int | None = None, rng: random.Random | None = None):
+        """
+        Gets the root ready for a new game, reusing its state machine.
+
+        Keyword Arguments:
+            num_players {int | None} -- number of players of the new game (default: same as the last game)
+            rng {random.Random | None} -- random generator of the new game (default: one seeded from the random module)
+        """
+        if num_players is not None:
+            self.num_players = num_players
+        # Own generator, so the games hosted by a process don't share a random stream
+        self.rng = rng if rng is not None else random.Random(random.getrandbits(64))
         self.players: dict[str, PlayerSim] = {}
         self.turn_id = None
         self.deck = [*CHARACTERS, *CHARACTERS, *CHARACTERS]
-        self.sm = RootStateMachine(self)
         self.turn_challenger = None
         self.turn_blocker = None
         self.blocker_challenger = None
         self.turn_msg = None
-        self.mode = mode
         self.player_order: list[str] = []
         self.players_cycle = itertools.cycle(self.player_order)
+        self.asked: dict[str, float] = {}
+        """Time (time.monotonic) each player was last asked for a reply, only kept with a deadline."""
+        self.timeouts: dict[str, int] = {}
+        """Number of replies played on behalf of each player in this game."""
+        self.late: dict[str, list[tuple[str, ...]]] = {}
+        """Possible replies to each message the root played a reply for, by player, oldest first, until the late reply arrives."""
+        self.bundle.clear()
+        while not self.checkout.empty():
+            self.checkout.get_nowait()
+        self.sm.reset()
     
     def receive(self, net_msg: str) -> int:
-        try:
-            nets = NetworkMessage.from_string(net_msg)
-            for net in nets:
-                if self.receive_single(net):
-                    return 1
-        except SyntaxError:
-            logger.warning(f"Invalid message format.")
-        return 0
+        terminate = 0
+        with self.lock:
+            try:
+                nets = NetworkMessage.from_string(net_msg)
+                for net in nets:
+                    if self.receive_single(net):
+                        terminate = 1
+                        break
+            except SyntaxError:
+                logger.warning(f"Invalid message format.")
+            self.flush()
+        return terminate
+
+    def sender(self, timeout: float = CHECKOUT_TIMEOUT):
+        # The client waits on the checkout, so the deadlines are checked in between
+        if self.deadline is not None:
+            with self.lock:
+                self.expire()
+                next_deadline = self.next_deadline()
+            if next_deadline is not None:
+                timeout = max(0, min(timeout, next_deadline - time.monotonic()))
+        return super().sender(timeout)
+
+    def flush(self):
+        """Puts the network messages sent since the last flush in checkout, as one bundle."""
+        if self.bundle:
+            # Serialized network messages already end with the terminator
+            self.checkout.put("".join(self.bundle))
+            self.bundle.clear()
        
     def receive_single(self, net: NetworkMessage) -> int:
         if net.msg is None or net.addr is None:
             logger.warning(f"Received {net}")
             return 0
-        
+        return self.receive_from(net.addr, net.msg)
+    
+    def receive_from(self, orig: str, game_msg: str) -> int:
+        """
+        Handles a game message sent by player _orig_.
+
+        Arguments:
+            orig {str} -- ID of the player that sent the message
+            game_msg {str} -- game message, without network addressing
+
+        Returns:
+            int -- 1 if the root wants to terminate, 0 otherwise.
+        """
         # Check for disconnection message
-        if net.msg == DISCONNECT:
+        if game_msg == DISCONNECT:
             # Remove player from the game
-            logger.info(f"Player {net.addr} disconnected.")
-            self.players[net.addr].alive = False
-            self.players.pop(net.addr, None)
-            if self.game_over() and self.sm.current_state.name != "IDLE":
-                if self.sm.current_state.name == "END":
+            logger.info(f"Player {orig} disconnected.")
+            if orig in self.players:
+                self.players[orig].alive = False
+            self.players.pop(orig, None)
+            if self.game_over() and self.sm.current_state.id != self.sm.idle_state:
+                if self.sm.current_state.id == self.sm.end_state:
                     if sum([player.alive for player in self.players.values()]) == 0:
                         logger.info("All players disconnected, terminating root.")
                         return 1
@@ -65,32 +155,41 @@ class Root(Player):
         
         # Parse the message
         try:
-            game = GameMessage(net.msg)
+            game = GameMessage(game_msg)
         except SyntaxError:
             # Player message breaks Protocol
-            logger.warning(f"Player {net.addr}: {net.msg}")
+            logger.warning(f"Player {orig}: {game_msg}")
             
-            self.send_illegal(net.addr)
+            self.send_illegal(orig)
             return 0
         
-        logger.success(f"Player {net.addr}: {net.msg}")
+        if self.late.get(orig) and self.replied_late(orig, game):
+            # The root already played this reply for the player
+            logger.info(f"Player {orig} replied too late: {game_msg}")
+            return 0
+
+        logger.success(f"Player {orig}: {game_msg}")
         
         # Create player state
         if game.command == HELLO:
-            if net.addr in self.players.keys() or len(self.players) == MAX_PLAYERS or self.sm.current_state.name not in ["IDLE", "START"]:
+            if orig in self.players.keys() or len(self.players) >= self.num_players or self.sm.current_state.id not in self.sm.waiting_states:
                 # Player already exists or game is full
-                self.send_illegal(net.addr)
+                self.send_illegal(orig)
             else:
                 # Add new player
                 # TODO: assign first unused ID instead of using the address
-                self.players[net.addr] = (PlayerSim(net.addr, self.players))
+                self.players[orig] = (PlayerSim(orig, self.players))
+                self.players[orig].quiet = game.mode == QUIET
                 self.update_player_order()
-                self.send_single_and_update(game_proto.PLAYER(str(net.addr)), net.addr, PlayerState.R_PLAYER)
+                self.send_single_and_update(game_proto.PLAYER(str(orig)), orig, PlayerState.R_PLAYER)
+                # A quiet player won't acknowledge its ID
+                if self.settled():
+                    self.sm.update()
             return 0
         
         # Top-level state machine
-        self.update_player_state(net.addr, game)
-        if self.all_players_replied():
+        self.update_player_state(orig, game)
+        if self.settled():
             self.sm.update()
             logger.debug(f"Current state: {self.sm.current_state.name}")
 
@@ -107,7 +206,8 @@ class Root(Player):
         if player is None:
             return
         
-        if str(m) not in player.possible_messages or self.sm.current_state.name not in ["IDLE", "START"] and player.replied:
+        state = self.sm.current_state.id
+        if str(m) not in player.possible_messages or state not in self.sm.waiting_states and player.replied:
             self.send_illegal(orig)
             return
         player.replied = True
@@ -115,14 +215,14 @@ class Root(Player):
         # Store the message
         player.msg = m
 
-        if self.sm.current_state.name in ["IDLE", "START"]:  # Initial state
+        if state in self.sm.waiting_states:  # Initial state
             if m.command == READY:
                 player.ready = True
             if player.state == PlayerState.R_PLAYER:
                 player.set_state(PlayerState.START)
                 return
             
-        elif self.sm.current_state.name in ("FAID", "TAX", "EXCHANGE", "ASSASS", "STEAL"):  # Waiting for players to reply to the action
+        elif state in self.sm.action_states:  # Waiting for players to reply to the action
             player.tag = Tag.T_NONE
             if m.command == BLOCK:
                 if self.turn_blocker is None:
@@ -143,7 +243,7 @@ class Root(Player):
                 else:
                     player.tag = Tag.T_NONE
             
-        elif self.sm.current_state.name.endswith("BLOCK"):   # Waiting for players to reply to the block
+        elif state in self.sm.block_states:   # Waiting for players to reply to the block
             if m.command == CHAL:
                 if self.blocker_challenger is None:
                     player.tag = Tag.T_CHALLENGING
@@ -151,7 +251,7 @@ class Root(Player):
                 else:
                     player.tag = Tag.T_NONE
                                 
-        elif self.sm.current_state.name == "EXCHANGE_CHOOSE":
+        elif state == self.sm.choose_state:
             if player.state == PlayerState.R_CHOOSE:
                 hand = player.deck + player.exchange_cards
                 if m.card1 is not None:
@@ -172,13 +272,18 @@ class Root(Player):
         player.set_state(PlayerState.IDLE)
     
     def expect_reply_from_everyone(self):
+        now = time.monotonic() if self.deadline is not None else None
         for player in self.players.values():
             if player.alive:
                 player.replied = False
+                if now is not None:
+                    self.asked[player.id] = now
     
     def expect_reply_from(self, id: str):
         if self.players[id].alive:
             self.players[id].replied = False
+            if self.deadline is not None:
+                self.asked[id] = time.monotonic()
     
     def dont_expect_reply_from(self, id: str):
         self.players[id].replied = True
@@ -188,6 +293,92 @@ class Root(Player):
             if not player.replied:
                 return False
         return True
+
+    def next_deadline(self) -> float | None:
+        """Returns the time (time.monotonic) the first pending reply is due at, None if no reply is due."""
+        if self.deadline is None:
+            return None
+        asked = [self.asked[player.id] for player in self.players.values() if not player.replied and player.id in self.asked]
+        return min(asked) + self.deadline if asked else None
+
+    def expire(self, now: float | None = None):
+        """
+        Plays the default reply of every player whose reply is overdue, then lets the game go on.
+
+        Each reply played is sent to its player, and counted in _timeouts_. The real replies, once they arrive,
+        are ignored. Everything the root sends is flushed to checkout.
+
+        Keyword Arguments:
+            now {float | None} -- current time, as given by time.monotonic (default: time.monotonic())
+        """
+        if self.deadline is None:
+            return
+        now = time.monotonic() if now is None else now
+        expired = [player for player in self.players.values() if not player.replied and self.asked.get(player.id, now) + self.deadline <= now]
+        for player in expired:
+            if not player.possible_messages:
+                player.replied = True
+                continue
+            reply = self.default_reply(player)
+            logger.warning(f"Player {player.id} didn't reply in time, playing {reply} for them.")
+            self.timeouts[player.id] = self.timeouts.get(player.id, 0) + 1
+            self.total_timeouts += 1
+            self.late.setdefault(player.id, []).append(tuple(player.possible_messages))
+            self.update_player_state(player.id, reply)
+            self._send_single(str(reply), player.id)
+        if expired and self.settled():
+            self.sm.update()
+            logger.debug(f"Current state: {self.sm.current_state.name}")
+        self.flush()
+
+    def replied_late(self, orig: str, game: GameMessage) -> bool:
+        """
+        Checks if a reply of player _orig_ answers one of the messages the root already played a reply for.
+
+        Replies arrive in the order the messages were sent, so the reply is taken for the oldest of those messages
+        it is a possible reply to, and the ones before it are not waited for anymore. A reply to none of them is
+        a reply to the current message: the late replies were lost, so none is waited for anymore.
+
+        Arguments:
+            orig {str} -- ID of the player that sent the reply
+            game {GameMessage} -- reply
+
+        Returns:
+            bool -- True if the reply came too late and must be ignored
+        """
+        late = self.late[orig]
+        reply = str(game)
+        for i, possible_messages in enumerate(late):
+            if reply in possible_messages:
+                del late[:i + 1]
+                return True
+        late.clear()
+        return False
+
+    def default_reply(self, player: PlayerSim) -> GameMessage:
+        """
+        Returns the reply played on behalf of a player that didn't reply in time: OK if it can pass, the first
+        possible message otherwise (e.g. INCOME on its turn, the first of its cards to LOSE or SHOW, or KEEP of its
+        own cards). The player is told which reply was played, so its view of its cards and coins stays right.
+        """
+        if OK in player.possible_messages:
+            return ACK
+        return GameMessage(player.possible_messages[0])
+
+    def settled(self) -> bool:
+        """
+        Acknowledges the informational messages sent to quiet players and checks if every reply arrived.
+
+        Quiet players don't reply OK when it is their only possible reply, so the root applies
+        that reply itself instead of waiting for it.
+
+        Returns:
+            bool -- True if the state machine can be updated
+        """
+        for player in self.players.values():
+            if not player.replied and player.quiet and player.informational():
+                self.update_player_state(player.id, ACK)
+        return self.all_players_replied()
     
     def set_all_states(self, state: PlayerState):
         for player in self.players.values():
@@ -213,6 +404,10 @@ class Root(Player):
                 logger.debug(f"ID{player.id}: {player.tag}")
 
     def debug_players(self):
+        # The summary is only built if a sink accepts debug messages
+        logger.opt(lazy=True).debug("{}", self.players_summary)
+
+    def players_summary(self) -> str:
         string: str = ""
         for player in self.players.values():
             if player.alive:
@@ -223,12 +418,12 @@ class Root(Player):
     Coins: {player.coins}\n\
     Msg: {player.msg}\n\
     Possible messages: {player.possible_messages}\n")
-        logger.debug(string)
+        return string
 
 ### State Machine Conditions
     
     def auto_start(self):
-        return self.mode == "auto" and len(self.players) == MAX_PLAYERS
+        return self.mode == "auto" and len(self.players) == self.num_players
     
     def all_players_ready(self):
         return all([player.alive and player.ready for player in self.players.values()])
@@ -288,6 +483,7 @@ class Root(Player):
     
     def send_start(self):
         self._send_all(game_proto.START())
+        self.expect_reply_from_everyone()  # READY
     
     def setup_decks(self):
         for player in self.players.values():
@@ -492,9 +688,10 @@ class Root(Player):
     
     def end_game(self):
         self.send_all_and_update(game_proto.EXIT(), PlayerState.END)
-        for player in self.players.values():
-            if player.alive:
-                logger.success(f"🏆 Player {player.id} wins!")
+        for player_id in self.winners():
+            logger.success(f"🏆 Player {player_id} wins!")
+        for player_id, count in self.timeouts.items():
+            logger.warning(f"Player {player_id} timed out {count} times.")
     
 ### Game methods
 
@@ -524,7 +721,7 @@ class Root(Player):
 
     def take_card(self, deck: list[str]):
         if deck:  # Check if deck is not empty
-            return deck.pop(random.randint(0, len(deck) - 1))
+            return deck.pop(self.rng.randrange(len(deck)))
         raise IndexError("Deck is empty, cannot take card.")
     
     def next_player_turn(self):
@@ -607,9 +804,15 @@ class Root(Player):
     
 ### Helper methods
 
+    def winners(self) -> list[str]:
+        """Returns the IDs of the players still alive once the game is over."""
+        if not self.game_over():
+            return []
+        return [player.id for player in self.players.values() if player.alive]
+
     def update_player_order(self):
         self.player_order = list(self.players.keys())
-        random.shuffle(self.player_order)
+        self.rng.shuffle(self.player_order)
         self.players_cycle = itertools.cycle(self.player_order)
         logger.debug(f"Updated player order: {self.player_order}")
 
@@ -631,15 +834,15 @@ class Root(Player):
     
     def _send_single(self, game_msg: str, dest: str):
         logger.info(f"Sent to player {dest}: {game_msg}")
-        self.checkout.put(network_proto.SINGLE(dest, game_msg))
+        self.bundle.append(network_proto.SINGLE(dest, game_msg))
     
     def _send_all(self, game_msg: str):
         logger.info(f"Sent to ALL players: {game_msg}")
-        self.checkout.put(network_proto.ALL(game_msg))
+        self.bundle.append(network_proto.ALL(game_msg))
     
     def _send_except(self, game_msg: str, exclude: str):
         logger.info(f"Sent to all except player {exclude}: {game_msg}")
-        self.checkout.put(network_proto.EXCEPT(exclude, game_msg))
+        self.bundle.append(network_proto.EXCEPT(exclude, game_msg))
 
     def send_illegal(self, dest: str):
         self._send_single(game_proto.ILLEGAL(), dest)
@@ -664,10 +867,17 @@ class Root(Player):
 
 
 class RootStateMachine(StateMachine):
+    """
+    State machine of the game run by the Root.
+
+    It runs to completion: after the replies to a state arrive, an update keeps taking transitions until
+    the root is waiting for replies again.
+    """
+
     def __init__(self, root: Root):
-        auto = lambda: True
+        auto = AUTO
         
-        super().__init__(State("IDLE", entry_action=None))
+        super().__init__(State("IDLE", entry_action=None), run_to_completion=True, ready=root.settled)
         self.add_transition("IDLE", "SETUP_DECK", root.all_players_ready)
         self.add_transition("IDLE", "START", root.auto_start)
         
@@ -924,6 +1134,18 @@ class RootStateMachine(StateMachine):
                         entry_action=root.end_game,
                         transitions={})
 
+        # IDs of the states the root checks when it receives a message
+        self.idle_state = self.states["IDLE"].id
+        self.end_state = self.states["END"].id
+        self.choose_state = self.states["EXCHANGE_CHOOSE"].id
+        self.waiting_states = self.state_ids("IDLE", "START")
+        """States where players can still join the game."""
+        self.action_states = self.state_ids("FAID", "TAX", "EXCHANGE", "ASSASS", "STEAL")
+        """States waiting for the replies to an action."""
+        self.block_states = frozenset(state.id for state in self.states_by_id if state.name.endswith("BLOCK"))
+        """States waiting for the replies to a block."""
+        self.compile()
+
         
     def new_state(self, name: str, entry_action = None, exit_action = None, transitions = {}):
         self.add_state(State(name, entry_action, exit_action))
@@ -0,0 +1,66 @@
+from typing import Callable
+from .root import Root
+from .game.core import MAX_PLAYERS
+from terminal.terminal import NullTerminal
+import threading
+import random
+from loguru import logger
+
+
+MAX_IDLE_ROOTS = 64  # Roots kept for reuse, the others are left to the garbage collector
+
+
+class RootPool:
+    """
+    Roots of the games hosted by a process.
+
+    Building a Root builds its whole state machine, so roots are reset and handed out again once their game is over
+    instead of being rebuilt for every game. Each game gets a random stream of its own, drawn from the pool generator,
+    so games sharing the process don't draw from one interleaved stream and a seeded pool deals the same games every run.
+    """
+
+    def __init__(self, factory: Callable[[int], Root] | None = None, seed: int | None = None, max_idle: int = MAX_IDLE_ROOTS):
+        """
+        __init__ method for RootPool class.
+
+        Keyword Arguments:
+            factory {(int) -> Root} -- builds a root for a number of players (default: auto Root without terminal)
+            seed {int | None} -- seed of the pool generator (default: None)
+            max_idle {int} -- maximum number of roots kept for reuse (default: MAX_IDLE_ROOTS)
+        """
+        self.factory = factory or (lambda num_players: Root("auto", num_players, NullTerminal()))
+        self.rng = random.Random(seed)
+        self.max_idle = max_idle
+        self.idle: list[Root] = []
+        self.lock = threading.Lock()
+        """Guards the idle roots and the pool generator, the servers acquire roots from several threads."""
+        self.created = 0
+        """Number of roots built by the pool."""
+
+    def acquire(self, num_players: int = MAX_PLAYERS) -> Root:
+        """
+        Gets a root ready for a new game.
+
+        Keyword Arguments:
+            num_players {int} -- number of players of the game (default: MAX_PLAYERS)
+
+        Returns:
+            Root -- reused root if one is idle, a new one otherwise
+        """
+        with self.lock:
+            rng = random.Random(self.rng.getrandbits(64))
+            root = self.idle.pop() if self.idle else None
+            if root is None:
+                self.created += 1
+        if root is None:
+            root = self.factory(num_players)
+        root.reset(num_players, rng)
+        return root
+
+    def release(self, root: Root):
+        """Gives back a root whose game is over, it must not be used afterwards."""
+        with self.lock:
+            if len(self.idle) < self.max_idle:
+                self.idle.append(root)
+            else:
+                logger.debug("Root pool is full, dropping root.")
@@ -0,0 +1,124 @@
+from .player import InformedPlayer
+from .game.state_machine import PlayerState, PlayerSim
+from proto.game_proto import GameMessage, ACT, TURN
+from concurrent.futures import Future, ThreadPoolExecutor
+from loguru import logger
+
+
+SPECULATION_STATES = frozenset((PlayerState.R_OTHER_TURN, PlayerState.IDLE))  # States waiting for someone else
+
+class SpeculativePlayer(InformedPlayer):
+    """
+    InformedPlayer that works out its next reply while it waits for the other players.
+
+    Once the player is in one of SPECULATION_STATES, the messages it may receive next are predicted with _predict_,
+    and _precompute_ works out the reply to each of them in a worker thread. Each reply is kept under the state, the
+    possible messages and the message it was computed for: when the next message needing a reply matches one of
+    them, the reply is sent without calling _choose_message_, otherwise the replies are dropped and _choose_message_
+    decides as usual. Only the next reply is predicted, the speculations are dropped once it is chosen.
+
+    Bots override _precompute_ to speculate, and may override _predict_. Speculation is off until _precompute_ is
+    overridden.
+    """
+
+    def __init__(self, **kwargs):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculation")
+        self.speculations: dict[tuple[PlayerState, tuple[str, ...], str], Future] = {}
+        """Replies being precomputed, by state, possible messages and message."""
+        self.speculated_at = -1
+        """Length of the history when the speculations were started, so they are started once per message."""
+        self.hits = 0
+        """Number of replies that were precomputed."""
+        self.misses = 0
+        """Number of replies chosen while speculations were ready for other messages."""
+        super().__init__(**kwargs)
+
+    def reset(self, quiet: bool | None = None) -> None:
+        self.drop_speculations()
+        self.speculated_at = -1
+        super().reset(quiet)
+
+    def predict(self) -> list[str]:
+        """
+        Returns the messages likely to arrive next, whose replies are worth precomputing.
+
+        By default these are the actions the player whose turn it is can announce, right after its TURN.
+        Only actions (ACT) are speculated on.
+        """
+        last = self.history[-1]
+        if self.state != PlayerState.R_OTHER_TURN or last.command != TURN or last.ID1 not in self.players:
+            return []
+        # The turn player's view of the table: everyone else, this player included
+        opponents = {id: player for id, player in self.players.items() if id != last.ID1}
+        opponents[self.id] = self
+        turn = PlayerSim(str(last.ID1), opponents)
+        turn.coins = self.players[last.ID1].coins
+        turn.set_state(PlayerState.R_MY_TURN)
+        return turn.possible_messages
+
+    def precompute(self, state: PlayerState, possible_messages: tuple[str, ...], message: GameMessage) -> str | None:
+        """
+        Called in a worker thread to choose the reply to a predicted message.
+
+        The player keeps handling messages while it runs, so it should rely on its arguments and on what it copied
+        from the player, and must not change the player.
+
+        Arguments:
+            state {PlayerState} -- state the player will be in once _message_ arrives
+            possible_messages {tuple[str, ...]} -- possible replies in that state
+            message {GameMessage} -- predicted message
+
+        Returns:
+            str | None -- reply to send if _message_ arrives, None to let _choose_message_ decide
+        """
+        return None
+
+    def receive(self, message: str) -> int:
+        terminate = super().receive(message)
+        if self.state in SPECULATION_STATES and self.speculated_at != len(self.history):
+            self.speculate()
+        return terminate
+
+    def speculate(self) -> None:
+        """Starts precomputing the replies to the predicted messages, instead of those of the last prediction."""
+        self.drop_speculations()
+        self.speculated_at = len(self.history)
+        if type(self).precompute is SpeculativePlayer.precompute:
+            return
+        for message in self.predict():
+            game_msg = GameMessage(message)
+            if game_msg.command != ACT:
+                continue
+            state = self.act_state(game_msg)
+            sim = PlayerSim(self.id, self.players)
+            sim.deck = list(self.deck)
+            sim.coins = self.coins
+            sim.set_state(state)
+            possible_messages = tuple(sim.possible_messages)
+            if possible_messages:
+                key = (state, possible_messages, str(game_msg))
+                self.speculations[key] = self.executor.submit(self.precompute, state, possible_messages, game_msg)
+
+    def drop_speculations(self) -> None:
+        """Cancels the replies still waiting to be precomputed and forgets the others."""
+        for future in self.speculations.values():
+            future.cancel()
+        self.speculations = {}
+
+    def decide(self) -> None:
+        speculated = bool(self.speculations)
+        future = self.speculations.pop((self.state, tuple(self.possible_messages), str(self.history[-1])), None)
+        self.drop_speculations()
+        reply = None
+        if future is not None and not future.cancelled():
+            try:
+                reply = future.result()
+            except Exception as e:
+                logger.warning(f"Speculation failed: {e}")
+        if reply is not None and reply in self.possible_messages:
+            self.hits += 1
+            self.msg = GameMessage(reply)
+            return
+        if speculated:
+            self.misses += 1
+        super().decide()
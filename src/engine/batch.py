@@ -0,0 +1,433 @@
+import numpy as np
+from client.game.core import *
+
+
+# Indexes of characters and actions, in the order of the tuples in core
+CHAR_INDEX = {card: i for i, card in enumerate(CHARACTERS)}
+ACTION_INDEX = {action: i for i, action in enumerate(ACTIONS)}
+N_CHARS = len(CHARACTERS)
+N_ACTIONS = len(ACTIONS)
+CARDS_PER_CHARACTER = 3
+NO_CARD = -1
+
+A_INCOME = ACTION_INDEX[INCOME]
+A_FOREIGN_AID = ACTION_INDEX[FOREIGN_AID]
+A_COUP = ACTION_INDEX[COUP]
+A_TAX = ACTION_INDEX[TAX]
+A_ASSASSINATE = ACTION_INDEX[ASSASSINATE]
+A_STEAL = ACTION_INDEX[STEAL]
+A_EXCHANGE = ACTION_INDEX[EXCHANGE]
+
+# Character claimed by each action (NO_CARD if the action can't be challenged)
+CLAIMS = np.full(N_ACTIONS, NO_CARD, dtype=np.int8)
+CLAIMS[A_TAX] = CHAR_INDEX[DUKE]
+CLAIMS[A_EXCHANGE] = CHAR_INDEX[AMBASSADOR]
+CLAIMS[A_STEAL] = CHAR_INDEX[CAPTAIN]
+CLAIMS[A_ASSASSINATE] = CHAR_INDEX[ASSASSIN]
+
+# Decision kinds, each one has its own option space
+ACTION = 0          # R_MY_TURN: option = action * n_players + target (target = actor for actions without target)
+RESPOND = 1         # R_FAID, R_TAX, R_EXCHANGE, R_ASSASS(_ME), R_STEAL(_ME): option = R_OK, R_CHAL or R_BLOCK + character
+RESPOND_BLOCK = 2   # R_BLOCK_*: option = R_OK or R_CHAL
+REVEAL = 3          # R_CHAL_MY_*: option = hand slot to show (if it is the claimed character) or lose
+LOSE = 4            # R_LOSE_ME, R_COUP_ME: option = hand slot to lose
+KEEP = 5            # R_CHOOSE: option = index in KEEP_OPTIONS
+DECISIONS = (ACTION, RESPOND, RESPOND_BLOCK, REVEAL, LOSE, KEEP)
+
+R_OK = 0
+R_CHAL = 1
+R_BLOCK = 2
+N_RESPONSES = R_BLOCK + N_CHARS
+
+# Cards to keep after an exchange, as indexes in [hand slot 0, hand slot 1, drawn card 0, drawn card 1]
+KEEP_OPTIONS = ((0,), (1,), (2,), (3,), (0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3))
+KEEP_SINGLES = np.array([len(option) == 1 for option in KEEP_OPTIONS])
+KEEP_FIRST = np.array([option[0] for option in KEEP_OPTIONS])
+KEEP_SECOND = np.array([option[-1] for option in KEEP_OPTIONS])
+
+MAX_TURNS = 1000  # Safety limit for a single game
+
+
+class RandomPolicy:
+    """
+    Batch policy that picks a legal option uniformly at random.
+    """
+
+    def choose(self, sim: "BatchSimulator", kind: int, games: np.ndarray, seats: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        Chooses one option for each decision in a batch.
+
+        Arguments:
+            sim {BatchSimulator} -- simulator asking for the decisions, its arrays can be read but not changed
+            kind {int} -- decision kind (ACTION, RESPOND, RESPOND_BLOCK, REVEAL, LOSE or KEEP)
+            games {np.ndarray} -- game index of each decision, shape (M,)
+            seats {np.ndarray} -- seat of the player deciding, shape (M,)
+            mask {np.ndarray} -- legal options of each decision, boolean array of shape (M, K)
+
+        Returns:
+            np.ndarray -- chosen option of each decision, shape (M,)
+        """
+        scores = sim.rng.random(mask.shape)
+        scores[~mask] = -1.0
+        return scores.argmax(axis=1)
+
+
+class TablePolicy(RandomPolicy):
+    """
+    Batch policy that picks legal options at random, with a fixed weight for each option.
+
+    Options without a weight table, or with weight 0, are picked uniformly among the remaining legal ones.
+    For ACTION decisions the table can hold one weight per action, shared by every target.
+    """
+
+    def __init__(self, weights: dict[int, list[float] | np.ndarray]):
+        self.weights = {kind: np.asarray(table, dtype=np.float64) for kind, table in weights.items()}
+
+    def choose(self, sim: "BatchSimulator", kind: int, games: np.ndarray, seats: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        weights = self.weights.get(kind)
+        if weights is None:
+            return super().choose(sim, kind, games, seats, mask)
+        if kind == ACTION and weights.shape[0] == N_ACTIONS:
+            weights = np.repeat(weights, sim.n_players)
+
+        # Weighted sampling: the smallest exponential key wins (Efraimidis-Spirakis)
+        weighted = mask & (weights > 0)
+        keys = np.full(mask.shape, np.inf)
+        np.divide(sim.rng.exponential(size=mask.shape), weights, out=keys, where=weighted)
+        choices = keys.argmin(axis=1)
+        fallback = ~weighted.any(axis=1)
+        if fallback.any():
+            choices[fallback] = super().choose(sim, kind, games[fallback], seats[fallback], mask[fallback])
+        return choices
+
+
+class BatchSimulator:
+    """
+    Plays many games at once, holding their state as NumPy arrays (struct of arrays).
+
+    The rules follow the Root: responses to an action are collected from every player at once and a block
+    has priority over a challenge. When several players block or challenge, a random one of them goes first.
+
+    Attributes:
+        alive (np.ndarray): Alive flag of each player, shape (N, P).
+        coins (np.ndarray): Coins of each player, shape (N, P).
+        deck (np.ndarray): Number of cards of each character left in the deck, shape (N, N_CHARS).
+        done (np.ndarray): Flag for whether each game is over, shape (N,).
+        hand (np.ndarray): Character index of each card in the hand of each player (NO_CARD if lost), shape (N, P, 2).
+        rng (np.random.Generator): Random generator shared by the simulator and the policies.
+        turn (np.ndarray): Seat of the player taking the turn in each game, shape (N,).
+        turns (np.ndarray): Number of turns played in each game, shape (N,).
+        winner (np.ndarray): Seat of the winner of each game (-1 while playing), shape (N,).
+    """
+
+    def __init__(self, n_games: int, n_players: int, policies: RandomPolicy | list[RandomPolicy] | None = None, seed: int | None = None):
+        """
+        __init__ method for BatchSimulator class.
+
+        Arguments:
+            n_games {int} -- number of games simulated at once
+            n_players {int} -- number of players in each game
+
+        Keyword Arguments:
+            policies {RandomPolicy | list[RandomPolicy] | None} -- policy of all seats or one policy per seat (default: RandomPolicy)
+            seed {int | None} -- seed for the random generator (default: None)
+        """
+        if not MIN_PLAYERS <= n_players <= MAX_PLAYERS:
+            raise ValueError(f"Number of players must be between {MIN_PLAYERS} and {MAX_PLAYERS}")
+        if policies is None:
+            policies = RandomPolicy()
+        if not isinstance(policies, list):
+            policies = [policies] * n_players
+        if len(policies) != n_players:
+            raise ValueError("There must be one policy per seat")
+
+        self.n_games = n_games
+        self.n_players = n_players
+        self.policies = policies
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self):
+        """Deals new games in every slot."""
+        n, p = self.n_games, self.n_players
+        self.coins = np.full((n, p), STARTING_COINS, dtype=np.int16)
+        self.alive = np.ones((n, p), dtype=bool)
+        self.hand = np.full((n, p, 2), NO_CARD, dtype=np.int8)
+        self.deck = np.full((n, N_CHARS), CARDS_PER_CHARACTER, dtype=np.int16)
+        self.turn = self.rng.integers(0, p, size=n)
+        self.turns = np.zeros(n, dtype=np.int32)
+        self.done = np.zeros(n, dtype=bool)
+        self.winner = np.full(n, -1, dtype=np.int8)
+
+        games = np.arange(n)
+        for seat in range(p):
+            for slot in range(2):
+                self.hand[:, seat, slot] = self._draw(games)
+
+    def cards(self) -> np.ndarray:
+        """Returns the number of cards (influence) of each player, shape (N, P)."""
+        return (self.hand != NO_CARD).sum(axis=2)
+
+    def run(self, max_turns: int = MAX_TURNS) -> np.ndarray:
+        """
+        Steps every game until all of them are over.
+
+        Keyword Arguments:
+            max_turns {int} -- games still running after this many turns are stopped without a winner (default: MAX_TURNS)
+
+        Returns:
+            np.ndarray -- seat of the winner of each game, -1 for stopped games
+        """
+        while not self.done.all():
+            self.step()
+            stuck = ~self.done & (self.turns >= max_turns)
+            self.done[stuck] = True
+        return self.winner
+
+    def step(self):
+        """Plays one turn in every game that is not over."""
+        g = np.flatnonzero(~self.done)
+        if g.size == 0:
+            return
+        actor = self.turn[g]
+
+        # Action
+        move = self._ask(ACTION, g, actor, self._action_mask(g, actor))
+        action = move // self.n_players
+        target = move % self.n_players
+
+        pays = action == A_COUP
+        self.coins[g[pays], actor[pays]] -= COUP_COST
+        pays = action == A_ASSASSINATE
+        self.coins[g[pays], actor[pays]] -= ASSASSINATION_COST
+
+        # Responses to the action
+        success = np.ones(g.size, dtype=bool)
+        blocker, claim, challenger = self._responses(g, actor, action, target)
+
+        blocked = blocker >= 0
+        if blocked.any():
+            i = np.flatnonzero(blocked)
+            block_challenger = self._block_responses(g[i], actor[i], blocker[i])
+            challenged = block_challenger >= 0
+            success[i[~challenged]] = False
+            if challenged.any():
+                j = i[challenged]
+                shown = self._challenge(g[j], blocker[j], claim[j], block_challenger[challenged])
+                success[j[shown]] = False
+
+        challenged = (challenger >= 0) & ~blocked
+        if challenged.any():
+            i = np.flatnonzero(challenged)
+            shown = self._challenge(g[i], actor[i], CLAIMS[action[i]], challenger[i])
+            success[i[~shown]] = False
+
+        # Effects of the action
+        self._resolve(g[success], actor[success], action[success], target[success])
+
+        # End of turn
+        self.turns[g] += 1
+        over = self.alive[g].sum(axis=1) <= 1
+        if over.any():
+            ended = g[over]
+            self.done[ended] = True
+            self.winner[ended] = self.alive[ended].argmax(axis=1)
+        self._next_turn(g[~over])
+
+### Decisions
+
+    def _ask(self, kind: int, games: np.ndarray, seats: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """Asks the policy of each seat for its decisions."""
+        if games.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        first = self.policies[0]
+        if all(policy is first for policy in self.policies):
+            return first.choose(self, kind, games, seats, mask)
+        choices = np.zeros(games.size, dtype=np.int64)
+        for seat in np.unique(seats):
+            i = seats == seat
+            choices[i] = self.policies[seat].choose(self, kind, games[i], seats[i], mask[i])
+        return choices
+
+    def _action_mask(self, g: np.ndarray, actor: np.ndarray) -> np.ndarray:
+        """Legal actions of the player taking the turn, like PlayerSim.generate_responses for R_MY_TURN."""
+        p = self.n_players
+        rows = np.arange(g.size)
+        coins = self.coins[g, actor]
+        targets = self.alive[g].copy()
+        targets[rows, actor] = False
+
+        mask = np.zeros((g.size, N_ACTIONS, p), dtype=bool)
+        free = coins < COUP_COINS_THRESHOLD
+        for action in (A_INCOME, A_FOREIGN_AID, A_TAX, A_EXCHANGE):
+            mask[rows, action, actor] = free
+        mask[:, A_STEAL] = targets & free[:, None]
+        mask[:, A_ASSASSINATE] = targets & (free & (coins >= ASSASSINATION_COST))[:, None]
+        mask[:, A_COUP] = targets & (coins >= COUP_COST)[:, None]
+        return mask.reshape(g.size, N_ACTIONS * p)
+
+    def _responses(self, g: np.ndarray, actor: np.ndarray, action: np.ndarray, target: np.ndarray):
+        """
+        Collects the replies of every other player to the action.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray] -- seat of the blocker, character claimed by the block and seat of the challenger of each game (-1 if none)
+        """
+        claim = np.full(g.size, NO_CARD, dtype=np.int8)
+        blocker = np.full(g.size, -1)
+        challenger = np.full(g.size, -1)
+
+        # Rows are (game, player) pairs of players that can reply something else than OK
+        responders = self.alive[g].copy()
+        responders[np.arange(g.size), actor] = False
+        responders &= ((action != A_INCOME) & (action != A_COUP))[:, None]
+        i, seat = np.nonzero(responders)
+        if i.size == 0:
+            return blocker, claim, challenger
+
+        act = action[i]
+        is_target = seat == target[i]
+        mask = np.zeros((i.size, N_RESPONSES), dtype=bool)
+        mask[:, R_OK] = True
+        mask[:, R_CHAL] = CLAIMS[act] != NO_CARD
+        mask[:, R_BLOCK + CHAR_INDEX[DUKE]] = act == A_FOREIGN_AID
+        mask[:, R_BLOCK + CHAR_INDEX[CONTESSA]] = (act == A_ASSASSINATE) & is_target
+        mask[:, R_BLOCK + CHAR_INDEX[CAPTAIN]] = (act == A_STEAL) & is_target
+        mask[:, R_BLOCK + CHAR_INDEX[AMBASSADOR]] = (act == A_STEAL) & is_target
+        reply = self._ask(RESPOND, g[i], seat, mask)
+
+        # A random blocker goes first, then a random challenger
+        priority = self.rng.random(i.size)
+        first_blocker = self._first(i, seat, reply >= R_BLOCK, priority, g.size)
+        first_challenger = self._first(i, seat, reply == R_CHAL, priority, g.size)
+        has_block = first_blocker >= 0
+        blocker[has_block] = seat[first_blocker[has_block]]
+        claim[has_block] = reply[first_blocker[has_block]] - R_BLOCK
+        has_chal = first_challenger >= 0
+        challenger[has_chal] = seat[first_challenger[has_chal]]
+        return blocker, claim, challenger
+
+    def _block_responses(self, g: np.ndarray, actor: np.ndarray, blocker: np.ndarray) -> np.ndarray:
+        """Collects the replies of every other player to a block. Returns the seat of the challenger of each game (-1 if none)."""
+        challenger = np.full(g.size, -1)
+        responders = self.alive[g].copy()
+        responders[np.arange(g.size), blocker] = False
+        i, seat = np.nonzero(responders)
+        if i.size == 0:
+            return challenger
+
+        mask = np.ones((i.size, 2), dtype=bool)
+        reply = self._ask(RESPOND_BLOCK, g[i], seat, mask)
+        first = self._first(i, seat, reply == R_CHAL, self.rng.random(i.size), g.size)
+        has_chal = first >= 0
+        challenger[has_chal] = seat[first[has_chal]]
+        return challenger
+
+    def _first(self, rows: np.ndarray, seats: np.ndarray, selected: np.ndarray, priority: np.ndarray, size: int) -> np.ndarray:
+        """Returns, for each of _size_ games, the index of the selected reply with the highest priority (-1 if none)."""
+        best = np.full(size, -1.0)
+        np.maximum.at(best, rows[selected], priority[selected])
+        first = np.full(size, -1)
+        winners = selected & (priority == best[rows])
+        first[rows[winners]] = np.flatnonzero(winners)
+        return first
+
+    def _challenge(self, g: np.ndarray, challenged: np.ndarray, claim: np.ndarray, challenger: np.ndarray) -> np.ndarray:
+        """
+        Resolves challenges. The challenged player reveals a card: if it is the claimed character it is shown,
+        replaced from the deck and the challenger loses an influence, otherwise the card is lost.
+
+        Returns:
+            np.ndarray -- flag for whether the claimed character was shown
+        """
+        mask = self.hand[g, challenged] != NO_CARD
+        slot = self._ask(REVEAL, g, challenged, mask)
+        card = self.hand[g, challenged, slot]
+        shown = card == claim
+
+        bluff = ~shown
+        self._remove_card(g[bluff], challenged[bluff], slot[bluff])
+
+        if shown.any():
+            gs, cs, ss = g[shown], challenged[shown], slot[shown]
+            self.deck[gs, card[shown]] += 1
+            self.hand[gs, cs, ss] = self._draw(gs)
+            self._lose_influence(gs, challenger[shown])
+        return shown
+
+    def _lose_influence(self, g: np.ndarray, seat: np.ndarray):
+        """Asks each player to choose a card to lose. Dead players are skipped."""
+        alive = self.alive[g, seat]
+        g, seat = g[alive], seat[alive]
+        if g.size == 0:
+            return
+        mask = self.hand[g, seat] != NO_CARD
+        slot = self._ask(LOSE, g, seat, mask)
+        self._remove_card(g, seat, slot)
+
+    def _remove_card(self, g: np.ndarray, seat: np.ndarray, slot: np.ndarray):
+        self.hand[g, seat, slot] = NO_CARD
+        self.alive[g, seat] = (self.hand[g, seat] != NO_CARD).any(axis=1)
+
+### Effects
+
+    def _resolve(self, g: np.ndarray, actor: np.ndarray, action: np.ndarray, target: np.ndarray):
+        """Applies the effects of the actions that were not stopped."""
+        for gain, kind in ((INCOME_COINS, A_INCOME), (FOREIGN_AID_COINS, A_FOREIGN_AID), (TAX_COINS, A_TAX)):
+            i = action == kind
+            self.coins[g[i], actor[i]] += gain
+
+        i = action == A_STEAL
+        if i.any():
+            stolen = np.minimum(MAX_COIN_STEAL, self.coins[g[i], target[i]])
+            self.coins[g[i], target[i]] -= stolen
+            self.coins[g[i], actor[i]] += stolen
+
+        i = (action == A_COUP) | (action == A_ASSASSINATE)
+        self._lose_influence(g[i], target[i])
+
+        i = action == A_EXCHANGE
+        if i.any():
+            self._exchange(g[i], actor[i])
+
+    def _exchange(self, g: np.ndarray, actor: np.ndarray):
+        drawn = np.stack([self._draw(g), self._draw(g)], axis=1)
+        options = np.concatenate([self.hand[g, actor], drawn], axis=1)
+        valid = options != NO_CARD
+        single = valid.sum(axis=1) == 3
+
+        mask = valid[:, KEEP_FIRST] & valid[:, KEEP_SECOND]
+        mask &= KEEP_SINGLES[None, :] == single[:, None]
+        choice = self._ask(KEEP, g, actor, mask)
+
+        rows = np.arange(g.size)
+        first = KEEP_FIRST[choice]
+        second = KEEP_SECOND[choice]
+        kept = np.zeros_like(valid)
+        kept[rows, first] = True
+        kept[rows, second] = True
+
+        returned = valid & ~kept
+        for column in range(options.shape[1]):
+            i = returned[:, column]
+            np.add.at(self.deck, (g[i], options[i, column]), 1)
+
+        self.hand[g, actor, 0] = options[rows, first]
+        self.hand[g, actor, 1] = np.where(single, NO_CARD, options[rows, second])
+
+### Helpers
+
+    def _draw(self, g: np.ndarray) -> np.ndarray:
+        """Takes a random card from the deck of each game."""
+        counts = self.deck[g]
+        pick = self.rng.random(g.size) * counts.sum(axis=1)
+        card = (counts.cumsum(axis=1) <= pick[:, None]).sum(axis=1)
+        np.add.at(self.deck, (g, card), -1)
+        return card.astype(np.int8)
+
+    def _next_turn(self, g: np.ndarray):
+        """Passes the turn to the next alive player."""
+        p = self.n_players
+        seats = (self.turn[g, None] + np.arange(1, p + 1)[None, :]) % p
+        alive = self.alive[g[:, None], seats]
+        self.turn[g] = seats[np.arange(g.size), alive.argmax(axis=1)]
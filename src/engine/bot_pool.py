@@ -0,0 +1,76 @@
+from multiprocessing import Process
+from client.async_coup_client import bot_client
+from client.bot_host import table_of
+from client.bots import BOTS
+from client.game.core import MAX_PLAYERS
+from proto.framing import TEXT
+from transport.transport import TCP
+from loguru import logger
+import sys
+
+
+def play_bot(bot_name: str, host: str, port: int, room: str, size: int, games: int, framing: str = TEXT, quiet: bool = False, verbose: bool = False, transport: str = TCP):
+    """
+    Runs a bot that plays game after game in a room over the same connection.
+
+    The bot class is loaded and the bot is built once, then the bot is reset between games.
+
+    Arguments:
+        bot_name {str} -- name of the bot, as found in BOTS
+        host {str} -- server address
+        port {int} -- server port
+        room {str} -- room to play in
+        size {int} -- number of players of the room
+        games {int} -- number of games to play, 0 for no limit
+
+    Keyword Arguments:
+        framing {str} -- message framing, one of FRAMINGS (default: TEXT)
+        quiet {bool} -- don't acknowledge informational messages (default: False)
+        verbose {bool} -- keep the game logs of the bot (default: False)
+        transport {str} -- how to reach the server, one of TRANSPORTS (default: TCP)
+    """
+    logger.remove()
+    if verbose:
+        logger.add(sys.stderr, level="SUCCESS", format="<level>{message}</level>", colorize=False, filter=lambda record: record['level'].name == 'SUCCESS')
+    logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>", colorize=True)
+
+    player = BOTS[bot_name](quiet=quiet)
+    client = bot_client(host, port, player, framing, room, size, games, transport)
+    client.run()
+
+def run_bot_pool(bot_names: list[str], host: str, port: int, room: str, size: int = MAX_PLAYERS, games: int = 1, framing: str = TEXT, quiet: bool = False, verbose: bool = False, transport: str = TCP):
+    """
+    Runs a pool of warm bot processes on a room server, each of them playing _games_ games.
+
+    Every _size_ bots share a room, named after _room_ followed by the index of the table when there are
+    several tables (e.g. table-0, table-1), so that each room fills up again right after its game ends.
+
+    Arguments:
+        bot_names {list[str]} -- names of the bots, one process each, as found in BOTS
+        host {str} -- server address
+        port {int} -- server port
+        room {str} -- room to play in
+
+    Keyword Arguments:
+        size {int} -- number of players of each room (default: MAX_PLAYERS)
+        games {int} -- number of games played by each bot, 0 for no limit (default: 1)
+        framing {str} -- message framing, one of FRAMINGS (default: TEXT)
+        quiet {bool} -- bots don't acknowledge informational messages (default: False)
+        verbose {bool} -- keep the game logs of the bots (default: False)
+        transport {str} -- how to reach the server, one of TRANSPORTS (default: TCP)
+
+    Raises:
+        ValueError: If the bots can't be split in full rooms.
+    """
+    if len(bot_names) % size:
+        raise ValueError(f"{len(bot_names)} bots can't fill rooms of {size} players.")
+
+    workers = []
+    for i, bot_name in enumerate(bot_names):
+        table = table_of(room, i, size, len(bot_names))
+        worker = Process(target=play_bot, args=(bot_name, host, port, table, size, games, framing, quiet, verbose, transport), daemon=True)
+        worker.start()
+        workers.append(worker)
+
+    for worker in workers:
+        worker.join()
@@ -0,0 +1,119 @@
+from collections import deque
+from proto.network_proto import network_proto, ALL, SINGLE, EXCEPT
+from client.root import Root
+from client.player import InformedPlayer
+from terminal.terminal import NullTerminal
+from loguru import logger
+import random
+
+
+MAX_MESSAGES = 20000  # Safety limit for a single game
+
+class HeadlessRoot(Root):
+    """
+    Root that keeps its outgoing messages in memory instead of addressing them for the server.
+
+    Each entry of _outbox_ is a tuple (routing, address, game message), where routing is one of
+    the network protocol routings (SINGLE, ALL or EXCEPT).
+    """
+
+    def __init__(self, num_players: int):
+        self.outbox: deque[tuple[str, str | None, str]] = deque()
+        super().__init__("auto", num_players, NullTerminal())
+
+    def reset(self, num_players: int | None = None, rng: random.Random | None = None):
+        super().reset(num_players, rng)
+        self.outbox.clear()
+
+    def _send_single(self, game_msg: str, dest: str):
+        self.outbox.append((SINGLE, dest, game_msg))
+
+    def _send_all(self, game_msg: str):
+        self.outbox.append((ALL, None, game_msg))
+
+    def _send_except(self, game_msg: str, exclude: str):
+        self.outbox.append((EXCEPT, exclude, game_msg))
+
+
+class HeadlessGame:
+    """
+    Plays a full game between a Root and a set of bots in the current thread.
+
+    Messages are handed over through direct calls, so no server, sockets, Terminal threads or polling are used.
+    Bots are given the IDs "1", "2", ... in the order they are passed, just like the server would do.
+    """
+
+    def __init__(self, bots: list[InformedPlayer], max_messages: int = MAX_MESSAGES, root: HeadlessRoot | None = None):
+        """
+        __init__ method for HeadlessGame class.
+
+        Arguments:
+            bots {list[InformedPlayer]} -- bots taking part in the game, created with a NullTerminal
+
+        Keyword Arguments:
+            max_messages {int} -- maximum number of messages delivered to the root before giving up (default: MAX_MESSAGES)
+            root {HeadlessRoot | None} -- root ready for a game of len(bots) players, e.g. from a RootPool (default: a new one)
+        """
+        self.root = root if root is not None else HeadlessRoot(len(bots))
+        self.bots: dict[str, InformedPlayer] = {str(i + 1): bot for i, bot in enumerate(bots)}
+        self.max_messages = max_messages
+        self.inbox: deque[tuple[str, str]] = deque()
+        """Messages sent by the bots that are waiting to be delivered to the root."""
+        self.messages = 0
+        """Number of messages delivered to the root."""
+        self.finished = False
+        """Flag for whether the game reached its end."""
+
+    @classmethod
+    def from_classes(cls, bot_classes: list[type[InformedPlayer]], quiet: bool = False, **kwargs) -> "HeadlessGame":
+        """Creates a game with a new instance of each bot class, quiet bots don't acknowledge informational messages."""
+        return cls([bot_class(terminal=NullTerminal(), quiet=quiet) for bot_class in bot_classes], **kwargs)
+
+    def run(self) -> list[str]:
+        """
+        Plays the game until the root ends it.
+
+        Returns:
+            list[str] -- IDs of the winners, empty if the game did not finish
+        """
+        for addr, bot in self.bots.items():
+            self._collect(addr, bot)
+
+        while self.inbox and self.messages < self.max_messages:
+            orig, game_msg = self.inbox.popleft()
+            self.messages += 1
+            self.root.receive_from(orig, game_msg)
+            self._dispatch()
+            if self.root.sm.current_state.id == self.root.sm.end_state:
+                self.finished = True
+                break
+
+        if not self.finished:
+            logger.warning(f"Game stopped after {self.messages} messages without ending.")
+        return self.root.winners() if self.finished else []
+
+    def _dispatch(self):
+        """Delivers every message sent by the root to its recipients, each bot getting its messages as one bundle."""
+        outbox = self.root.outbox
+        bundles: dict[str, list[str]] = {}
+        while outbox:
+            routing, addr, game_msg = outbox.popleft()
+            if routing == SINGLE:
+                if addr in self.bots:
+                    bundles.setdefault(addr, []).append(game_msg)
+            else:
+                for dest in self.bots:
+                    if routing == ALL or dest != addr:
+                        bundles.setdefault(dest, []).append(game_msg)
+
+        for addr, bundle in bundles.items():
+            bot = self.bots[addr]
+            bot.receive_bundle(bundle)
+            self._collect(addr, bot)
+
+    def _collect(self, addr: str, bot: InformedPlayer):
+        """Moves the replies of a bot from its checkout into the root inbox."""
+        checkout = bot.checkout
+        while not checkout.empty():
+            for game_msg in checkout.get_nowait().split(network_proto.term):
+                self.inbox.append((addr, game_msg))
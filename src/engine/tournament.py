@@ -0,0 +1,110 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import Counter
+from .headless import HeadlessGame, HeadlessRoot
+from client.root_pool import RootPool
+from client.bots import BOTS
+from loguru import logger
+import random
+import time
+import json
+import sys, os
+
+
+CHUNKS_PER_WORKER = 4  # Games are split in chunks so that workers finish at about the same time
+
+def _worker_init(verbose: bool):
+    """Runs once in every worker process. Game logs are only kept in verbose mode."""
+    logger.remove()
+    if verbose:
+        logger.add(sys.stderr, level="SUCCESS", format="<level>{message}</level>", colorize=False, filter=lambda record: record['level'].name == 'SUCCESS')
+
+def play_games(bot_names: list[str], games: int, seed: int | None = None, quiet: bool = False) -> dict:
+    """
+    Plays a number of headless games between the same bots.
+
+    Arguments:
+        bot_names {list[str]} -- names of the bots in seat order, as found in BOTS
+        games {int} -- number of games to play
+
+    Keyword Arguments:
+        seed {int | None} -- seed for the random generator (default: None)
+        quiet {bool} -- bots don't acknowledge informational messages (default: False)
+
+    Returns:
+        dict -- partial results with keys "games", "finished", "messages", "wins" and "seat_wins"
+    """
+    if seed is not None:
+        random.seed(seed)
+    bot_classes = [BOTS[name] for name in bot_names]
+    wins: Counter[str] = Counter()
+    seat_wins: Counter[str] = Counter()
+    finished = 0
+    messages = 0
+    # Roots are reused from one game to the next, each game dealing from its own random stream
+    roots = RootPool(HeadlessRoot, seed)
+    for _ in range(games):
+        game = HeadlessGame.from_classes(bot_classes, quiet=quiet, root=roots.acquire(len(bot_classes)))
+        for player_id in game.run():
+            seat_wins[player_id] += 1
+            wins[bot_names[int(player_id) - 1]] += 1
+        finished += game.finished
+        messages += game.messages
+        roots.release(game.root)
+    return {"games": games, "finished": finished, "messages": messages, "wins": wins, "seat_wins": seat_wins}
+
+def run_tournament(bot_names: list[str], games: int, workers: int | None = None, seed: int | None = None, verbose: bool = False, quiet: bool = False) -> dict:
+    """
+    Plays _games_ headless games spread over a pool of worker processes and aggregates the results.
+
+    Arguments:
+        bot_names {list[str]} -- names of the bots in seat order, as found in BOTS
+        games {int} -- total number of games to play
+
+    Keyword Arguments:
+        workers {int | None} -- number of worker processes (default: one per core)
+        seed {int | None} -- base seed, each chunk of games gets its own derived seed (default: None)
+        verbose {bool} -- keep the game logs of the workers (default: False)
+        quiet {bool} -- bots don't acknowledge informational messages (default: False)
+
+    Returns:
+        dict -- aggregated results
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, -(-games // (workers * CHUNKS_PER_WORKER)))
+    chunks = [min(chunk_size, games - start) for start in range(0, games, chunk_size)]
+
+    totals = {"games": 0, "finished": 0, "messages": 0, "wins": Counter(), "seat_wins": Counter()}
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init, initargs=(verbose,)) as pool:
+        futures = [pool.submit(play_games, bot_names, size, None if seed is None else seed + i, quiet) for i, size in enumerate(chunks)]
+        for future in as_completed(futures):
+            partial = future.result()
+            for key in ("games", "finished", "messages"):
+                totals[key] += partial[key]
+            totals["wins"].update(partial["wins"])
+            totals["seat_wins"].update(partial["seat_wins"])
+            logger.info(f"Games {totals['games']}/{games}")
+    elapsed = time.time() - start_time
+
+    return {
+        "bots": bot_names,
+        "games": totals["games"],
+        "finished": totals["finished"],
+        "stalled": totals["games"] - totals["finished"],
+        "messages": totals["messages"],
+        "wins": {name: totals["wins"][name] for name in dict.fromkeys(bot_names)},
+        "seat_wins": {str(seat): totals["seat_wins"][str(seat)] for seat in range(1, len(bot_names) + 1)},
+        "workers": workers,
+        "seed": seed,
+        "quiet": quiet,
+        "seconds": round(elapsed, 3),
+        "games_per_second": round(totals["games"] / elapsed, 1) if elapsed > 0 else None,
+    }
+
+def write_results(results: dict, path: str):
+    """Writes the tournament results to a JSON file."""
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(path, "w") as file:
+        json.dump(results, file, indent=4)
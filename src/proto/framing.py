@@ -0,0 +1,261 @@
+import struct
+import threading
+from .network_proto import network_proto
+from loguru import logger
+
+
+TEXT = "text"
+LENGTH = "length"
+FRAMINGS = (TEXT, LENGTH)
+
+PREAMBLE = b"\x00COUP/LP1\x00"  # Sent by a client asking for length-prefixed frames, echoed by the server to accept
+HEADER = struct.Struct("!H")  # Length of the payload of a frame, unsigned 16 bit big endian
+MAX_FRAME = 2 ** (8 * HEADER.size) - 1
+NEGOTIATION_TIMEOUT = 1.0  # Time a client waits for the echo of the preamble before falling back to text
+
+
+class Framing:
+    """
+    Finds frames in a receive buffer and builds frames to be sent.
+
+    A frame carries the UTF-8 encoding of one network message without its terminator. Framings don't copy
+    or keep received data, they only report where the frames are (see proto.reassembler).
+    """
+
+    name = ""
+
+    def encode(self, message: str) -> bytes:
+        """
+        Builds the frame of a network message.
+
+        Arguments:
+            message {str} -- network message, with or without its terminator
+
+        Returns:
+            bytes -- frame ready to be sent
+        """
+        raise NotImplementedError
+
+    def split(self, buffer: bytearray, start: int, end: int) -> tuple[int, int, int] | None:
+        """
+        Finds the first frame in buffer[start:end].
+
+        Arguments:
+            buffer {bytearray} -- receive buffer
+            start {int} -- index of the first byte not consumed yet
+            end {int} -- index after the last byte received
+
+        Returns:
+            tuple[int, int, int] | None -- start and end of the payload and end of the frame, None if the frame is incomplete
+        """
+        raise NotImplementedError
+
+    def decode(self, view: memoryview, start: int, end: int) -> tuple[list[str], int]:
+        """
+        Decodes every complete frame in view[start:end]. Frames that are not valid UTF-8 are skipped.
+
+        Arguments:
+            view {memoryview} -- view of the receive buffer
+            start {int} -- index of the first byte not consumed yet
+            end {int} -- index after the last byte received
+
+        Returns:
+            tuple[list[str], int] -- network messages without terminator and index of the first byte not consumed
+        """
+        buffer = view.obj
+        messages = []
+        while (frame := self.split(buffer, start, end)) is not None:
+            payload_start, payload_end, start = frame
+            if payload_end > payload_start:
+                try:
+                    messages.append(str(view[payload_start:payload_end], "utf-8"))
+                except UnicodeDecodeError:
+                    logger.warning("Received a message that is not valid UTF-8.")
+        return messages, start
+
+
+class TextFraming(Framing):
+    """Frames terminated by the network protocol terminator ('\\n')."""
+
+    name = TEXT
+    term = network_proto.term.encode("utf-8")
+
+    def encode(self, message: str) -> bytes:
+        if not message.endswith(network_proto.term):
+            message += network_proto.term
+        return message.encode("utf-8")
+
+    def split(self, buffer: bytearray, start: int, end: int) -> tuple[int, int, int] | None:
+        stop = buffer.find(self.term, start, end)
+        if stop < 0:
+            return None
+        return start, stop, stop + len(self.term)
+
+    def decode(self, view: memoryview, start: int, end: int) -> tuple[list[str], int]:
+        # Decode all the complete frames at once and split the text
+        stop = view.obj.rfind(self.term, start, end)
+        if stop < 0:
+            return [], start
+        try:
+            text = str(view[start:stop], "utf-8")
+        except UnicodeDecodeError:
+            return super().decode(view, start, end)
+        return [message for message in text.split(network_proto.term) if message], stop + len(self.term)
+
+
+class LengthFraming(Framing):
+    """Frames made of a HEADER with the payload length followed by the payload."""
+
+    name = LENGTH
+
+    def encode(self, message: str) -> bytes:
+        payload = message.removesuffix(network_proto.term).encode("utf-8")
+        if len(payload) > MAX_FRAME:
+            raise ValueError(f"Message of {len(payload)} bytes does not fit in a frame")
+        return HEADER.pack(len(payload)) + payload
+
+    def split(self, buffer: bytearray, start: int, end: int) -> tuple[int, int, int] | None:
+        if end - start < HEADER.size:
+            return None
+        (size,) = HEADER.unpack_from(buffer, start)
+        stop = start + HEADER.size + size
+        if stop > end:
+            return None
+        return start + HEADER.size, stop, stop
+
+    def decode(self, view: memoryview, start: int, end: int) -> tuple[list[str], int]:
+        # Same as the generic loop over split, inlined since it runs for every frame
+        buffer = view.obj
+        unpack_from = HEADER.unpack_from
+        header = HEADER.size
+        messages = []
+        while end - start >= header:
+            (size,) = unpack_from(buffer, start)
+            stop = start + header + size
+            if stop > end:
+                break
+            if size:
+                try:
+                    messages.append(str(view[start + header:stop], "utf-8"))
+                except UnicodeDecodeError:
+                    logger.warning("Received a message that is not valid UTF-8.")
+            start = stop
+        return messages, start
+
+
+class NegotiatedFraming(Framing):
+    """
+    Text framing that switches to length-prefixed frames when the PREAMBLE is found at a frame boundary.
+
+    The PREAMBLE is reported as a frame with an empty payload, so it is consumed without being delivered.
+    Text messages never start with the first byte of the PREAMBLE, so they can't be mistaken for it.
+    """
+
+    def __init__(self):
+        self.framing: Framing = TextFraming()
+        self.waiting = True
+        """Flag for whether the PREAMBLE may still arrive."""
+
+    @property
+    def name(self):
+        return self.framing.name
+
+    def encode(self, message: str) -> bytes:
+        return self.framing.encode(message)
+
+    def split(self, buffer: bytearray, start: int, end: int) -> tuple[int, int, int] | None:
+        if self.waiting and end > start and buffer[start] == PREAMBLE[0]:
+            if end - start < len(PREAMBLE):
+                # Could still be the preamble, wait for more data
+                return None
+            if buffer.startswith(PREAMBLE, start, end):
+                self.accept()
+                stop = start + len(PREAMBLE)
+                return stop, stop, stop
+        return self.framing.split(buffer, start, end)
+
+    def decode(self, view: memoryview, start: int, end: int) -> tuple[list[str], int]:
+        if self.waiting:
+            return super().decode(view, start, end)
+        return self.framing.decode(view, start, end)
+
+    def accept(self):
+        """Switches to length-prefixed frames."""
+        self.framing = LengthFraming()
+        self.waiting = False
+
+
+class ServerFraming(NegotiatedFraming):
+    """
+    Framing of a connection accepted by a server.
+
+    Frames are text until the client opens the connection with the PREAMBLE, which switches both directions
+    to length-prefixed frames. The PREAMBLE is then sent back exactly once, before the first length-prefixed
+    frame, either by _take_echo_ or by _encode_.
+
+    A threaded server encodes for a connection from its reader thread and from the threads routing messages to it,
+    so the switch to length-prefixed frames and the echo are guarded by a lock.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.echo_pending = False
+        self.lock = threading.Lock()
+
+    def encode(self, message: str) -> bytes:
+        with self.lock:
+            return self._take_echo() + self.framing.encode(message)
+
+    def split(self, buffer: bytearray, start: int, end: int) -> tuple[int, int, int] | None:
+        frame = super().split(buffer, start, end)
+        # Only the first bytes of the connection can be the preamble
+        if frame is not None:
+            self.waiting = False
+        return frame
+
+    def accept(self):
+        with self.lock:
+            super().accept()
+            self.echo_pending = True
+
+    def encode_shared(self, message: str, frames: dict[tuple[str, str], bytes]) -> bytes:
+        """
+        Builds the frame of a network message, reusing the frames already built for other connections.
+
+        Arguments:
+            message {str} -- network message, with or without its terminator
+            frames {dict[tuple[str, str], bytes]} -- frames built so far, by framing name and message
+
+        Returns:
+            bytes -- frame ready to be sent
+        """
+        with self.lock:
+            key = (self.framing.name, message)
+            frame = frames.get(key)
+            if frame is None:
+                frame = frames[key] = self.framing.encode(message)
+            return self._take_echo() + frame
+
+    def take_echo(self) -> bytes:
+        """Returns the PREAMBLE if it still has to be sent back to the client, otherwise empty bytes."""
+        with self.lock:
+            return self._take_echo()
+
+    def _take_echo(self) -> bytes:
+        if self.echo_pending:
+            self.echo_pending = False
+            return PREAMBLE
+        return b""
+
+
+class ClientFraming(NegotiatedFraming):
+    """
+    Framing of a client that asked for length-prefixed frames.
+
+    Messages received before the echo of the PREAMBLE are text frames. If the echo doesn't arrive in time,
+    the client calls _give_up_ and keeps using text frames.
+    """
+
+    def give_up(self):
+        """Keeps text frames for the rest of the connection."""
+        self.waiting = False
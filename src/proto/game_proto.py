@@ -1,4 +1,5 @@
 from .protobase import MsgType, MsgArg, Proto, BaseMsg
+import re
 from client.game.core import ACTIONS, CHARACTERS
 
 
@@ -22,17 +23,15 @@ EXIT = "EXIT"
 DEAD = "DEAD"
 ILLEGAL = "ILLEGAL"
 
-def _check_action(action):
-    return str(action).isalpha() and action in ACTIONS
+# HELLO modes
+QUIET = "QUIET"  # The player doesn't acknowledge messages whose only possible reply is OK
 
-def _check_card(card):
-    return str(card).isalpha() and card in CHARACTERS
-
-def _check_coins(coins):
-    return str(coins).isnumeric() and int(coins) >= 0
-
-def _check_id(id):
-    return str(id).isnumeric()
+# Argument validators, compiled by MsgArg
+_check_action = frozenset(ACTIONS)
+_check_card = frozenset(CHARACTERS)
+_check_coins = re.compile(r"[0-9]+")
+_check_id = re.compile(r"[0-9]+")
+_check_mode = frozenset((QUIET,))
 
 class GameProto(Proto):
     def __init__(self):
@@ -75,7 +74,8 @@ class GameProto(Proto):
                 MsgArg("card1", _check_card), 
                 MsgArg("card2", _check_card, False)),
 
-            MsgType(HELLO),
+            MsgType(HELLO,
+                MsgArg("mode", _check_mode, False)),
 
             MsgType(PLAYER, 
                 MsgArg("ID1", _check_id)),
@@ -100,40 +100,40 @@ class GameProto(Proto):
     ## helpers
 
     def ACT(self, ID1, action, ID2=None):
-        return self.serialize(ACT, {"ID1": ID1, "action": action, "ID2": ID2})
+        return self.serialize_values(ACT, ID1, action, ID2)
     
     def OK(self):
         return self.serialize(OK, {})
     
     def CHAL(self, ID1):
-        return self.serialize(CHAL, {"ID1": ID1})
+        return self.serialize_values(CHAL, ID1)
     
     def BLOCK(self, ID1, card1):
-        return self.serialize(BLOCK, {"ID1": ID1, "card1": card1})
+        return self.serialize_values(BLOCK, ID1, card1)
     
     def SHOW(self, ID1=None, card1=None):
-        return self.serialize(SHOW, {"ID1": ID1, "card1": card1})
+        return self.serialize_values(SHOW, ID1, card1)
     
     def LOSE(self, ID1=None, card1=None):
-        return self.serialize(LOSE, {"ID1": ID1, "card1": card1})
+        return self.serialize_values(LOSE, ID1, card1)
     
     def COINS(self, ID1, coins):
-        return self.serialize(COINS, {"ID1": ID1, "coins": coins})
+        return self.serialize_values(COINS, ID1, coins)
     
     def DECK(self, card1=None, card2=None):
-        return self.serialize(DECK, {"card1": card1, "card2": card2})
+        return self.serialize_values(DECK, card1, card2)
     
     def CHOOSE(self, card1, card2):
-        return self.serialize(CHOOSE, {"card1": card1, "card2": card2})
+        return self.serialize_values(CHOOSE, card1, card2)
     
     def KEEP(self, card1, card2=None):
-        return self.serialize(KEEP, {"card1": card1, "card2": card2})
+        return self.serialize_values(KEEP, card1, card2)
     
-    def HELLO(self):
-        return self.serialize(HELLO, {})
+    def HELLO(self, mode=None):
+        return self.serialize_values(HELLO, mode)
     
     def PLAYER(self, ID1):
-        return self.serialize(PLAYER, {"ID1": ID1})
+        return self.serialize_values(PLAYER, ID1)
     
     def START(self):
         return self.serialize(START, {})
@@ -142,13 +142,13 @@ class GameProto(Proto):
         return self.serialize(READY, {})
     
     def TURN(self, ID1):
-        return self.serialize(TURN, {"ID1": ID1})
+        return self.serialize_values(TURN, ID1)
     
     def EXIT(self):
         return self.serialize(EXIT, {})
 
     def DEAD(self, ID1):
-        return self.serialize(DEAD, {"ID1": ID1})
+        return self.serialize_values(DEAD, ID1)
     
     def ILLEGAL(self):
         return self.serialize(ILLEGAL, {})
@@ -156,17 +156,26 @@ class GameProto(Proto):
 game_proto = GameProto()
 
 class GameMessage(BaseMsg):
-    def __init__(self, msg: str):
-        super().__init__(game_proto, msg)
-        self.ID1 = self.args.get("ID1", None)
-        self.ID2 = self.args.get("ID2", None)
-        self.action = self.args.get("action", None)
-        self.card1 = self.args.get("card1", None)
-        self.card2 = self.args.get("card2", None)
-        self.coins = self.args.get("coins", None)
-        self.command = self.msg_type
+    __slots__ = ("ID1", "ID2", "action", "card1", "card2", "coins", "mode", "command")
+
+    def __new__(cls, msg: str):
+        # Fast path, every instance of this class uses the same protocol
+        instance = cls._interned.get(msg)
+        if instance is not None:
+            return instance
+        return cls._intern(game_proto, msg)
+
+    def _unpack(self, args: dict):
+        object.__setattr__(self, "ID1", args.get("ID1", None))
+        object.__setattr__(self, "ID2", args.get("ID2", None))
+        object.__setattr__(self, "action", args.get("action", None))
+        object.__setattr__(self, "card1", args.get("card1", None))
+        object.__setattr__(self, "card2", args.get("card2", None))
+        object.__setattr__(self, "coins", args.get("coins", None))
+        object.__setattr__(self, "mode", args.get("mode", None))
+        object.__setattr__(self, "command", self.msg_type)
 
     @classmethod
     def from_string(cls, msg: str):
-        return [cls(part) for part in msg.strip(game_proto.term).split(game_proto.term)]
+        return [cls(part) for part in cls._split(game_proto, msg)]
         
\ No newline at end of file
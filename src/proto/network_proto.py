@@ -1,16 +1,20 @@
 from .protobase import MsgType, MsgArg, Proto, BaseMsg
+import re
 
 ALL = "ALL"
 SINGLE = "SINGLE"
 EXCEPT = "EXCEPT"
+JOIN = "JOIN"
+SIT = "SIT"
+SEAT = "SEAT"
 
 DISCONNECT = "DISCONNECT"
 
-def _check_game_msg(msg):
-    return len(msg) > 0
-
-def _check_addr(addr):
-    return str(addr).isnumeric()
+# Argument validators, compiled by MsgArg
+_check_game_msg = re.compile(r".+", re.DOTALL)
+_check_addr = re.compile(r"[0-9]+")
+_check_room = re.compile(r"[A-Za-z0-9_-]+")
+_check_size = re.compile(r"[0-9]+")
 
 class NetworkProto(Proto):
     def __init__(self):
@@ -24,6 +28,20 @@ class NetworkProto(Proto):
             
             MsgType(EXCEPT,
                     MsgArg("addr", _check_addr),
+                    MsgArg("msg", _check_game_msg)),
+
+            MsgType(JOIN,
+                    MsgArg("room", _check_room),
+                    MsgArg("size", _check_size, False)),
+
+            # Seats of a connection hosting many players, see BotHost
+            MsgType(SIT,
+                    MsgArg("seat", _check_addr),
+                    MsgArg("room", _check_room),
+                    MsgArg("size", _check_size, False)),
+
+            MsgType(SEAT,
+                    MsgArg("seat", _check_addr),
                     MsgArg("msg", _check_game_msg))
         )
         self.sep = '@'
@@ -31,25 +49,45 @@ class NetworkProto(Proto):
     ## helpers
     
     def ALL(self, msg):
-        return self.serialize(ALL, {"msg": msg})
+        return self.serialize_values(ALL, msg)
     
     def SINGLE(self, addr, msg):
-        return self.serialize(SINGLE, {"addr": addr, "msg": msg})
+        return self.serialize_values(SINGLE, addr, msg)
     
     def EXCEPT(self, addr, msg):
-        return self.serialize(EXCEPT, {"addr": addr, "msg": msg})
+        return self.serialize_values(EXCEPT, addr, msg)
+    
+    def JOIN(self, room, size=None):
+        return self.serialize_values(JOIN, room, size)
+    
+    def SIT(self, seat, room, size=None):
+        return self.serialize_values(SIT, seat, room, size)
+    
+    def SEAT(self, seat, msg):
+        return self.serialize_values(SEAT, seat, msg)
 
 network_proto = NetworkProto()
 
 class NetworkMessage(BaseMsg):
-    def __init__(self, msg: str):
-        super().__init__(network_proto, msg)
-        self.addr = self.args.get("addr", None)
-        self.msg = self.args.get("msg", None)
+    __slots__ = ("addr", "msg", "room", "size", "seat")
+
+    def __new__(cls, msg: str):
+        # Fast path, every instance of this class uses the same protocol
+        instance = cls._interned.get(msg)
+        if instance is not None:
+            return instance
+        return cls._intern(network_proto, msg)
+
+    def _unpack(self, args: dict):
+        object.__setattr__(self, "addr", args.get("addr", None))
+        object.__setattr__(self, "msg", args.get("msg", None))
+        object.__setattr__(self, "room", args.get("room", None))
+        object.__setattr__(self, "size", args.get("size", None))
+        object.__setattr__(self, "seat", args.get("seat", None))
 
     @classmethod
     def from_string(cls, msg: str):
-        return [cls(part) for part in msg.strip(network_proto.term).split(network_proto.term)]
+        return [cls(part) for part in cls._split(network_proto, msg)]
     
 if __name__ == "__main__":
     msg = "EXCEPT@2@LOSE 2 B\nSINGLE@2@DECK"
@@ -1,16 +1,44 @@
+import re
+from collections.abc import Callable, Collection
+from types import MappingProxyType
+
+
+CACHE_SIZE = 4096  # Maximum number of parsed and serialized messages remembered by each protocol
 
 
 class MsgArg:
-    def __init__(self, name, check, required=True):
+    def __init__(self, name: str, check: Callable | Collection[str] | re.Pattern, required=True):
+        """
+        __init__ method for MsgArg class.
+
+        Arguments:
+            name {str} -- name of the argument
+            check {Callable | Collection[str] | re.Pattern} -- validator of the argument: a function, the set of valid values or a pattern the whole value must match
+
+        Keyword Arguments:
+            required {bool} -- whether the argument must be present (default: True)
+        """
         self.name = name
         self.check = check
         self.required = required
+        self.validate = self._compile(check)
+        """Fast validator of the string form of the argument."""
+
+    @staticmethod
+    def _compile(check) -> Callable[[str], object]:
+        if isinstance(check, re.Pattern):
+            return check.fullmatch
+        if isinstance(check, (set, frozenset, tuple, list)):
+            return frozenset(check).__contains__
+        return check
 
 class MsgType:
     def __init__(self, name: str, *args: MsgArg):    
         self.name = name
         self.args = args
         self.min_size = 0
+        self.names = tuple(arg.name for arg in args)
+        self.validators = tuple(arg.validate for arg in args)
         
         # check if there is an optional argument before a required one
         optional = False
@@ -25,8 +53,12 @@ class MsgType:
 class Proto:
     def __init__(self, *msg_types: MsgType):
         self.msg_types = msg_types
+        self.types = {msg_type.name: msg_type for msg_type in msg_types}
         self.sep = ','  # default separator
         self.term = '\n'  # default terminator
+        self._constants: dict[str, str] = {}  # Serialization of the message types without arguments
+        self._parsed: dict[str, tuple[str, dict]] = {}  # Recently parsed messages
+        self._serialized: dict[tuple, str] = {}  # Recently serialized messages, by type and argument values (see serialize_values)
     
     def parse(self, msg: str):
         """
@@ -38,18 +70,32 @@ class Proto:
         Returns:
             tuple{str, dict} -- the message type and a dictionary of arguments
         """
-        msg = msg.strip(self.term)
+        parsed = self._parsed.get(msg)
+        if parsed is not None:
+            return parsed[0], parsed[1].copy()
+
+        key = msg
+        if self.term:
+            msg = msg.strip(self.term)
         msg_type, *args = msg.split(self.sep)
-        return msg_type, self._parse_args(self._get_msg_type(msg_type), args)
+        parsed_args = self._parse_args(self._get_msg_type(msg_type), args)
+
+        # The vocabulary is small, so the cache is only cleared if it somehow fills up
+        if len(self._parsed) >= CACHE_SIZE:
+            self._parsed.clear()
+        self._parsed[key] = (msg_type, parsed_args.copy())
+        return msg_type, parsed_args
     
     def _parse_args(self, msg_type: MsgType, args: list[str]):
         if len(args) < msg_type.min_size:
             raise SyntaxError("Protobase: Not enough arguments.")
         parsed_args = {}
-        for i in range(min(len(args), len(msg_type.args))):
-            if not msg_type.args[i].check(args[i]):
-                raise SyntaxError(f"Protobase: Invalid argument for {msg_type.args[i].name}.")
-            parsed_args[msg_type.args[i].name] = args[i]
+        if not args:
+            return parsed_args
+        for name, validate, arg in zip(msg_type.names, msg_type.validators, args):
+            if not validate(arg):
+                raise SyntaxError(f"Protobase: Invalid argument for {name}.")
+            parsed_args[name] = arg
         return parsed_args
     
     def serialize(self, msg_type: str, args: dict):
@@ -63,40 +109,137 @@ class Proto:
         Returns:
             str -- the message string
         """
+        constant = self._constants.get(msg_type)
+        if constant is not None:
+            return constant
         return self._serialize_args(self._get_msg_type(msg_type), args)
+
+    def serialize_values(self, msg_type: str, *values):
+        """
+        serialize a message type and argument values into a message string, remembering the result
+
+        Arguments:
+            msg_type {str} -- the message type
+            values {Any} -- the argument values, in the order they are declared (None for missing optional arguments)
+
+        Returns:
+            str -- the message string
+        """
+        key = (msg_type, values)
+        msg = self._serialized.get(key)
+        if msg is None:
+            msg_type_ = self._get_msg_type(msg_type)
+            msg = self._serialize_args(msg_type_, dict(zip(msg_type_.names, values)))
+            if len(self._serialized) >= CACHE_SIZE:
+                self._serialized.clear()
+            self._serialized[key] = msg
+        return msg
     
     def _serialize_args(self, msg_type: MsgType, args: dict):
+        if not msg_type.args:
+            constant = self._constants[msg_type.name] = msg_type.name + self.term
+            return constant
+
         parts = [msg_type.name]
         for arg in msg_type.args:
-            if arg.required:
-                if arg.name not in args:
+            value = args.get(arg.name)
+            if value is None:
+                if arg.required:
                     raise SyntaxError(f"Protobase: Missing required argument {arg.name}.")
-                if not arg.check(args[arg.name]):
-                    raise SyntaxError(f"Protobase: Invalid argument for {arg.name}.")
-                parts.append(str(args[arg.name]))
-            else:
-                if arg.name in args and args[arg.name] is not None:
-                    if not arg.check(args[arg.name]):
-                        raise SyntaxError(f"Protobase: Invalid argument for {arg.name}.")
-                    parts.append(str(args[arg.name]))
+                continue
+            value = str(value)
+            if not arg.validate(value):
+                raise SyntaxError(f"Protobase: Invalid argument for {arg.name}.")
+            parts.append(value)
 
         return self.sep.join(parts) + self.term
 
     def _get_msg_type(self, name: str):
-        for msg_type in self.msg_types:
-            if msg_type.name == name:
-                return msg_type
-        raise SyntaxError("Protobase: Invalid message type.")
+        msg_type = self.types.get(name)
+        if msg_type is None:
+            raise SyntaxError("Protobase: Invalid message type.")
+        return msg_type
 
 class BaseMsg:
-    def __init__(self, proto: Proto, msg: str):
-        self.proto = proto
-        self.msg_type, self.args = proto.parse(msg)
+    """
+    Message parsed by a protocol.
+
+    Messages are immutable flyweights: instances are interned by their string, so parsing a string that was
+    seen before is a dict lookup that returns the same instance. The arguments are exposed as a read-only
+    mapping and the serialized form is computed once.
+
+    Subclasses bound to a protocol override __new__ to call _intern with it, and _unpack to set their own
+    (slotted) attributes.
+    """
+
+    __slots__ = ("proto", "msg_type", "args", "_str")
+    _interned: dict[str, "BaseMsg"] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._interned = {}  # Each message class interns its own instances
+
+    def __new__(cls, proto: Proto, msg: str):
+        return cls._intern(proto, msg)
+
+    @classmethod
+    def _intern(cls, proto: Proto, msg: str):
+        interned = cls._interned
+        instance = interned.get(msg)
+        if instance is not None and instance.proto is proto:
+            return instance
+
+        # Equal messages written differently (e.g. with extra arguments) share the instance of the serialized form
+        msg_type, args = proto.parse(msg)
+        serialized = proto.serialize(msg_type, args)
+        instance = interned.get(serialized)
+        if instance is None or instance.proto is not proto:
+            instance = object.__new__(cls)
+            object.__setattr__(instance, "proto", proto)
+            object.__setattr__(instance, "msg_type", msg_type)
+            object.__setattr__(instance, "args", MappingProxyType(args))
+            object.__setattr__(instance, "_str", serialized)
+            instance._unpack(args)
+            if len(interned) >= CACHE_SIZE:
+                interned.clear()
+            interned[serialized] = instance
+        interned[msg] = instance
+        return instance
+
+    def _unpack(self, args: dict):
+        """Sets the attributes of a subclass from the parsed arguments (with object.__setattr__)."""
+
+    @staticmethod
+    def _split(proto: Proto, msg: str) -> list[str]:
+        """Splits a string holding several messages."""
+        if not proto.term:
+            # Without a terminator there can only be one message
+            return [msg]
+        return msg.strip(proto.term).split(proto.term)
 
     @classmethod
     def from_string(cls, proto: Proto, msg: str):
-        return [cls(proto, part) for part in msg.strip(proto.term).split(proto.term)]
+        return [cls(proto, part) for part in cls._split(proto, msg)]
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._str == other._str
+
+    def __hash__(self):
+        return hash(self._str)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._str!r})"
 
     def __str__(self):
-        return self.proto.serialize(self.msg_type, self.args)
+        return self._str
        
\ No newline at end of file
@@ -0,0 +1,92 @@
+import socket
+from .framing import Framing
+
+
+BUFFER_SIZE = 4096  # Initial size of the receive buffer
+MIN_READ = 1024  # Free space kept in the buffer before each read
+
+
+class Reassembler:
+    """
+    Receive buffer of a connection that turns the byte stream into complete messages.
+
+    Data is received straight into a bytearray (with recv_into) and the frames are decoded from a memoryview of it,
+    so the received bytes are never copied before being decoded, and decoded only once. Only the bytes of an
+    incomplete frame are moved to the front of the buffer, and only when the free space runs out.
+    """
+
+    def __init__(self, framing: Framing, size: int = BUFFER_SIZE):
+        """
+        __init__ method for Reassembler class.
+
+        Arguments:
+            framing {Framing} -- framing used to find the frames in the stream
+
+        Keyword Arguments:
+            size {int} -- initial size of the buffer, it grows to fit larger frames (default: BUFFER_SIZE)
+        """
+        self.framing = framing
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        """Index of the first byte not consumed yet."""
+        self.end = 0
+        """Index after the last byte received."""
+
+    def recv_from(self, sock: socket.socket) -> int:
+        """
+        Receives data from a socket into the free space of the buffer.
+
+        Arguments:
+            sock {socket.socket} -- connected socket
+
+        Returns:
+            int -- number of bytes received, 0 if the connection was closed
+        """
+        self._reserve(MIN_READ)
+        received = sock.recv_into(self.view[self.end:])
+        self.end += received
+        return received
+
+    def feed(self, data: bytes):
+        """
+        Adds data that was received by other means (e.g. by an asyncio stream) to the buffer.
+
+        Arguments:
+            data {bytes} -- data received
+        """
+        self._reserve(len(data))
+        self.view[self.end:self.end + len(data)] = data
+        self.end += len(data)
+
+    def frames(self) -> list[str]:
+        """
+        Consumes the complete frames in the buffer.
+
+        Frames that are not valid UTF-8 are skipped.
+
+        Returns:
+            list[str] -- network messages, without terminator
+        """
+        messages, self.start = self.framing.decode(self.view, self.start, self.end)
+        if self.start == self.end:
+            self.start = self.end = 0
+        return messages
+
+    def _reserve(self, size: int):
+        """Makes room for _size_ bytes after the received data."""
+        if len(self.buffer) - self.end >= size:
+            return
+
+        # Move the incomplete frame to the front of the buffer
+        pending = self.end - self.start
+        if self.start > 0:
+            self.buffer[:pending] = self.view[self.start:self.end].tobytes()
+            self.start, self.end = 0, pending
+        if len(self.buffer) - self.end >= size:
+            return
+
+        # Grow the buffer, the view must be released before the bytearray can be resized
+        self.view.release()
+        self.buffer.extend(bytes(max(size, len(self.buffer))))
+        self.view = memoryview(self.buffer)
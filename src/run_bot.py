@@ -1,18 +1,16 @@
 #!/usr/bin/env python3.12
 
-from client.coup_client import CoupClient
-from client.bots import CoupBot, TestBot, RandomBot, HonestBot
+from client.async_coup_client import bot_client
+from client.bot_host import BotHost
+from client.bots import BOTS
+from client.game.core import MAX_PLAYERS
+from engine.bot_pool import run_bot_pool
+from proto.framing import FRAMINGS, TEXT
+from transport.transport import EXTERNAL_TRANSPORTS, TCP
 from loguru import logger
 import argparse
 import sys, os
 
-BOTS = {
-    "CoupBot": CoupBot,
-    "TestBot": TestBot,
-    "RandomBot": RandomBot,
-    "HonestBot": HonestBot,
-}
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('-p', type=int, default=12345, help='Port number (default: 12345)')
@@ -20,7 +18,27 @@ if __name__ == "__main__":
     parser.add_argument('-i', type=str, default='None', help="Player ID (default: None)")
     parser.add_argument('-v', action='store_false', help='Verbose mode (default: True)')
     parser.add_argument('-b', type=str, default='TestBot', help='Bot type (default: TestBot)', choices=BOTS.keys())
+    parser.add_argument('-f', choices=FRAMINGS, default=TEXT, help='Message framing: text or length-prefixed (default: text)')
+    parser.add_argument('-q', action='store_true', help="Don't acknowledge informational messages (default: False)")
+    parser.add_argument('-r', type=str, default=None, help='Room to join on a room server (default: None)')
+    parser.add_argument('-n', type=int, default=None, help='Number of players of the room, if the bot creates it (default: 6)')
+    parser.add_argument('-g', type=int, default=1, help='Number of games to play in the room, 0 for no limit (default: 1)')
+    parser.add_argument('-w', type=int, default=1, help='Number of bot processes sharing the rooms, every -n of them in a room of their own (default: 1)')
+    parser.add_argument('-s', type=int, default=1, help='Number of bots played over this connection, each in a seat of its own (default: 1)')
+    parser.add_argument('-t', choices=EXTERNAL_TRANSPORTS, default=TCP, help='Transport: TCP, or a Unix domain socket for clients on the same machine (default: tcp)')
     args = parser.parse_args()
+    if args.r is None and (args.g != 1 or args.w != 1 or args.s != 1):
+        parser.error("-g, -w and -s need a room (-r)")
+    if args.w > 1 and args.s > 1:
+        parser.error("-w and -s can't be used together")
+
+    if args.w > 1:
+        # Warm pool: each process keeps its bot and plays game after game
+        try:
+            run_bot_pool([args.b] * args.w, args.a, args.p, args.r, args.n or MAX_PLAYERS, args.g, args.f, args.q, args.v, args.t)
+        except ValueError as e:
+            parser.error(str(e))
+        sys.exit(0)
     
     logger.remove()  # Remove default logger
     if args.v:
@@ -37,6 +55,14 @@ if __name__ == "__main__":
                    format="<green>{time:HH:mm:ss:SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | <level>{message}</level>")
 
     # Create client
-    player = BOTS[args.b]()
-    client = CoupClient(args.a, args.p, player)
+    if args.s > 1:
+        # Bot host: every bot plays over the same connection
+        players = [BOTS[args.b](quiet=args.q) for _ in range(args.s)]
+        try:
+            client = BotHost(args.a, args.p, players, args.r, args.n or MAX_PLAYERS, args.g, args.f, args.t)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        player = BOTS[args.b](quiet=args.q)
+        client = bot_client(args.a, args.p, player, args.f, args.r, args.n, args.g, args.t)
     client.run()
\ No newline at end of file
@@ -2,6 +2,8 @@
 
 from client.coup_client import CoupClient
 from client.human import Human
+from proto.framing import FRAMINGS, TEXT
+from transport.transport import EXTERNAL_TRANSPORTS, TCP
 from loguru import logger
 import argparse
 import sys, os
@@ -12,6 +14,10 @@ if __name__ == "__main__":
     parser.add_argument('-p', type=int, default=12345, help='Port number (default: 12345)')
     parser.add_argument('-a', type=str, default='localhost', help='Address (default: localhost)')
     parser.add_argument('-i', type=str, default='None', help="Player ID (default: None)")
+    parser.add_argument('-f', choices=FRAMINGS, default=TEXT, help='Message framing: text or length-prefixed (default: text)')
+    parser.add_argument('-r', type=str, default=None, help='Room to join on a room server (default: None)')
+    parser.add_argument('-n', type=int, default=None, help='Number of players of the room, if the player creates it (default: 6)')
+    parser.add_argument('-t', choices=EXTERNAL_TRANSPORTS, default=TCP, help='Transport: TCP, or a Unix domain socket for clients on the same machine (default: tcp)')
     args = parser.parse_args()
     
     logger.remove()  # Remove default logger
@@ -29,5 +35,5 @@ if __name__ == "__main__":
 
     # Create client
     player = Human()
-    client = CoupClient(args.a, args.p, player)
+    client = CoupClient(args.a, args.p, player, args.f, args.r, args.n, transport=args.t)
     client.run()
\ No newline at end of file
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3.12
 
-from server.coup_server import CoupServer
+from server.coup_server import CoupServer, AsyncCoupServer
+from server.rooms import RoomServer, AsyncRoomServer
 from client.coup_client import CoupClient
 from client.root import Root
+from proto.framing import FRAMINGS, TEXT
+from transport.transport import EXTERNAL_TRANSPORTS, TCP
+from server.server import SLOW_CLIENT_POLICIES, DISCONNECT, MAX_PENDING
 from loguru import logger
 import argparse
 import sys, os
@@ -15,6 +19,13 @@ if __name__ == "__main__":
     parser.add_argument('-a', type=str, default='localhost', help='Address (default: localhost)')
     parser.add_argument('-m', choices=['manual', 'auto'], default='manual', help="Mode of operation: 'manual' or 'auto' (default: manual)")
     parser.add_argument('-v', action='store_false', help='Verbose mode (default: True)')
+    parser.add_argument('-s', choices=['thread', 'async'], default='thread', help="Server implementation: a thread per client or a single asyncio event loop (default: thread)")
+    parser.add_argument('-f', choices=FRAMINGS, default=TEXT, help='Message framing of the Root: text or length-prefixed (default: text)')
+    parser.add_argument('-l', type=int, default=MAX_PENDING, help=f'Bytes queued for a client before it is considered slow (default: {MAX_PENDING})')
+    parser.add_argument('-o', choices=SLOW_CLIENT_POLICIES, default=DISCONNECT, help=f'What to do with slow clients (default: {DISCONNECT})')
+    parser.add_argument('-r', action='store_true', help='Host a game per room, each with its own Root, instead of a single game (default: False)')
+    parser.add_argument('-d', type=float, default=None, help='Seconds each player has to reply before the Root plays a default reply for it (default: no limit)')
+    parser.add_argument('-t', choices=EXTERNAL_TRANSPORTS, default=TCP, help='Transport: TCP, or a Unix domain socket for clients on the same machine (default: tcp)')
     args = parser.parse_args()
     
     # Remove default logger
@@ -36,11 +47,27 @@ if __name__ == "__main__":
     logger.add(f"../log/game_summary.log", level="SUCCESS", format="<level>{message}</level>", filter=lambda record: "Player" in record["message"] and "OK" not in record["message"])
 
     # Create server instance and start
-    server = CoupServer(args.a, args.p)
+    if args.r:
+        server_class = AsyncRoomServer if args.s == 'async' else RoomServer
+    else:
+        server_class = AsyncCoupServer if args.s == 'async' else CoupServer
+    options = {"deadline": args.d} if args.r else {}
+    server = server_class(args.a, args.p, max_pending=args.l, slow_client_policy=args.o, transport=args.t, **options)
+
+    if args.r:
+        # Every room has its own Root inside the server
+        try:
+            server.start()
+            while server.is_alive():
+                server.join(1)
+        except KeyboardInterrupt:
+            pass
+        server.shutdown()
+        sys.exit(0)
 
     # Create client
-    player = Root(args.m)
-    client = CoupClient(args.a, args.p, player)
+    player = Root(args.m, deadline=args.d)
+    client = CoupClient(args.a, args.p, player, args.f, transport=args.t)
 
     try:
         server.start()
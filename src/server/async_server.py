@@ -0,0 +1,227 @@
+import asyncio
+import threading
+from proto.framing import ServerFraming
+from proto.network_proto import network_proto
+from .server import MAX_PENDING, DROP, DISCONNECT
+from .registry import ClientRegistry
+from proto.reassembler import Reassembler
+from transport.transport import TCP, get_transport
+from loguru import logger
+
+
+READ_SIZE = 4096  # Maximum number of bytes read from a client at once
+BACKLOG = 1024  # Size of the queue of pending connections
+
+
+# Connection of a client, new instance created for each connected client
+class AsyncClient:
+    """
+    Client connected to an AsyncServer.
+
+    Unlike the threaded Client, it has no thread of its own: its _run_ coroutine is a task of the server event loop
+    that sleeps until the socket has data, so there are no timeouts or polling.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, id, name, server: "AsyncServer"):
+        self.reader = reader
+        self.writer = writer
+        self.address = writer.get_extra_info("peername")
+        self.id = id
+        self.name = name
+        self.signal = True
+        self.server = server  # Reference to the server to forward received messages
+        self.framing = ServerFraming()  # Text, unless the client asks for length-prefixed frames
+        self.reassembler = Reassembler(self.framing)
+        self.room = None
+        """Room the client joined on a room server, None otherwise."""
+        self.room_id: int | None = None
+        """ID of the client inside its room."""
+        self.seats: dict[int, object] = {}
+        """Players multiplexed over the connection by a room server, by seat number."""
+
+    def __str__(self):
+        return str(self.id) + " " + str(self.address)
+
+    def send(self, data: bytes):
+        """
+        Queues data in the write buffer of the connection, the event loop sends it without blocking.
+
+        If the client has more than the server's _max_pending_ bytes buffered, the server's slow client policy
+        applies. The event loop can't wait for the client, so BLOCK keeps buffering.
+
+        Arguments:
+            data {bytes} -- data to be sent
+
+        Raises:
+            ConnectionResetError: if the connection is closed, or was closed now because the client is too slow
+        """
+        if self.writer.is_closing():
+            raise ConnectionResetError(f"Connection of client {self.id} is closed")
+        pending = self.writer.transport.get_write_buffer_size()
+        if pending and pending + len(data) > self.server.max_pending:
+            policy = self.server.slow_client_policy
+            if policy == DROP:
+                logger.warning(f"Client {self.id} is too slow, message dropped.")
+                return
+            if policy == DISCONNECT:
+                logger.warning(f"Client {self.id} is too slow, disconnecting.")
+                # The read of the run task ends and handles the disconnection
+                self.writer.transport.abort()
+                raise ConnectionResetError(f"Client {self.id} is too slow")
+        self.writer.write(data)
+
+    def send_message(self, message: str, frames: dict[tuple[str, str], bytes] | None = None):
+        """
+        Sends a network message to the client, framed as negotiated.
+
+        Arguments:
+            message {str} -- network message
+
+        Keyword Arguments:
+            frames {dict[tuple[str, str], bytes] | None} -- frames shared with other clients, see ServerFraming.encode_shared (default: None)
+        """
+        self.send(self.framing.encode(message) if frames is None else self.framing.encode_shared(message, frames))
+
+    async def run(self):
+        try:
+            while self.signal:
+                data = await self.reader.read(READ_SIZE)
+                if not data:
+                    break
+                self.reassembler.feed(data)
+                messages = self.reassembler.frames()
+                echo = self.framing.take_echo()
+                if echo:
+                    self.send(echo)
+                # Pass the complete messages to the server for broadcasting, as one bundle
+                if messages:
+                    self.server.route_message(self, network_proto.term.join(messages))
+        except OSError:
+            pass
+
+        # The connection was lost, not closed by the server
+        if self.signal:
+            self.disconnect()
+
+    def disconnect(self):
+        """Removes the client from the server, broadcasting the disconnection if the server asks for it."""
+        logger.info(f"Client {self.id} has disconnected")
+        self.signal = False
+        if self.server.broadcast_disconnection:
+            logger.info("Broadcasting disconnection message.")
+            self.server.route_message(self, self.server.disconnection_message)
+        self.server.remove_client(self)
+        self.writer.close()
+
+    def close(self):
+        """Closes the connection without broadcasting anything, discarding what a slow client didn't read yet."""
+        self.signal = False
+        if self.writer.transport.get_write_buffer_size():
+            self.writer.transport.abort()
+        else:
+            self.writer.close()
+
+
+
+class AsyncServer(threading.Thread):
+    """
+    Server running every connection in a single asyncio event loop.
+
+    It has the same interface as Server: the event loop runs in the thread started by _start_ and
+    _shutdown_ stops it from any other thread. Alternatively, _serve_ can be awaited from an existing event loop.
+    """
+
+    def __init__(self, host="localhost", port=12345, max_pending: int = MAX_PENDING, slow_client_policy: str = DISCONNECT, transport: str = TCP):
+        """
+        __init__ method for AsyncServer class.
+
+        Keyword Arguments:
+            host {str} -- address to listen on (default: "localhost")
+            port {int} -- port to listen on (default: 12345)
+            max_pending {int} -- bytes buffered for a client before the slow client policy applies (default: MAX_PENDING)
+            slow_client_policy {str} -- one of SLOW_CLIENT_POLICIES (default: DISCONNECT)
+            transport {str} -- how clients reach the server, one of TRANSPORTS (default: TCP)
+        """
+        threading.Thread.__init__(self)
+        self.host = host
+        self.port = port
+        self.transport = get_transport(transport)
+        self.max_pending = max_pending
+        self.slow_client_policy = slow_client_policy
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.signal = True
+        self.connections: ClientRegistry[AsyncClient] = ClientRegistry()  # Store connected clients by ID
+        self.total_connections = 0  # Count the total connections
+        self.broadcast_disconnection = False
+        self.disconnection_message = ""
+        self.ready = threading.Event()
+        """Set once the server is listening (or failed to)."""
+        self._stop_event: asyncio.Event | None = None
+
+    def start(self):
+        """Starts the event loop thread and waits until the server is listening."""
+        super().start()
+        self.ready.wait()
+
+    def run(self):
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        """Listens for connections until the server is shut down."""
+        self.loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        try:
+            server = await self.transport.start_server(self.handle_connection, self.host, self.port, BACKLOG)
+        except OSError as e:
+            logger.error(f"Could not start the server: {e}")
+            self.signal = False
+            return
+        finally:
+            self.ready.set()
+        logger.success(f"Server listening on {self.transport.describe(self.host, self.port)}")
+
+        async with server:
+            await self._stop_event.wait()
+            server.close()
+
+            # Close the remaining connections so that their tasks end
+            for client in self.connections.snapshot():
+                client.close()
+        self.transport.cleanup(self.host, self.port)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Registers a new connection and reads from it until it closes."""
+        client_id = self.connections.allocate_id()
+        new_client = AsyncClient(reader, writer, client_id, "Name", self)
+        self.connections.add(client_id, new_client)
+        self.total_connections += 1
+        logger.success(f"New connection at ID {new_client}")
+        await new_client.run()
+
+    def route_message(self, sender: AsyncClient, message: str):
+        """Broadcast a message from the sender to all other connected clients."""
+        logger.info(f"Broadcasting from ID {sender.id}: {message}")
+        frames = {}  # Encode the message once per framing
+        for client in self.connections:
+            if client.id != sender.id:  # Do not send the message back to the sender
+                try:
+                    client.send_message(message, frames)
+                except OSError:
+                    self.remove_client(client)
+
+    def remove_client(self, client: AsyncClient):
+        """Helper method to remove a client from the server's connection list."""
+        if self.connections.remove(client.id, client):
+            logger.info(f"Client {client.address} removed from server.")
+
+    def shutdown(self):
+        """Gracefully shut down the server and all client connections."""
+        logger.info("Server shutting down...")
+        self.signal = False
+
+        if self.loop is not None and self._stop_event is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._stop_event.set)
+        if self.is_alive():
+            self.join()
+
+        logger.info("Server terminated.")
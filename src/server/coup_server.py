@@ -1,4 +1,6 @@
 from .server import Server, Client
+from .async_server import AsyncServer, AsyncClient
+from .registry import ClientRegistry
 from proto.network_proto import network_proto, NetworkMessage
 from proto.network_proto import ALL, SINGLE, EXCEPT, DISCONNECT
 from loguru import logger
@@ -7,25 +9,33 @@ from loguru import logger
 DEFAULT_ADDR = True  # Use default address for messages
 ROOT_ADDR = 0
 
-class CoupServer(Server):
-    def __init__(self, host="localhost", port=12345):
-        super().__init__(host, port)
-        self.broadcast_disconnection = True
-        self.disconnection_message = network_proto.SINGLE(ROOT_ADDR, DISCONNECT)
+class CoupRouter:
+    """
+    Routing of the network protocol messages, shared by the threaded and the asyncio servers.
+
+    The class using it must keep its clients in a ClientRegistry called _connections_, provide _remove_client_
+    and give each client a _send_message_ method that frames the message as negotiated with that client.
+    """
 
-    def route_message(self, sender: Client, net_msg: bytes):
-        """Route a message based on its format."""
-        net_msg_str = net_msg.decode("utf-8")
+    connections: ClientRegistry
 
-        logger.info(f"Received message from ID {sender.id}: {net_msg_str.replace("\n", "\\n")}")
+    def route_message(self, sender: Client | AsyncClient, net_msg: str):
+        """
+        Route a message based on its format.
+
+        The message can be a bundle of network messages separated by the terminator, e.g. everything the root
+        sent in one update. All the messages of a bundle that go to the same client are sent to it in one write.
+        """
+        logger.info(f"Received message from ID {sender.id}: {net_msg.replace("\n", "\\n")}")
         
         # If the message is not addressed, address it to root
         try:
-            nets = NetworkMessage.from_string(net_msg_str)
+            nets = NetworkMessage.from_string(net_msg)
         except SyntaxError:
             logger.warning("Invalid message format.")
             return
         
+        outbox: dict[Client | AsyncClient, list[str]] = {}
         for net in nets:
             
             if net.msg is None:
@@ -37,22 +47,41 @@ class CoupServer(Server):
                 if net.addr is None:
                     logger.warning("No address specified for single message.")
                 else:
-                    self.send_to_client(sender, net.msg, int(net.addr))
+                    self.send_to_client(sender, net.msg, int(net.addr), outbox)
                     
             elif net.msg_type == EXCEPT:
                 # Broadcast to everyone except sender and the client with the specified ID
                 if net.addr is None:
                     logger.warning("No address specified for except message.")
                 else:
-                    self.broadcast_except(sender, net.msg, int(net.addr))
+                    self.broadcast_except(sender, net.msg, int(net.addr), outbox)
                     
             elif net.msg_type == ALL:
                 # Broadcast to everyone except sender
-                self.broadcast_except(sender, net.msg, int(sender.id))
-            
+                self.broadcast_except(sender, net.msg, int(sender.id), outbox)
+        self.flush(outbox)
         
-    def broadcast_except(self, sender: Client, message: str, exclude_client_id: int):
-        """Broadcast the message to all clients except the sender and optionally exclude a specific client."""
+    def flush(self, outbox: dict[Client | AsyncClient, list[str]]):
+        """
+        Sends the network messages queued for each client, joined in a single frame.
+
+        Clients that get the same messages with the same framing share the frame, so it is only encoded once.
+        """
+        frames = {}
+        for client, messages in outbox.items():
+            try:
+                # Serialized network messages already end with the terminator
+                client.send_message("".join(messages), frames)
+            except OSError:
+                self.remove_client(client)
+        outbox.clear()
+
+    def broadcast_except(self, sender: Client | AsyncClient, message: str, exclude_client_id: int, outbox: dict | None = None):
+        """
+        Broadcast the message to all clients except the sender and optionally exclude a specific client.
+
+        If _outbox_ is given, the message is queued there for _flush_ instead of being sent.
+        """
         logger.info(f"Broadcasting from ID {sender.id}: {message}")
         
         # Add origin address to the message
@@ -63,15 +92,19 @@ class CoupServer(Server):
             return
         
         # Broadcast
-        for client in self.connections:
+        queue = {} if outbox is None else outbox
+        for client in self.connections.snapshot():
             if client.id != sender.id and client.id != exclude_client_id:
-                try:
-                    client.socket.sendall(net_msg.encode("utf-8"))
-                except OSError:
-                    self.remove_client(client)
+                queue.setdefault(client, []).append(net_msg)
+        if outbox is None:
+            self.flush(queue)
 
-    def send_to_client(self, sender: Client, message: str, client_id: int):
-        """Send a message to a specific client identified by client_id."""
+    def send_to_client(self, sender: Client | AsyncClient, message: str, client_id: int, outbox: dict | None = None):
+        """
+        Send a message to a specific client identified by client_id.
+
+        If _outbox_ is given, the message is queued there for _flush_ instead of being sent.
+        """
         logger.info(f"Sending message to client {client_id} from ID {sender.id}: {message}")
         
         # Check if client is addressing itself
@@ -87,16 +120,29 @@ class CoupServer(Server):
             return
         
         # Find the client with the specified ID
-        for client in self.connections:
-            if client.id != sender.id and client.id == client_id:
-                try:
-                    client.socket.sendall(net_msg.encode("utf-8"))
-                except OSError:
-                    self.remove_client(client)
-                return
-        
-        # Client not found
-        logger.warning(f"Client with ID {client_id} not found.")
+        client = self.connections.get(client_id)
+        if client is None or client.id == sender.id:
+            logger.warning(f"Client with ID {client_id} not found.")
+        elif outbox is None:
+            self.flush({client: [net_msg]})
+        else:
+            outbox.setdefault(client, []).append(net_msg)
+
+
+class CoupServer(CoupRouter, Server):
+    def __init__(self, host="localhost", port=12345, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self.broadcast_disconnection = True
+        self.disconnection_message = network_proto.SINGLE(ROOT_ADDR, DISCONNECT)
+
+
+class AsyncCoupServer(CoupRouter, AsyncServer):
+    """CoupServer serving every client from a single asyncio event loop instead of a thread per client."""
+
+    def __init__(self, host="localhost", port=12345, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self.broadcast_disconnection = True
+        self.disconnection_message = network_proto.SINGLE(ROOT_ADDR, DISCONNECT)
 
 
 def main():
@@ -0,0 +1,94 @@
+import heapq
+import threading
+from typing import Generic, Iterator, TypeVar
+
+
+C = TypeVar("C")
+
+
+class ClientRegistry(Generic[C]):
+    """
+    Connected clients of a server, by client ID.
+
+    Readers never lock: adding or removing a client builds new copies of the tables under a lock and
+    swaps them in, so a broadcast iterates over a snapshot that other threads can't change under it,
+    and a lookup by ID is a single dict access.
+
+    IDs are allocated in increasing order, and an ID is reused once its client is removed, lowest first.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: dict[int, C] = {}
+        """Clients by ID, replaced (never modified) on every change."""
+        self._snapshot: tuple[C, ...] = ()
+        """Clients in the order they were added, replaced on every change."""
+        self._free: list[int] = []
+        """Heap of the IDs released by removed clients."""
+        self._next_id = 0
+        """Lowest ID never allocated."""
+
+    def allocate_id(self) -> int:
+        """
+        Reserves an ID for a new client, reusing the lowest released ID if there is one.
+
+        Returns:
+            int -- ID to pass to _add_ with the new client
+        """
+        with self._lock:
+            if self._free:
+                return heapq.heappop(self._free)
+            self._next_id += 1
+            return self._next_id - 1
+
+    def add(self, client_id: int, client: C):
+        """
+        Registers a client under an ID obtained from _allocate_id_.
+
+        Arguments:
+            client_id {int} -- ID of the client
+            client {C} -- new client
+        """
+        with self._lock:
+            clients = dict(self._clients)
+            clients[client_id] = client
+            self._clients = clients
+            self._snapshot = self._snapshot + (client,)
+
+    def remove(self, client_id: int, client: C) -> bool:
+        """
+        Unregisters a client and releases its ID.
+
+        Arguments:
+            client_id {int} -- ID of the client
+            client {C} -- client to remove, nothing is removed if another client has that ID
+
+        Returns:
+            bool -- True if the client was registered
+        """
+        with self._lock:
+            if self._clients.get(client_id) is not client:
+                return False
+            clients = dict(self._clients)
+            del clients[client_id]
+            self._clients = clients
+            self._snapshot = tuple(other for other in self._snapshot if other is not client)
+            heapq.heappush(self._free, client_id)
+            return True
+
+    def get(self, client_id: int) -> C | None:
+        """Returns the client with the given ID, None if there is none."""
+        return self._clients.get(client_id)
+
+    def snapshot(self) -> tuple[C, ...]:
+        """Returns the clients registered right now, in the order they were added."""
+        return self._snapshot
+
+    def __iter__(self) -> Iterator[C]:
+        return iter(self._snapshot)
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def __contains__(self, client) -> bool:
+        return self._clients.get(getattr(client, "id", None)) is client
@@ -0,0 +1,305 @@
+import threading
+from typing import Callable
+from .server import Server, Client
+from .async_server import AsyncServer, AsyncClient
+from .timers import Timers
+from .coup_server import CoupRouter, ROOT_ADDR
+from .registry import ClientRegistry
+from proto.network_proto import network_proto, NetworkMessage
+from proto.network_proto import ALL, SINGLE, EXCEPT, JOIN, SIT, SEAT, DISCONNECT
+from proto.game_proto import game_proto
+from client.root import Root
+from client.root_pool import RootPool
+from client.game.core import MAX_PLAYERS
+from terminal.terminal import NullTerminal
+from loguru import logger
+
+
+class Room:
+    """
+    Game hosted by a room server: a Root of its own and the clients that joined the room.
+
+    Clients get IDs local to the room, starting at 1 since ID 0 (ROOT_ADDR) is the Root's, so each
+    room looks like a single game server to its clients and to its Root.
+    """
+
+    def __init__(self, name: str, root: Root, size: int = MAX_PLAYERS):
+        """
+        __init__ method for Room class.
+
+        Arguments:
+            name {str} -- name of the room
+            root {Root} -- auto root ready for a game of _size_ players
+
+        Keyword Arguments:
+            size {int} -- number of players, the game starts when they are all in (default: MAX_PLAYERS)
+        """
+        self.name = name
+        self.size = size
+        self.root = root
+        self.members: ClientRegistry[Client | AsyncClient | Seat] = ClientRegistry()
+        self.members.allocate_id()  # Reserve ROOT_ADDR
+        self.lock = threading.RLock()
+        """Serializes the messages handled by the Root, it is taken again if a send fails while routing."""
+        self.closed = False
+        self.timer_pending = False
+        """Flag for whether a deadline check of the Root is scheduled."""
+
+    def is_open(self) -> bool:
+        """Returns whether new players can still join the room."""
+        return not self.closed and len(self.members) < self.size and self.root.sm.current_state.id in self.root.sm.waiting_states
+
+
+class Seat:
+    """
+    Player multiplexed with others over the connection of a bot host.
+
+    To the rooms a seat is a client of its own: it joins a room with SIT@seat@room[@size] and talks to the Root
+    with SEAT@seat@message. Messages to the seat are sent back over the connection as SEAT@seat@message.
+    """
+
+    def __init__(self, connection: Client | AsyncClient, seat: int):
+        """
+        __init__ method for Seat class.
+
+        Arguments:
+            connection {Client | AsyncClient} -- connection of the bot host
+            seat {int} -- seat number, unique within the connection
+        """
+        self.connection = connection
+        self.seat = seat
+        self.id = f"{connection.id}.{seat}"
+        self.room: Room | None = None
+        """Room the seat joined, None otherwise."""
+        self.room_id: int | None = None
+        """ID of the seat inside its room."""
+
+    def wrap(self, messages: list[str]) -> list[str]:
+        """Readdresses network messages to the seat, the bot host has no use for their origin."""
+        return [network_proto.SEAT(self.seat, NetworkMessage(message).msg) for message in messages]
+
+
+class RoomRouter(CoupRouter):
+    """
+    Routing of a server hosting many games on one port, shared by the threaded and the asyncio servers.
+
+    A client opens with JOIN@room (or JOIN@room@size to choose the number of players of a new room) and then
+    talks to the Root of its room as it would on a single game server. Rooms are created by their first JOIN
+    and closed when their game ends or their last client leaves. Messages never cross rooms.
+
+    The Roots of closed rooms go back to a RootPool and host the games of the next rooms. Roots with a deadline are
+    checked when their first pending reply is due, with one scheduled check per room at a time (see _call_at_).
+
+    A connection can also play for many Seats, each of them in a room of its own or in the same room.
+    """
+
+    rooms: dict[str, Room]
+    rooms_lock: threading.Lock
+    roots: RootPool
+
+    def route_message(self, sender: Client | AsyncClient, net_msg: str):
+        """Route a message inside the room of the sender, or join a room."""
+        try:
+            nets = NetworkMessage.from_string(net_msg)
+        except SyntaxError:
+            logger.warning(f"Invalid message format from ID {sender.id}.")
+            return
+
+        for net in nets:
+            client = sender
+            if net.msg_type == SIT or net.msg_type == SEAT:
+                client = self.seat(sender, int(net.seat))
+                if net.msg_type == SEAT:
+                    # Seats only talk to the Root
+                    net = NetworkMessage(network_proto.SINGLE(ROOT_ADDR, net.msg))
+
+            room = client.room
+            if net.msg_type == JOIN or net.msg_type == SIT:
+                self.join_room(client, str(net.room), int(net.size) if net.size is not None else MAX_PLAYERS)
+            elif room is None:
+                if net.msg != DISCONNECT:
+                    logger.warning(f"Client {client.id} must join a room first.")
+            elif net.msg == DISCONNECT:
+                self.leave_room(client)
+            else:
+                with room.lock:
+                    # The room may have closed, and its Root moved on to another room, since it was looked up
+                    if not room.closed:
+                        self.route_in_room(room, client, net)
+
+    def seat(self, connection: Client | AsyncClient, number: int) -> Seat:
+        """Returns a seat of a connection, creating it the first time it is used."""
+        seat = connection.seats.get(number)
+        if seat is None:
+            seat = connection.seats[number] = Seat(connection, number)
+        return seat
+
+    def flush(self, outbox: dict):
+        # The messages of every seat of a connection leave in the same write
+        for seat in [client for client in outbox if isinstance(client, Seat)]:
+            outbox.setdefault(seat.connection, []).extend(seat.wrap(outbox.pop(seat)))
+        super().flush(outbox)
+
+    def route_in_room(self, room: Room, sender: Client | AsyncClient | Seat, net: NetworkMessage):
+        """Delivers a message from a client to the Root and/or the other clients of its room."""
+        if net.msg is None or net.addr is None and net.msg_type != ALL:
+            logger.warning("Empty message.")
+            return
+
+        outbox: dict[Client | AsyncClient, list[str]] = {}
+        self.address_in_room(room, net, sender.room_id, outbox)
+        to_root = net.msg_type == SINGLE and int(net.addr) == ROOT_ADDR or \
+                  net.msg_type == ALL or net.msg_type == EXCEPT and int(net.addr) != ROOT_ADDR
+        self.flush(outbox)
+        if to_root:
+            self.to_root(room, sender.room_id, str(net.msg))
+
+    def address_in_room(self, room: Room, net: NetworkMessage, origin: int, outbox: dict):
+        """Queues the message for the clients of the room it is addressed to, with _origin_ as the source address."""
+        message = network_proto.SINGLE(origin, net.msg)
+        if net.msg_type == SINGLE:
+            client = room.members.get(int(net.addr))
+            if client is not None and client.room_id != origin:
+                outbox.setdefault(client, []).append(message)
+        else:
+            exclude = int(net.addr) if net.msg_type == EXCEPT else origin
+            for client in room.members.snapshot():
+                if client.room_id != origin and client.room_id != exclude:
+                    outbox.setdefault(client, []).append(message)
+
+    def to_root(self, room: Room, origin: int, game_msg: str):
+        """Hands a game message to the Root of the room and delivers everything the Root sends back."""
+        terminate = room.root.receive_from(str(origin), game_msg)
+        room.root.flush()
+        self.from_root(room, terminate)
+
+    def from_root(self, room: Room, terminate: int = 0):
+        """Delivers everything the Root of the room sent, and watches its deadlines while the game goes on."""
+        outbox: dict[Client | AsyncClient, list[str]] = {}
+        checkout = room.root.checkout
+        while not checkout.empty():
+            for net in NetworkMessage.from_string(checkout.get_nowait()):
+                self.address_in_room(room, net, ROOT_ADDR, outbox)
+
+        # Once the game is over, the clients are free to join another room. The room is closed before they
+        # get EXIT, so that they can open a new game under the same name right away.
+        if terminate or room.root.sm.current_state.id == room.root.sm.end_state:
+            self.close_room(room)
+        elif not room.timer_pending:
+            next_deadline = room.root.next_deadline()
+            if next_deadline is not None:
+                room.timer_pending = True
+                self.call_at(next_deadline, lambda: self.expire_room(room))
+        self.flush(outbox)
+
+    def expire_room(self, room: Room):
+        """Plays the overdue replies of the room on behalf of its players."""
+        with room.lock:
+            room.timer_pending = False
+            if not room.closed:
+                room.root.expire()
+                self.from_root(room)
+
+    def call_at(self, when: float, callback: Callable[[], None]):
+        """Runs _callback_ once _when_ (time.monotonic) is reached, where the server handles its messages."""
+        raise NotImplementedError
+
+    def join_room(self, client: Client | AsyncClient | Seat, name: str, size: int):
+        """Adds a client to a room, creating the room if needed."""
+        if client.room is not None:
+            logger.warning(f"Client {client.id} is already in room {client.room.name}.")
+            return
+
+        with self.rooms_lock:
+            room = self.rooms.get(name)
+            if room is None:
+                size = max(1, min(size, MAX_PLAYERS))
+                room = self.rooms[name] = Room(name, self.roots.acquire(size), size)
+                logger.success(f"Room {name} opened for {room.size} players.")
+
+        with room.lock:
+            if not room.is_open():
+                logger.warning(f"Client {client.id} can't join room {name}.")
+                self.flush({client: [network_proto.SINGLE(ROOT_ADDR, game_proto.ILLEGAL())]})
+                return
+            client.room_id = room.members.allocate_id()
+            client.room = room
+            room.members.add(client.room_id, client)
+        logger.info(f"Client {client.id} joined room {name} as {client.room_id}.")
+
+    def leave_room(self, client: Client | AsyncClient | Seat):
+        """Removes a client from its room, telling the Root, and closes the room once it is empty."""
+        room = client.room
+        if room is None:
+            return
+        with room.lock:
+            if not room.members.remove(client.room_id, client):
+                return
+            client.room = None
+            if not room.closed:
+                self.to_root(room, client.room_id, DISCONNECT)
+            if len(room.members) == 0:
+                self.close_room(room)
+
+    def close_room(self, room: Room):
+        """Closes a room, its remaining clients stay connected without a room and can join another one."""
+        with room.lock:
+            if room.closed:
+                return
+            room.closed = True
+            for client in room.members.snapshot():
+                room.members.remove(client.room_id, client)
+                client.room = None
+            self.roots.release(room.root)
+        with self.rooms_lock:
+            if self.rooms.get(room.name) is room:
+                del self.rooms[room.name]
+        logger.success(f"Room {room.name} closed.")
+
+    def remove_client(self, client: Client | AsyncClient):
+        for seat in list(client.seats.values()):
+            self.leave_room(seat)
+        self.leave_room(client)
+        super().remove_client(client)
+
+
+def root_factory(deadline: float | None) -> Callable[[int], Root]:
+    """Returns the factory of the Roots of a room server, whose players have _deadline_ seconds to reply."""
+    return lambda num_players: Root("auto", num_players, NullTerminal(), deadline=deadline)
+
+
+class RoomServer(RoomRouter, Server):
+    """Threaded server hosting a game per room, each with its own Root. Deadlines are checked by a timer thread."""
+
+    def __init__(self, host="localhost", port=12345, deadline: float | None = None, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self.rooms = {}
+        self.rooms_lock = threading.Lock()
+        self.roots = RootPool(root_factory(deadline))
+        self.broadcast_disconnection = True
+        self.disconnection_message = network_proto.SINGLE(ROOT_ADDR, DISCONNECT)
+        self.timers = Timers()
+
+    def call_at(self, when: float, callback: Callable[[], None]):
+        self.timers.call_at(when, callback)
+
+    def shutdown(self):
+        self.timers.stop()
+        super().shutdown()
+
+
+class AsyncRoomServer(RoomRouter, AsyncServer):
+    """RoomServer serving every client from a single asyncio event loop instead of a thread per client."""
+
+    def __init__(self, host="localhost", port=12345, deadline: float | None = None, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self.rooms = {}
+        self.rooms_lock = threading.Lock()
+        self.roots = RootPool(root_factory(deadline))
+        self.broadcast_disconnection = True
+        self.disconnection_message = network_proto.SINGLE(ROOT_ADDR, DISCONNECT)
+
+    def call_at(self, when: float, callback: Callable[[], None]):
+        # Messages are routed in the event loop, whose clock is time.monotonic
+        if self.loop is not None:
+            self.loop.call_at(when, callback)
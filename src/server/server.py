@@ -1,5 +1,11 @@
 import socket
 import threading
+from collections import deque
+from proto.framing import ServerFraming
+from proto.network_proto import network_proto
+from .registry import ClientRegistry
+from proto.reassembler import Reassembler
+from transport.transport import TCP, get_transport
 from loguru import logger
 
 
@@ -7,10 +13,25 @@ CLIENT_TIMEOUT = 1.0  # Timeout for client socket
 SERVER_TIMEOUT = 1.0  # Timeout for server socket
 MAX_CONNECTIONS = 6  # Maximum number of connections
 DEFAULT_ADDR = True  # Use default address for messages
+MAX_PENDING = 1 << 20  # Bytes queued for a client before the slow client policy applies
+MAX_WRITE_FRAMES = 512  # Maximum number of frames written at once, below the IOV_MAX of the usual platforms
+
+# Slow client policies, applied when a client doesn't read fast enough to keep its queue under MAX_PENDING
+BLOCK = "block"  # Wait for the client to catch up, stalling the sender
+DROP = "drop"  # Discard the new frame
+DISCONNECT = "disconnect"  # Close the connection of the client
+SLOW_CLIENT_POLICIES = (BLOCK, DROP, DISCONNECT)
 
 
 # Client class, new instance created for each connected client
 class Client(threading.Thread):
+    """
+    Client connected to a Server, read by its own thread.
+
+    Data sent to the client is queued and written by a second thread, so routing never waits for a
+    slow socket. The writer takes every queued frame at once and writes them with a single sendmsg.
+    """
+
     def __init__(self, socket: socket.socket, address, id, name, signal, server: "Server"):
         threading.Thread.__init__(self)
         self.socket = socket
@@ -20,57 +41,190 @@ class Client(threading.Thread):
         self.signal = signal
         self.server = server  # Reference to the server to forward received messages
         self.socket.settimeout(CLIENT_TIMEOUT)  # Set a short timeout (1 second) for recv()
+        self.framing = ServerFraming()  # Text, unless the client asks for length-prefixed frames
+        self.reassembler = Reassembler(self.framing)
+        self.room = None
+        """Room the client joined on a room server, None otherwise."""
+        self.room_id: int | None = None
+        """ID of the client inside its room."""
+        self.seats: dict[int, object] = {}
+        """Players multiplexed over the connection by a room server, by seat number."""
+        self.outbound: deque[bytes] = deque()
+        """Frames waiting for the writer thread."""
+        self.pending = 0
+        """Number of bytes queued and not written yet."""
+        self.writable = threading.Condition()
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.broken = False
+        """Flag for whether the writer thread stopped on a write error."""
 
     def __str__(self):
         return str(self.id) + " " + str(self.address)
 
+    def send(self, data: bytes):
+        """
+        Queues data to be sent to the client by the writer thread.
+
+        If the client has more than the server's _max_pending_ bytes queued, the server's slow client policy applies.
+
+        Arguments:
+            data {bytes} -- data to be sent
+
+        Raises:
+            ConnectionResetError: if the connection is closed or can't be written to, or was closed now because the client is too slow
+        """
+        with self.writable:
+            if not self.signal or self.broken:
+                raise ConnectionResetError(f"Connection of client {self.id} is closed")
+            if self.pending and self.pending + len(data) > self.server.max_pending:
+                policy = self.server.slow_client_policy
+                if policy == DROP:
+                    logger.warning(f"Client {self.id} is too slow, message dropped.")
+                    return
+                if policy == DISCONNECT:
+                    logger.warning(f"Client {self.id} is too slow, disconnecting.")
+                    # The reader thread sees the connection closing and handles the disconnection
+                    self.socket.shutdown(socket.SHUT_RDWR)
+                    raise ConnectionResetError(f"Client {self.id} is too slow")
+                while self.signal and not self.broken and self.pending and self.pending + len(data) > self.server.max_pending:
+                    self.writable.wait(CLIENT_TIMEOUT)
+                if not self.signal or self.broken:
+                    raise ConnectionResetError(f"Connection of client {self.id} is closed")
+            self.outbound.append(data)
+            self.pending += len(data)
+            self.writable.notify_all()
+
+    def send_message(self, message: str, frames: dict[tuple[str, str], bytes] | None = None):
+        """
+        Sends a network message to the client, framed as negotiated.
+
+        Arguments:
+            message {str} -- network message
+
+        Keyword Arguments:
+            frames {dict[tuple[str, str], bytes] | None} -- frames shared with other clients, see ServerFraming.encode_shared (default: None)
+        """
+        # Frames are queued in the order they were encoded, so none gets ahead of the echo of the PREAMBLE
+        with self.writable:
+            self.send(self.framing.encode(message) if frames is None else self.framing.encode_shared(message, frames))
+
+    def write_loop(self):
+        """Writes the queued frames until the connection is closed."""
+        while True:
+            with self.writable:
+                while self.signal and not self.outbound:
+                    self.writable.wait(CLIENT_TIMEOUT)
+                if not self.outbound:
+                    return
+                frames = [self.outbound.popleft() for _ in range(min(len(self.outbound), MAX_WRITE_FRAMES))]
+
+            size = sum(map(len, frames))
+            try:
+                self.write(frames)
+            except OSError:
+                with self.writable:
+                    self.broken = True
+                    self.outbound.clear()
+                    self.pending = 0
+                    self.writable.notify_all()
+                # The reader thread sees the connection closing and handles the disconnection
+                try:
+                    self.socket.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                return
+
+            with self.writable:
+                self.pending -= size
+                self.writable.notify_all()
+
+    def write(self, frames: list[bytes]):
+        """Writes frames to the socket with as few system calls as possible."""
+        if not hasattr(self.socket, "sendmsg"):
+            self.socket.sendall(b"".join(frames))
+            return
+
+        buffers: list = frames
+        while buffers:
+            try:
+                sent = self.socket.sendmsg(buffers)
+            except TimeoutError:
+                if not self.signal:
+                    raise
+                continue
+            # Skip the frames that were written and keep the rest of a partially written one
+            done = 0
+            while done < len(buffers) and sent >= len(buffers[done]):
+                sent -= len(buffers[done])
+                done += 1
+            buffers = buffers[done:]
+            if sent:
+                buffers[0] = memoryview(buffers[0])[sent:]
+
     def run(self):
+        self.writer.start()
         while self.signal:
             try:
-                data = self.socket.recv(256)
-                if data:
-                    # Pass the received data to the server for broadcasting
-                    self.server.route_message(self, data)
+                if self.reassembler.recv_from(self.socket):
+                    messages = self.reassembler.frames()
+                    with self.writable:
+                        echo = self.framing.take_echo()
+                        if echo:
+                            self.send(echo)
+                    # Pass the complete messages to the server for broadcasting, as one bundle
+                    if messages:
+                        self.server.route_message(self, network_proto.term.join(messages))
                 else:
                     logger.info(f"Client {self.id} has disconnected")
                     self.signal = False
                     if self.server.broadcast_disconnection:
                         logger.info("Broadcasting disconnection message.")
-                        self.server.route_message(self, self.server.disconnection_message.encode("utf-8"))
+                        self.server.route_message(self, self.server.disconnection_message)
                     self.server.remove_client(self)
                     break
-            except (socket.timeout, UnicodeDecodeError):
+            except socket.timeout:
                 continue
             except OSError:
                 logger.info(f"Client {self.id} has disconnected")
                 self.signal = False
                 if self.server.broadcast_disconnection:
                     logger.info("Broadcasting disconnection message.")
-                    self.server.route_message(self, self.server.disconnection_message.encode("utf-8"))
+                    self.server.route_message(self, self.server.disconnection_message)
                 self.server.remove_client(self)
                 break
 
 
 
 class Server(threading.Thread):
-    def __init__(self, host="localhost", port=12345):
+    def __init__(self, host="localhost", port=12345, max_pending: int = MAX_PENDING, slow_client_policy: str = DISCONNECT, transport: str = TCP):
+        """
+        __init__ method for Server class.
+
+        Keyword Arguments:
+            host {str} -- address to listen on (default: "localhost")
+            port {int} -- port to listen on (default: 12345)
+            max_pending {int} -- bytes queued for a client before the slow client policy applies (default: MAX_PENDING)
+            slow_client_policy {str} -- one of SLOW_CLIENT_POLICIES (default: DISCONNECT)
+            transport {str} -- how clients reach the server, one of TRANSPORTS (default: TCP)
+        """
         threading.Thread.__init__(self)
         self.host = host
         self.port = port
+        self.transport = get_transport(transport)
+        self.max_pending = max_pending
+        self.slow_client_policy = slow_client_policy
         self.socket = None
         self.signal = True
-        self.connections: list[Client] = []  # Store connected clients
+        self.connections: ClientRegistry[Client] = ClientRegistry()  # Store connected clients by ID
         self.total_connections = 0  # Count the total connections
         self.broadcast_disconnection = False
         self.disconnection_message = ""
 
     def setup_socket(self):
         """Setup the server socket, bind, and listen for connections."""
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.bind((self.host, self.port))
-        self.socket.listen(MAX_CONNECTIONS)
+        self.socket = self.transport.listen(self.host, self.port, MAX_CONNECTIONS)
         self.socket.settimeout(SERVER_TIMEOUT)  # Add a timeout so the accept loop can regularly check for shutdown
-        logger.success(f"Server listening on {self.host}:{self.port}")
+        logger.success(f"Server listening on {self.transport.describe(self.host, self.port)}")
 
     def run(self):
         self.setup_socket()
@@ -82,29 +236,29 @@ class Server(threading.Thread):
                     self.signal = False
                     break
                 sock, address = self.socket.accept()
-                # TODO: assign the first available client id 
-                new_client = Client(sock, address, self.total_connections, "Name", True, self)
-                self.connections.append(new_client)
+                client_id = self.connections.allocate_id()
+                new_client = Client(sock, address, client_id, "Name", True, self)
+                self.connections.add(client_id, new_client)
                 new_client.start()
                 logger.success(f"New connection at ID {new_client}")
                 self.total_connections += 1
             except OSError:
                 continue
 
-    def route_message(self, sender: Client, message: bytes):
+    def route_message(self, sender: Client, message: str):
         """Broadcast a message from the sender to all other connected clients."""
-        logger.info(f"Broadcasting from ID {sender.id}: {message.decode('utf-8')}")
+        logger.info(f"Broadcasting from ID {sender.id}: {message}")
+        frames = {}  # Encode the message once per framing
         for client in self.connections:
             if client.id != sender.id:  # Do not send the message back to the sender
                 try:
-                    client.socket.sendall(message)
+                    client.send_message(message, frames)
                 except OSError:
                     self.remove_client(client)
 
     def remove_client(self, client: Client):
         """Helper method to remove a client from the server's connection list."""
-        if client in self.connections:
-            self.connections.remove(client)
+        if self.connections.remove(client.id, client):
             logger.info(f"Client {client.address} removed from server.")
 
     def shutdown(self):
@@ -114,6 +268,7 @@ class Server(threading.Thread):
         # Clean up: close the main server socket
         if self.socket:
             self.socket.close()
+            self.transport.cleanup(self.host, self.port)
 
         # Signal all threads to finish
         self.signal = False
@@ -0,0 +1,61 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable
+from loguru import logger
+
+
+class Timers(threading.Thread):
+    """
+    Runs callbacks at given times, from a thread of its own.
+
+    The callbacks wait in a heap and the thread sleeps until the first one is due, or until an earlier one is added,
+    so it costs nothing while nothing is due. It starts with the first callback.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.heap: list[tuple[float, int, Callable[[], None]]] = []
+        self.order = itertools.count()
+        """Tie breaker, callbacks due at the same time run in the order they were added."""
+        self.condition = threading.Condition()
+        self.signal = True
+
+    def call_at(self, when: float, callback: Callable[[], None]):
+        """
+        Runs _callback_ once _when_ is reached.
+
+        Arguments:
+            when {float} -- time to run the callback at, as given by time.monotonic
+            callback {() -> None} -- function to call
+        """
+        with self.condition:
+            if not self.is_alive() and self.signal:
+                self.start()
+            heapq.heappush(self.heap, (when, next(self.order), callback))
+            if self.heap[0][2] is callback:
+                self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.signal:
+                    wait = self.heap[0][0] - time.monotonic() if self.heap else None
+                    if wait is not None and wait <= 0:
+                        break
+                    self.condition.wait(wait)
+                if not self.signal:
+                    return
+                _, _, callback = heapq.heappop(self.heap)
+            try:
+                callback()
+            except Exception as e:
+                logger.exception(f"Error in timer: {e}")
+
+    def stop(self):
+        """Drops the callbacks that are not due yet and stops the thread."""
+        with self.condition:
+            self.signal = False
+            self.heap.clear()
+            self.condition.notify()
@@ -1,5 +1,7 @@
 from typing import Callable, Dict, List, Optional, Tuple
 
+AUTO = None  # Condition of a transition that is always taken
+
 class State:
     """ 
     Represents a state in a state machine. 
@@ -20,6 +22,8 @@ class State:
             exit_action {() -> None} -- Exit action (default: empty function)
         """
         self.name: str = name
+        self.id: int = -1
+        """Index of the state in the state machine, assigned when the state is added."""
         self.entry_action = entry_action or self._no_action
         self.exit_action = exit_action or self._no_action
 
@@ -35,20 +39,36 @@ class StateMachine:
     
     The state machine has a current state and a dictionary of states and transitions.
     The state machine can add states, add transitions between states, set the current state, and update the state machine.
+
+    States get an integer ID when they are added, and the transitions are compiled into a table indexed by
+    state ID the first time the state machine is updated, so updates don't look anything up by name.
     """
     
-    def __init__(self, initial_state: State):
+    def __init__(self, initial_state: State, run_to_completion: bool = False, ready: Optional[Callable[[], bool]] = None):
         """
         __init__ method for StateMachine class.
 
         Arguments:
             initial_state {State} -- The initial state of the state machine.
+
+        Keyword Arguments:
+            run_to_completion {bool} -- follow transitions until none can be taken in a single update (default: False)
+            ready {() -> bool} -- condition checked before taking each further transition of a run-to-completion update (default: always ready)
         """
         
         self.states: Dict[str, State] = {}
-        self.transitions: Dict[str, List[Tuple[str, Callable[[], bool]]]] = {}
+        self.states_by_id: List[State] = []
+        self.transitions: Dict[str, List[Tuple[str, Optional[Callable[[], bool]]]]] = {}
+        self.table: Optional[List[Tuple[Tuple[State, Optional[Callable[[], bool]]], ...]]] = None
+        """Transitions of each state ID as (next state, condition), None until compiled."""
+        self.initial_state = initial_state
         self.current_state: State = initial_state
         self.previous_state: Optional[State] = None
+        self.run_to_completion = run_to_completion
+        self.ready = ready or (lambda: True)
+        self.counts: Dict[Tuple[int, int], int] = {}
+        """Number of times each transition was taken, by (from state ID, to state ID)."""
+        self.add_state(initial_state)
 
     def add_state(self, state: State) -> None:
         """
@@ -58,21 +78,63 @@ class StateMachine:
             state {State} -- The state to add to the state machine.
         """
         
+        if state.name in self.states:
+            # Replacing a state keeps its ID
+            state.id = self.states[state.name].id
+            self.states_by_id[state.id] = state
+        else:
+            state.id = len(self.states_by_id)
+            self.states_by_id.append(state)
         self.states[state.name] = state
+        self.table = None
 
-    def add_transition(self, from_state: str, to_state: str, condition) -> None:
+    def add_transition(self, from_state: str, to_state: str, condition: Optional[Callable[[], bool]] = AUTO) -> None:
         """
         Adds a transition between two states in the state machine.
 
+        Transitions of a state are checked in the order they were added.
+
         Arguments:
             from_state {str} -- starting state
             to_state {str} -- ending state
-            condition {() -> bool} -- condition to transition from from_state to to_state
+
+        Keyword Arguments:
+            condition {() -> bool} -- condition to transition from from_state to to_state (default: AUTO)
         """
         
         if from_state not in self.transitions:
             self.transitions[from_state] = []
         self.transitions[from_state].append((to_state, condition))
+        self.table = None
+
+    def compile(self) -> None:
+        """
+        Builds the transition table.
+
+        Raises:
+            ValueError: If a transition leads to a state that does not exist in the state machine.
+        """
+        table = []
+        for state in self.states_by_id:
+            row = []
+            for to_state, condition in self.transitions.get(state.name, ()):
+                if to_state not in self.states:
+                    raise ValueError(f"State {to_state} does not exist in the state machine")
+                row.append((self.states[to_state], condition))
+            table.append(tuple(row))
+        self.table = table
+
+    def state_ids(self, *names: str) -> frozenset[int]:
+        """
+        Returns the IDs of the states with the given names, to check the current state without comparing names.
+
+        Raises:
+            ValueError: If a state name does not exist in the state machine.
+        """
+        for name in names:
+            if name not in self.states:
+                raise ValueError(f"State {name} does not exist in the state machine")
+        return frozenset(self.states[name].id for name in names)
 
     def set_state(self, state_name: str) -> None:
         """
@@ -86,22 +148,60 @@ class StateMachine:
             ValueError: If the state name does not exist in the state machine.
         """
         if state_name in self.states:
-            self.previous_state = self.current_state
-            self.current_state.exit_action()
-            self.current_state = self.states[state_name]
-            self.current_state.entry_action()
+            self.enter(self.states[state_name])
         else:
             raise ValueError(f"State {state_name} does not exist in the state machine")
 
+    def enter(self, state: State) -> None:
+        """Takes the transition from the current state to _state_, running the exit and entry actions."""
+        key = (self.current_state.id, state.id)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.previous_state = self.current_state
+        self.current_state.exit_action()
+        self.current_state = state
+        state.entry_action()
+
+    def reset(self) -> None:
+        """Goes back to the initial state without running any action, so the state machine can be reused. Transition counts are kept."""
+        self.current_state = self.initial_state
+        self.previous_state = None
+
     def update(self) -> None:
         """
         Updates the state of the state machine based on the transitions defined.
+
+        Takes the first transition of the current state whose condition holds. In run-to-completion mode, it keeps
+        going from the new state while the state machine is _ready_, taking at most as many transitions as there are
+        states so that cycles of AUTO transitions can't hang it.
         """
-        if self.current_state.name in self.transitions:
-            for (next_state, condition) in self.transitions[self.current_state.name]:
-                if condition():
-                    self.set_state(next_state)
+        if self.table is None:
+            self.compile()
+        table = self.table
+        for _ in range(len(table)):
+            for next_state, condition in table[self.current_state.id]:
+                if condition is None or condition():
                     break
+            else:
+                return
+            self.enter(next_state)
+            if not self.run_to_completion or not self.ready():
+                return
+
+    def transition_count(self, from_state: Optional[str] = None, to_state: Optional[str] = None) -> int:
+        """
+        Counts the transitions taken since the state machine was created.
+
+        Keyword Arguments:
+            from_state {str} -- only count transitions leaving this state (default: any state)
+            to_state {str} -- only count transitions entering this state (default: any state)
+
+        Returns:
+            int -- number of transitions taken
+        """
+        from_id = self.states[from_state].id if from_state is not None else None
+        to_id = self.states[to_state].id if to_state is not None else None
+        return sum(count for (orig, dest), count in self.counts.items()
+                   if from_id in (None, orig) and to_id in (None, dest))
 
 
 if __name__ == "__main__":
@@ -119,7 +219,7 @@ if __name__ == "__main__":
 
     # Add transitions
     sm.add_transition("Idle", "Active", lambda: True)  # Transition from Idle to Active when condition is True
-    sm.add_transition("Active", "Finished", lambda: True)  # Transition from Active to Finished when condition is True
+    sm.add_transition("Active", "Finished", AUTO)  # Transition from Active to Finished unconditionally
 
     # Run state machine
     print(f"- Initial State: {sm.current_state}")
@@ -128,3 +228,11 @@ if __name__ == "__main__":
     sm.update()  # Should transition to Finished
     print(f"- Current State: {sm.current_state}")
 
+    # Run to completion
+    sm = StateMachine(idle, run_to_completion=True)
+    sm.add_state(active)
+    sm.add_state(finished)
+    sm.add_transition("Idle", "Active", lambda: True)
+    sm.add_transition("Active", "Finished", AUTO)
+    sm.update()  # Should transition to Active and then to Finished
+    print(f"- Current State: {sm.current_state} after {sm.transition_count()} transitions")
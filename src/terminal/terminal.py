@@ -27,3 +27,16 @@ class Terminal(threading.Thread):
             self.signal = False
         
         
+class NullTerminal(Terminal):
+    """
+    Terminal that never reads input. Used by players that run without a console.
+    """
+    def __init__(self):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.signal = True  # Keep the player alive, there is just nothing to read
+        self.fifo = None
+        self.prompt = ""
+    
+    def run(self):
+        return
@@ -0,0 +1,326 @@
+import os
+import platform
+import socket
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from .transport import Transport, UnixTransport, SHM, ConnectionHandler
+
+
+RING_SIZE = 1 << 20  # Bytes of data of each ring, one per direction
+HANDSHAKE_TIMEOUT = 5.0  # Time allowed to exchange the ring names of a new connection
+SPACE_WAIT = 0.0005  # Sleep of a writer waiting for the reader to make room in a full ring
+# Times an empty ring is checked again before sleeping on the doorbell, a few tens of microseconds. With a single
+# core the writer can't run while the reader spins, so it goes to sleep right away.
+SPIN_CHECKS = 2000 if (os.cpu_count() or 1) > 1 else 0
+
+# Header of a ring: bytes written (head), bytes read (tail), writer closed, reader sleeping on the doorbell
+HEAD, TAIL, CLOSED, WAITING = range(4)
+HEADER_SIZE = 4 * 8
+# CPUs keeping stores in order and loads in order (x86 total store order), which the rings rely on
+TSO_MACHINES = frozenset(("x86_64", "amd64", "i386", "i686", "x86"))
+
+
+class Ring:
+    """
+    Single-producer single-consumer byte ring in shared memory.
+
+    The writer only moves _head_ and the reader only moves _tail_, both counting bytes since the ring was created,
+    so no lock is needed. The data is copied before _head_ is published and read after _head_ is seen, which is only
+    safe if stores become visible to the other process in program order and loads are not reordered with each other.
+    x86 CPUs guarantee both; other CPUs would need atomics Python doesn't offer, so ShmTransport refuses to run on them.
+    """
+
+    created: set[str] = set()
+    """Names of the rings created by this process and not unlinked yet."""
+
+    def __init__(self, memory: SharedMemory):
+        self.memory = memory
+        self.header = memory.buf[:HEADER_SIZE].cast("Q")
+        self.data = memory.buf[HEADER_SIZE:]
+        self.size = len(self.data)
+
+    @classmethod
+    def create(cls, size: int = RING_SIZE) -> "Ring":
+        ring = cls(SharedMemory(create=True, size=HEADER_SIZE + size))
+        ring.header[HEAD] = ring.header[TAIL] = ring.header[CLOSED] = ring.header[WAITING] = 0
+        cls.created.add(ring.memory.name)
+        return ring
+
+    @classmethod
+    def attach(cls, name: str) -> "Ring":
+        memory = SharedMemory(name=name)
+        # The creator of the ring is responsible for it, it must not be removed when this process exits. In the
+        # creator's own process there is a single registration, which its unlink removes.
+        if name not in cls.created:
+            resource_tracker.unregister(memory._name, "shared_memory")  # type: ignore[attr-defined]
+        return cls(memory)
+
+    def unlink(self):
+        """Removes the name of the ring, which stays usable by the ends already attached."""
+        self.memory.unlink()
+        self.created.discard(self.memory.name)
+
+    def write(self, data) -> int:
+        """Copies as much of _data_ as fits in the ring and returns the number of bytes written."""
+        head = self.header[HEAD]
+        count = min(len(data), self.size - (head - self.header[TAIL]))
+        if count <= 0:
+            return 0
+        start = head % self.size
+        first = min(count, self.size - start)
+        self.data[start:start + first] = data[:first]
+        if count > first:
+            self.data[:count - first] = data[first:count]
+        self.header[HEAD] = head + count
+        return count
+
+    def read_into(self, buffer) -> int:
+        """Moves as many bytes as are available and fit in _buffer_ out of the ring, returns their number."""
+        tail = self.header[TAIL]
+        count = min(len(buffer), self.header[HEAD] - tail)
+        if count <= 0:
+            return 0
+        start = tail % self.size
+        first = min(count, self.size - start)
+        buffer[:first] = self.data[start:start + first]
+        if count > first:
+            buffer[first:count] = self.data[:count - first]
+        self.header[TAIL] = tail + count
+        return count
+
+    def readable(self) -> bool:
+        return self.header[HEAD] != self.header[TAIL]
+
+    def __del__(self):
+        # The views must go before the mapping, another thread may still use them until the ring is collected
+        self.header.release()
+        self.data.release()
+        self.memory.close()
+
+
+def fence(lock: threading.Lock):
+    """
+    Keeps the loads that follow from passing the stores that precede, which x86 otherwise allows.
+
+    Taking and releasing a lock costs a locked instruction, a full memory barrier on x86. _lock_ should be one that only
+    one side of the connection takes, so it hardly ever waits.
+    """
+    lock.acquire()
+    lock.release()
+
+
+class ShmSocket:
+    """
+    Connection made of two shared memory rings, one per direction, and a Unix socket used as a doorbell.
+
+    It offers the part of the socket interface the threaded server and the client use. A reader with nothing to read
+    spins for a moment, then sets the _waiting_ flag of its ring and sleeps on the doorbell, which the writer only
+    rings with a single byte when it sees that flag. The reader sets the flag before it looks at _head_ a last time
+    and the writer publishes _head_ before it looks at the flag, each with a fence in between, so at least one of them
+    sees the other and a wake up is never lost.
+    """
+
+    def __init__(self, rx: Ring, tx: Ring, doorbell: socket.socket):
+        self.rx = rx
+        self.tx = tx
+        self.doorbell = doorbell
+        self.bell = socket.socket(fileno=os.dup(doorbell.fileno()))
+        """
+        Second socket of the doorbell for the writer. recv_into gives the doorbell a timeout, which would make a send
+        wait for room, while the bell never has one and only sends with MSG_DONTWAIT.
+        """
+        self.rx_fence = threading.Lock()
+        self.tx_fence = threading.Lock()
+        self.timeout: float | None = None
+        self.closed = False
+        self.eof = False
+        """Flag for whether the doorbell of the other end was closed."""
+        self.doorbell_timeout: float | None = doorbell.gettimeout()
+
+    def settimeout(self, timeout: float | None):
+        self.timeout = timeout
+
+    def recv_into(self, buffer) -> int:
+        """Reads available data into _buffer_, waiting for some up to the timeout. Returns 0 once the other end closed."""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        header = self.rx.header
+        while True:
+            received = self.rx.read_into(buffer)
+            if received:
+                return received
+            if self.closed:
+                raise OSError("Connection is closed")
+            if header[CLOSED] or self.eof:
+                return 0
+
+            # A reply is usually a few microseconds away, much less than a sleep on the doorbell costs
+            for _ in range(SPIN_CHECKS):
+                if header[HEAD] != header[TAIL]:
+                    break
+            if self.rx.readable():
+                continue
+
+            # A writer that doesn't see the flag has published its data before the check that follows
+            header[WAITING] = 1
+            fence(self.rx_fence)
+            if self.rx.readable() or header[CLOSED]:
+                header[WAITING] = 0
+                continue
+
+            # Rings of data already read only cause another check
+            wait = None
+            if deadline is not None:
+                wait = deadline - time.monotonic()
+                if wait <= 0:
+                    header[WAITING] = 0
+                    raise socket.timeout("timed out")
+            if wait != self.doorbell_timeout:
+                self.doorbell.settimeout(wait)
+                self.doorbell_timeout = wait
+            try:
+                if not self.doorbell.recv(4096):
+                    self.eof = True
+            except socket.timeout:
+                pass
+            except OSError:
+                self.eof = True
+            header[WAITING] = 0
+
+    def sendall(self, data):
+        view = memoryview(data)
+        while view:
+            if self.closed or self.eof:
+                raise BrokenPipeError("Connection is closed")
+            written = self.tx.write(view)
+            view = view[written:]
+            fence(self.tx_fence)
+            if self.tx.header[WAITING]:
+                self._ring()
+            if view:
+                time.sleep(SPACE_WAIT)
+
+    def sendmsg(self, buffers) -> int:
+        total = 0
+        for buffer in buffers:
+            self.sendall(buffer)
+            total += len(buffer)
+        return total
+
+    def _ring(self):
+        """Wakes the reader of the other end up."""
+        try:
+            self.bell.send(b"\0", socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            pass  # The doorbell is already full of wake ups the reader hasn't taken yet
+
+    def shutdown(self, how: int):
+        if not self.tx.header[CLOSED]:
+            self.tx.header[CLOSED] = 1
+        try:
+            self.doorbell.shutdown(how)
+        except OSError:
+            pass
+
+    def close(self):
+        if self.closed:
+            return
+        self.shutdown(socket.SHUT_RDWR)
+        self.closed = True
+        self.bell.close()
+        self.doorbell.close()
+
+
+class ShmListener:
+    """Listening socket of a shared memory server, _accept_ attaches the rings created by each new client."""
+
+    def __init__(self, sock: socket.socket):
+        self.socket = sock
+
+    def settimeout(self, timeout: float | None):
+        self.socket.settimeout(timeout)
+
+    def accept(self) -> tuple[ShmSocket, str]:
+        doorbell, _ = self.socket.accept()
+        try:
+            doorbell.settimeout(HANDSHAKE_TIMEOUT)
+            names = b""
+            while not names.endswith(b"\n"):
+                chunk = doorbell.recv(256)
+                if not chunk:
+                    raise ConnectionAbortedError("Client left during the handshake")
+                names += chunk
+            rx_name, tx_name = names.decode().split()
+            rx, tx = Ring.attach(rx_name), Ring.attach(tx_name)
+            doorbell.sendall(b"\0")
+        except (OSError, ValueError) as e:
+            doorbell.close()
+            raise ConnectionAbortedError(f"Shared memory handshake failed: {e}")
+        return ShmSocket(rx, tx, doorbell), rx_name
+
+    def close(self):
+        self.socket.close()
+
+
+class ShmTransport(Transport):
+    """
+    Transport over shared memory rings, for bots kept in processes of their own on the same machine as the server.
+
+    Each client creates a pair of rings and passes their names to the server over a Unix socket, which then only
+    serves as a doorbell. The Unix socket is found like the one of UnixTransport, with a .shm suffix. Only the
+    threaded server supports it, the asyncio server needs real sockets. It runs on x86 CPUs only, see Ring.
+    """
+
+    name = SHM
+    selectable = False
+
+    @staticmethod
+    def check_platform():
+        """Raises OSError on CPUs whose memory ordering the rings can't rely on."""
+        machine = platform.machine()
+        if machine.lower() not in TSO_MACHINES:
+            raise OSError(f"The shared memory transport needs an x86 CPU, this one is {machine or 'unknown'}")
+
+    def path(self, host: str, port: int) -> str:
+        return UnixTransport().path(host, port) + ".shm"
+
+    def listen(self, host: str, port: int, backlog: int) -> ShmListener:
+        self.check_platform()
+        path = self.path(host, port)
+        UnixTransport._remove_stale(path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+        sock.listen(backlog)
+        return ShmListener(sock)
+
+    async def start_server(self, handler: ConnectionHandler, host: str, port: int, backlog: int):
+        raise OSError("The shared memory transport needs the threaded server")
+
+    def connect(self, host: str, port: int) -> ShmSocket:
+        self.check_platform()
+        tx, rx = Ring.create(), Ring.create()
+        doorbell = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            doorbell.settimeout(HANDSHAKE_TIMEOUT)
+            doorbell.connect(self.path(host, port))
+            doorbell.sendall(f"{tx.memory.name} {rx.memory.name}\n".encode())
+            if not doorbell.recv(1):
+                raise ConnectionRefusedError("The server refused the shared memory rings")
+        except OSError:
+            doorbell.close()
+            raise
+        finally:
+            # Once both ends are attached, the names are no longer needed
+            tx.unlink()
+            rx.unlink()
+        return ShmSocket(rx, tx, doorbell)
+
+    def cleanup(self, host: str, port: int):
+        try:
+            UnixTransport._remove_stale(self.path(host, port))
+        except OSError:
+            pass  # Another server took the path over
+
+    def describe(self, host: str, port: int) -> str:
+        return self.path(host, port)
@@ -0,0 +1,297 @@
+import asyncio
+import errno
+import os
+import queue
+import socket
+import stat
+import tempfile
+import threading
+from typing import Awaitable, Callable
+
+
+TCP = "tcp"
+UNIX = "unix"
+INPROC = "inproc"
+SHM = "shm"
+TRANSPORTS = (TCP, UNIX, INPROC, SHM)
+EXTERNAL_TRANSPORTS = (TCP, UNIX, SHM)  # Transports that reach other processes
+
+ConnectionHandler = Callable[[asyncio.StreamReader, asyncio.StreamWriter], Awaitable[None]]
+
+
+class Transport:
+    """
+    Way the clients reach a server.
+
+    Every transport hands out connected stream sockets, so the servers and clients read, write, time out and
+    frame messages the same way whatever the transport. Transports are chosen by name with _get_transport_ and
+    keep the (host, port) addressing of TCP, each one mapping it to an address of its own.
+    """
+
+    name = ""
+    selectable = True
+    """Flag for whether the sockets of the transport have a file descriptor that can be waited on with selectors."""
+
+    def listen(self, host: str, port: int, backlog: int) -> socket.socket:
+        """
+        Creates the listening socket of a threaded server.
+
+        Arguments:
+            host {str} -- address to listen on
+            port {int} -- port to listen on
+            backlog {int} -- size of the queue of pending connections
+
+        Returns:
+            socket.socket -- socket whose _accept_ returns the connected sockets of new clients
+        """
+        raise NotImplementedError
+
+    async def start_server(self, handler: ConnectionHandler, host: str, port: int, backlog: int) -> asyncio.AbstractServer:
+        """Starts listening from the running event loop, calling _handler_ with the streams of each new client."""
+        raise NotImplementedError
+
+    def connect(self, host: str, port: int) -> socket.socket:
+        """Returns a socket connected to the server listening on _host_ and _port_."""
+        raise NotImplementedError
+
+    def cleanup(self, host: str, port: int):
+        """Releases what the server left behind once it stopped listening."""
+
+    def describe(self, host: str, port: int) -> str:
+        """Returns the address clients connect to, for logs."""
+        return f"{host}:{port}"
+
+
+class TcpTransport(Transport):
+    """Transport over TCP, for clients on other machines."""
+
+    name = TCP
+
+    def listen(self, host: str, port: int, backlog: int) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind((host, port))
+        sock.listen(backlog)
+        return sock
+
+    async def start_server(self, handler: ConnectionHandler, host: str, port: int, backlog: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(handler, host, port, backlog=backlog)
+
+    def connect(self, host: str, port: int) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.connect((host, port))
+        return sock
+
+
+class UnixTransport(Transport):
+    """
+    Transport over a Unix domain socket, for clients on the same machine.
+
+    The socket file is _host_ if it is a path, or coup-<port>.sock in the temporary directory otherwise.
+    """
+
+    name = UNIX
+
+    def path(self, host: str, port: int) -> str:
+        """Returns the path of the socket file."""
+        if os.sep in host:
+            return host
+        return os.path.join(tempfile.gettempdir(), f"coup-{port}.sock")
+
+    def listen(self, host: str, port: int, backlog: int) -> socket.socket:
+        path = self.path(host, port)
+        self._remove_stale(path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+        sock.listen(backlog)
+        return sock
+
+    async def start_server(self, handler: ConnectionHandler, host: str, port: int, backlog: int) -> asyncio.AbstractServer:
+        path = self.path(host, port)
+        self._remove_stale(path)
+        return await asyncio.start_unix_server(handler, path, backlog=backlog)
+
+    def connect(self, host: str, port: int) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path(host, port))
+        return sock
+
+    def cleanup(self, host: str, port: int):
+        try:
+            self._remove_stale(self.path(host, port))
+        except OSError:
+            pass  # Another server took the path over
+
+    def describe(self, host: str, port: int) -> str:
+        return self.path(host, port)
+
+    @staticmethod
+    def _remove_stale(path: str):
+        """
+        Removes the socket file left by a server that is gone, binding fails otherwise.
+
+        Arguments:
+            path {str} -- path of the socket file
+
+        Raises:
+            OSError -- if _path_ is not a socket file, or a server still listens on it
+        """
+        try:
+            mode = os.stat(path).st_mode
+        except FileNotFoundError:
+            return
+        if stat.S_ISSOCK(mode):
+            # Only a socket nobody listens on refuses the connection, a full backlog makes a live one fail with EAGAIN
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            probe.setblocking(False)
+            try:
+                error = probe.connect_ex(path)
+            finally:
+                probe.close()
+            if error in (errno.ECONNREFUSED, errno.ENOENT):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                return
+        raise OSError(errno.EADDRINUSE, os.strerror(errno.EADDRINUSE), path)
+
+
+class InProcessListener:
+    """
+    Listening end of an in-process server.
+
+    It behaves like a listening socket for the threaded server: _accept_ returns the server end of a socket
+    pair created by _connect_, and times out or fails once closed just like a socket would. An asyncio server
+    sets _on_connect_ instead, to be handed each new socket from the connecting thread.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pending: queue.SimpleQueue[socket.socket] = queue.SimpleQueue()
+        self.timeout: float | None = None
+        self.closed = False
+        self.on_connect: Callable[[socket.socket], None] | None = None
+
+    def settimeout(self, timeout: float | None):
+        self.timeout = timeout
+
+    def accept(self) -> tuple[socket.socket, str]:
+        if self.closed:
+            raise OSError(f"In-process listener {self.name} is closed")
+        try:
+            sock = self.pending.get(timeout=self.timeout)
+        except queue.Empty:
+            raise socket.timeout("timed out")
+        return sock, self.name
+
+    def connect(self) -> socket.socket:
+        """Creates a connection to the listener and returns the client end."""
+        if self.closed:
+            raise ConnectionRefusedError(f"In-process listener {self.name} is closed")
+        client_end, server_end = socket.socketpair()
+        if self.on_connect is not None:
+            self.on_connect(server_end)
+        else:
+            self.pending.put(server_end)
+        return client_end
+
+    def close(self):
+        self.closed = True
+        InProcessTransport.listeners.pop(self.name, None)
+
+
+class InProcessServer(asyncio.AbstractServer):
+    """In-process listener served by the asyncio event loop."""
+
+    def __init__(self, listener: InProcessListener, handler: ConnectionHandler, loop: asyncio.AbstractEventLoop):
+        self.listener = listener
+        self.handler = handler
+        self.loop = loop
+        self.tasks: set[asyncio.Task] = set()
+        self.stopped = asyncio.Event()
+        """Set once the server is closed."""
+        listener.on_connect = lambda sock: loop.call_soon_threadsafe(self._accept, sock)
+
+    def _accept(self, sock: socket.socket):
+        task = self.loop.create_task(self._serve(sock))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _serve(self, sock: socket.socket):
+        reader, writer = await asyncio.open_connection(sock=sock)
+        await self.handler(reader, writer)
+
+    def close(self):
+        self.listener.close()
+        self.stopped.set()
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        return self.loop
+
+    def is_serving(self) -> bool:
+        return not self.listener.closed
+
+    async def start_serving(self):
+        pass
+
+    async def serve_forever(self):
+        """Serves until the server is closed, connections are accepted as soon as the server is created."""
+        await self.stopped.wait()
+
+    async def wait_closed(self):
+        await self.stopped.wait()
+
+
+class InProcessTransport(Transport):
+    """
+    Transport between a server and clients running in the same process, e.g. tests or a script hosting both.
+
+    Servers are found by (host, port) in a registry of the process, and each connection is a pair of
+    connected Unix sockets: no loopback TCP stack, no file in the file system.
+    """
+
+    name = INPROC
+    listeners: dict[str, InProcessListener] = {}
+    lock = threading.Lock()
+
+    def _listener(self, host: str, port: int) -> InProcessListener:
+        name = self.describe(host, port)
+        with self.lock:
+            if name in self.listeners:
+                raise OSError(f"Address already in use: {name}")
+            listener = self.listeners[name] = InProcessListener(name)
+        return listener
+
+    def listen(self, host: str, port: int, backlog: int) -> InProcessListener:
+        return self._listener(host, port)
+
+    async def start_server(self, handler: ConnectionHandler, host: str, port: int, backlog: int) -> asyncio.AbstractServer:
+        return InProcessServer(self._listener(host, port), handler, asyncio.get_running_loop())
+
+    def connect(self, host: str, port: int) -> socket.socket:
+        listener = self.listeners.get(self.describe(host, port))
+        if listener is None:
+            raise ConnectionRefusedError(f"No in-process server at {self.describe(host, port)}")
+        return listener.connect()
+
+    def describe(self, host: str, port: int) -> str:
+        return f"inproc://{host}:{port}"
+
+
+_transports: dict[str, Transport] = {transport.name: transport for transport in (TcpTransport(), UnixTransport(), InProcessTransport())}
+
+def get_transport(name: str) -> Transport:
+    """
+    Returns the transport with the given name.
+
+    Raises:
+        ValueError: If there is no transport with that name.
+    """
+    transport = _transports.get(name)
+    if transport is None and name == SHM:
+        # Shared memory support is only loaded by the processes using it
+        from .shm import ShmTransport
+        transport = _transports[SHM] = ShmTransport()
+    if transport is None:
+        raise ValueError(f"Unknown transport: {name}")
+    return transport
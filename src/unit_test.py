@@ -1,5 +1,37 @@
 import unittest
+import random
 from proto.game_proto import game_proto, GameMessage
+from engine.headless import HeadlessGame, HeadlessRoot
+from client.bots import RandomBot
+from client.game.state_machine import PlayerSim, PlayerState
+from engine.batch import BatchSimulator
+from proto.framing import TextFraming, LengthFraming, ServerFraming, PREAMBLE
+from proto.reassembler import Reassembler
+from server.registry import ClientRegistry
+from server.server import Client, Server, BLOCK, DROP, DISCONNECT as SLOW_DISCONNECT
+from server.coup_server import CoupServer, AsyncCoupServer, ROOT_ADDR
+from transport.transport import get_transport, INPROC, UNIX
+from transport.shm import Ring, ShmSocket, WAITING
+from server.rooms import Room, Seat, RoomServer
+from client.root import Root
+from client.root_pool import RootPool
+from proto.network_proto import network_proto, NetworkMessage, JOIN, SIT, SEAT, DISCONNECT
+from state_machine.state import State, StateMachine, AUTO
+from terminal.terminal import NullTerminal
+from client.event_loop import EventCoupClient
+from client.async_player import AsyncInformedPlayer
+from client.async_coup_client import AsyncCoupClient
+from server.rooms import AsyncRoomServer
+import asyncio
+import time
+from server.timers import Timers
+from client.anytime_player import AnytimePlayer
+from client.speculative_player import SpeculativePlayer
+from proto.game_proto import EXIT
+import threading
+import socket
+import os
+import tempfile
 
 class TestGameProto(unittest.TestCase):
 
@@ -68,7 +100,800 @@ class TestGameProto(unittest.TestCase):
         self.assertEqual(msg.args, {"ID1": "0", "action": "T"})
         self.assertEqual(msg.ID1, "0")
         self.assertEqual(msg.action, "T")
+
+    def test_serialize_values(self):
+        self.assertEqual(game_proto.serialize_values("ACT", 1, "S", 2), game_proto.serialize("ACT", {"ID1": 1, "action": "S", "ID2": 2}))
+        self.assertEqual(game_proto.serialize_values("DECK", "A", None), "DECK A")
+        with self.assertRaises(SyntaxError):
+            game_proto.serialize_values("ACT", 1, "Q")
+
+    def test_parse_cached(self):
+        _, args = game_proto.parse("BLOCK 2 C")
+        args["ID1"] = "3"
+        self.assertEqual(game_proto.parse("BLOCK 2 C"), ("BLOCK", {"ID1": "2", "card1": "C"}))
+        with self.assertRaises(SyntaxError):
+            game_proto.parse("COINS 1 ²")
+
+    def test_game_message_interned(self):
+        msg = GameMessage("ACT 0 S 1")
+        self.assertIs(msg, GameMessage("ACT 0 S 1"))
+        self.assertIs(msg, GameMessage("ACT 0 S 1 2"))
+        self.assertEqual(str(msg), "ACT 0 S 1")
+        self.assertEqual(GameMessage.from_string("OK"), [GameMessage("OK")])
+        with self.assertRaises(AttributeError):
+            msg.ID1 = "2"
+        with self.assertRaises(TypeError):
+            msg.args["ID1"] = "2"
         
 
+class TestResponses(unittest.TestCase):
+
+    def test_opponent_death(self):
+        players: dict[str, PlayerSim] = {}
+        for id in "123":
+            players[id] = PlayerSim(id, players)
+        player = players["1"]
+        player.coins = 7
+        player.set_state(PlayerState.R_MY_TURN)
+        self.assertIn("ACT 1 C 3", player.possible_messages)
+        players["3"].alive = False
+        player.set_state(PlayerState.R_MY_TURN)
+        self.assertNotIn("ACT 1 C 3", player.possible_messages)
+        self.assertEqual(player.possible_messages, player.build_responses())
+
+    def test_responses_are_copies(self):
+        player = PlayerSim("1", {})
+        player.set_state(PlayerState.R_FAID)
+        player.possible_messages.clear()
+        self.assertEqual(player.generate_responses(), ["OK", "BLOCK 1 D"])
+
+
+class TestStateMachine(unittest.TestCase):
+
+    def build(self, **kwargs):
+        sm = StateMachine(State("A"), **kwargs)
+        sm.add_state(State("B"))
+        sm.add_state(State("C"))
+        sm.add_transition("A", "B", lambda: True)
+        sm.add_transition("B", "C", AUTO)
+        return sm
+
+    def test_one_transition_per_update(self):
+        sm = self.build()
+        sm.update()
+        self.assertEqual(sm.current_state.name, "B")
+        sm.update()
+        self.assertEqual(sm.current_state.name, "C")
+        self.assertEqual(sm.transition_count(), 2)
+        self.assertEqual(sm.transition_count(from_state="A", to_state="B"), 1)
+
+    def test_run_to_completion(self):
+        sm = self.build(run_to_completion=True)
+        sm.update()
+        self.assertEqual(sm.current_state.id, sm.states["C"].id)
+        self.assertEqual(sm.transition_count(to_state="C"), 1)
+
+        sm = self.build(run_to_completion=True, ready=lambda: False)
+        sm.update()
+        self.assertEqual(sm.current_state.name, "B")
+
+    def test_auto_cycle(self):
+        sm = StateMachine(State("A"), run_to_completion=True)
+        sm.add_transition("A", "A", AUTO)
+        sm.update()
+        self.assertEqual(sm.transition_count(), 1)
+
+class TestHeadlessGame(unittest.TestCase):
+
+    def test_game_has_one_winner(self):
+        random.seed(0)
+        game = HeadlessGame.from_classes([RandomBot] * 6)
+        winners = game.run()
+        self.assertTrue(game.finished)
+        self.assertEqual(len(winners), 1)
+        self.assertIn(winners[0], game.bots)
+
+    def test_two_player_game(self):
+        random.seed(1)
+        game = HeadlessGame.from_classes([RandomBot, RandomBot])
+        winners = game.run()
+        self.assertTrue(game.finished)
+        self.assertEqual(len(winners), 1)
+
+    def test_quiet_players(self):
+        random.seed(2)
+        bots = [RandomBot(terminal=NullTerminal(), quiet=i % 2 == 0) for i in range(4)]
+        game = HeadlessGame(bots)
+        winners = game.run()
+        self.assertTrue(game.finished)
+        self.assertEqual(len(winners), 1)
+        for addr, bot in game.bots.items():
+            self.assertEqual(game.root.players[addr].quiet, bot.quiet)
+
+    def test_bundle_single_reply(self):
+        bot = RandomBot(terminal=NullTerminal())
+        self.assertEqual(bot.checkout.get_nowait(), "HELLO")
+        bot.receive_bundle(["PLAYER 1", "PLAYER 2"])
+        self.assertEqual(bot.checkout.get_nowait(), "OK\nOK")
+        self.assertTrue(bot.checkout.empty())
+
+    def test_bots_are_reset(self):
+        random.seed(3)
+        bots = [RandomBot(terminal=NullTerminal(), quiet=True) for _ in range(3)]
+        for _ in range(2):
+            game = HeadlessGame(bots)
+            self.assertEqual(len(game.run()), 1)
+            for bot in bots:
+                bot.reset()
+                self.assertTrue(bot.alive)
+                self.assertEqual(bot.players, {})
+        self.assertEqual(bots[0].checkout.get_nowait(), "HELLO QUIET")
+
+    def test_auto_root_is_full(self):
+        root = HeadlessRoot(2)
+        for orig in ("1", "2", "3"):
+            root.receive_from(orig, "HELLO")
+        self.assertEqual(list(root.players), ["1", "2"])
+        self.assertIn(("SINGLE", "3", "ILLEGAL"), root.outbox)
+
+
+class TestRootPool(unittest.TestCase):
+
+    def test_root_is_reused(self):
+        roots = RootPool(HeadlessRoot, seed=1)
+        for _ in range(2):
+            game = HeadlessGame.from_classes([RandomBot] * 3, root=roots.acquire(3))
+            self.assertEqual(len(game.run()), 1)
+            roots.release(game.root)
+        self.assertEqual(roots.created, 1)
+        self.assertEqual(roots.acquire(3).sm.current_state.name, "IDLE")
+
+    def test_seeded_streams(self):
+        first, second = RootPool(seed=1), RootPool(seed=1)
+        self.assertEqual(first.acquire(2).rng.random(), second.acquire(2).rng.random())
+        self.assertNotEqual(first.acquire(2).rng.random(), first.acquire(2).rng.random())
+
+
+class TestDeadlines(unittest.TestCase):
+
+    def test_overdue_replies_are_played(self):
+        root = Root("auto", 2, NullTerminal(), deadline=1.0)
+        root.receive_from("1", "HELLO")
+        root.receive_from("2", "HELLO")
+        due = root.next_deadline()
+        self.assertIsNotNone(due)
+        root.expire(due - 0.5)
+        self.assertEqual(root.timeouts, {})
+        root.expire(due + 0.5)
+        self.assertEqual(root.timeouts, {"1": 1, "2": 1})
+        self.assertTrue(all(player.state == PlayerState.START for player in root.players.values()))
+        root.receive_from("1", "OK")  # Too late, ignored
+        self.assertEqual(root.late["1"], [])
+        self.assertFalse(root.players["1"].replied)  # READY is still due
+
+    def test_played_reply_is_sent_back(self):
+        random.seed(6)
+        game = HeadlessGame.from_classes([RandomBot] * 4)
+        game.root.deadline = 1.0
+        for addr, bot in game.bots.items():
+            game._collect(addr, bot)
+        turns = 0
+        while not game.finished and game.messages < game.max_messages:
+            if not game.inbox or game.messages % 5 == 0:
+                # Every reply still in the inbox is overdue, and arrives too late
+                game.root.expire(time.monotonic() + 2)
+                game._dispatch()
+                if not game.inbox:
+                    break
+            orig, game_msg = game.inbox.popleft()
+            game.messages += 1
+            game.root.receive_from(orig, game_msg)
+            game._dispatch()
+            game.finished = game.root.sm.current_state.id == game.root.sm.end_state
+            if game.root.sm.current_state.name == "TURN":
+                turns += 1
+                pending = {addr for addr, _ in game.inbox}
+                for addr, bot in game.bots.items():
+                    if bot.alive and addr not in pending:
+                        self.assertEqual(sorted(bot.deck), sorted(game.root.players[addr].deck))
+        self.assertTrue(game.finished)
+        self.assertGreater(game.root.total_timeouts, 0)
+        self.assertGreater(turns, 0)
+
+    def test_timers_run_in_order(self):
+        timers = Timers()
+        calls = []
+        done = threading.Event()
+        now = time.monotonic()
+        timers.call_at(now + 0.02, lambda: (calls.append(2), done.set()))
+        timers.call_at(now, lambda: calls.append(1))
+        self.assertTrue(done.wait(5))
+        self.assertEqual(calls, [1, 2])
+        timers.stop()
+
+
+class TestBatchSimulator(unittest.TestCase):
+
+    def test_games_have_one_winner(self):
+        sim = BatchSimulator(500, 6, seed=0)
+        winners = sim.run()
+        self.assertTrue(sim.done.all())
+        self.assertTrue(((winners >= 0) & (winners < 6)).all())
+        self.assertTrue((sim.alive.sum(axis=1) == 1).all())
+        self.assertTrue((sim.deck.sum(axis=1) == 15 - 2 * 6).all())
+
+
+class TestFraming(unittest.TestCase):
+
+    def test_text_partial_reads(self):
+        framing = TextFraming()
+        reassembler = Reassembler(framing, size=8)
+        messages = []
+        for byte in framing.encode("SINGLE@1@HELLO\n") + framing.encode("ALL@OK"):
+            reassembler.feed(bytes([byte]))
+            messages.extend(reassembler.frames())
+        self.assertEqual(messages, ["SINGLE@1@HELLO", "ALL@OK"])
+
+    def test_length_partial_reads(self):
+        framing = LengthFraming()
+        reassembler = Reassembler(framing)
+        data = framing.encode("SINGLE@1@HELLO\n") + framing.encode("ALL@ÉÇ")
+        reassembler.feed(data[:3])
+        self.assertEqual(list(reassembler.frames()), [])
+        reassembler.feed(data[3:])
+        self.assertEqual(list(reassembler.frames()), ["SINGLE@1@HELLO", "ALL@ÉÇ"])
+
+    def test_server_negotiation(self):
+        client, server = LengthFraming(), ServerFraming()
+        reassembler = Reassembler(server)
+        data = PREAMBLE + client.encode("SINGLE@0@HELLO")
+        reassembler.feed(data[:4])
+        self.assertEqual(list(reassembler.frames()), [])
+        reassembler.feed(data[4:])
+        self.assertEqual(list(reassembler.frames()), ["SINGLE@0@HELLO"])
+        self.assertEqual(server.encode("SINGLE@0@OK"), PREAMBLE + client.encode("SINGLE@0@OK"))
+        self.assertEqual(server.take_echo(), b"")
+
+    def test_server_text_fallback(self):
+        server = ServerFraming()
+        reassembler = Reassembler(server)
+        reassembler.feed(b"SINGLE@0@HELLO\n")
+        self.assertEqual(list(reassembler.frames()), ["SINGLE@0@HELLO"])
+        self.assertEqual(server.encode("SINGLE@0@OK"), b"SINGLE@0@OK\n")
+
+    def test_shared_frames(self):
+        text, length = ServerFraming(), ServerFraming()
+        length.accept()
+        frames = {}
+        self.assertEqual(text.encode_shared("ALL@OK\n", frames), b"ALL@OK\n")
+        self.assertEqual(length.encode_shared("ALL@OK\n", frames), PREAMBLE + LengthFraming().encode("ALL@OK"))
+        self.assertEqual(length.encode_shared("ALL@OK\n", frames), LengthFraming().encode("ALL@OK"))
+        self.assertEqual(len(frames), 2)
+
+
+FRAME = 1024  # Size of the frames sent to slow clients
+
+def numbered_frame(i: int) -> bytes:
+    return bytes([i % 256]) * FRAME
+
+class TrickleSocket:
+    """Socket taking a few bytes per sendmsg, like a socket whose buffer is almost full."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.data = bytearray()
+        self.calls = 0
+
+    def settimeout(self, timeout):
+        pass
+
+    def sendmsg(self, buffers) -> int:
+        self.calls += 1
+        taken = b"".join(bytes(buffer) for buffer in buffers)[:self.size]
+        self.data += taken
+        return len(taken)
+
+
+class BrokenSocket(TrickleSocket):
+    """Socket whose writes fail."""
+
+    def __init__(self):
+        super().__init__(0)
+        self.shut = False
+
+    def sendmsg(self, buffers) -> int:
+        raise BrokenPipeError("Broken pipe")
+
+    def shutdown(self, how: int):
+        self.shut = True
+
+
+class TestSlowClients(unittest.TestCase):
+
+    def connect(self, policy: str) -> tuple[Client, socket.socket]:
+        """Returns a client queueing up to 8 frames over a small socket buffer, and the other end, not read yet."""
+        sock, peer = socket.socketpair()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        client = Client(sock, "test", 1, "Name", True, Server(max_pending=8 * FRAME, slow_client_policy=policy))
+        client.writer.start()
+        self.addCleanup(self.close, client, peer)
+        return client, peer
+
+    def close(self, client: Client, peer: socket.socket):
+        client.signal = False
+        peer.close()
+        client.writer.join(5)
+        client.socket.close()
+
+    def drain(self, peer: socket.socket, size: int | None = None) -> tuple[bytes, bool]:
+        """Reads until _size_ bytes arrived, the connection closed or nothing came for a while. Returns the data and whether it closed."""
+        peer.settimeout(0.5)
+        data = b""
+        while size is None or len(data) < size:
+            try:
+                chunk = peer.recv(65536)
+            except socket.timeout:
+                return data, False
+            if not chunk:
+                return data, True
+            data += chunk
+        return data, False
+
+    def test_block(self):
+        client, peer = self.connect(BLOCK)
+        sent = []
+        sender = threading.Thread(target=lambda: [(client.send(numbered_frame(i)), sent.append(i)) for i in range(100)])
+        sender.start()
+        time.sleep(0.2)
+        self.assertLess(len(sent), 100)  # Waiting for the client to read
+        self.assertLessEqual(client.pending, 8 * FRAME)
+        data, _ = self.drain(peer, 100 * FRAME)
+        sender.join(5)
+        self.assertEqual(data, b"".join(numbered_frame(i) for i in range(100)))
+
+    def test_drop(self):
+        client, peer = self.connect(DROP)
+        for i in range(100):
+            client.send(numbered_frame(i))
+        self.assertLessEqual(client.pending, 8 * FRAME)
+        data, closed = self.drain(peer)
+        self.assertFalse(closed)
+        received = [data[i] for i in range(0, len(data), FRAME)]
+        self.assertEqual(data, b"".join(numbered_frame(i) for i in received))
+        self.assertEqual(received, sorted(set(received)))
+        self.assertLess(len(received), 100)
+
+    def test_disconnect(self):
+        client, peer = self.connect(SLOW_DISCONNECT)
+        with self.assertRaises(ConnectionResetError):
+            for i in range(100):
+                client.send(numbered_frame(i))
+        data, closed = self.drain(peer)
+        self.assertTrue(closed)
+        self.assertLess(len(data), 100 * FRAME)
+
+    def test_partial_sendmsg(self):
+        sock = TrickleSocket(4)
+        client = Client(sock, "test", 1, "Name", True, Server())  # type: ignore[arg-type]
+        client.write([b"abc", b"defgh", b"ij", b"k"])
+        self.assertEqual(bytes(sock.data), b"abcdefghijk")
+        self.assertEqual(sock.calls, 3)
+
+    def test_write_error(self):
+        sock = BrokenSocket()
+        client = Client(sock, "test", 1, "Name", True, Server(slow_client_policy=BLOCK))  # type: ignore[arg-type]
+        client.writer.start()
+        client.send(b"HELLO\n")
+        client.writer.join(5)
+        self.assertFalse(client.writer.is_alive())
+        self.assertTrue(sock.shut)  # The reader thread sees the disconnection
+        self.assertRaises(ConnectionResetError, client.send, b"OK\n")
+        client.signal = False
+
+
+class RecordingClient:
+    """Client of a server that keeps the messages sent to it."""
+
+    def __init__(self, id: int):
+        self.id = id
+        self.sent: list[str] = []
+        self.room = None
+        self.room_id: int | None = None
+        self.seats: dict[int, object] = {}
+
+    def send_message(self, message: str, frames=None):
+        self.sent.append(message)
+
+
+class TestClientRegistry(unittest.TestCase):
+
+    def test_lowest_free_id_is_reused(self):
+        registry = ClientRegistry()
+        clients = {}
+        for _ in range(4):
+            client_id = registry.allocate_id()
+            clients[client_id] = object()
+            registry.add(client_id, clients[client_id])
+        self.assertEqual(list(clients), [0, 1, 2, 3])
+        registry.remove(2, clients[2])
+        registry.remove(1, clients[1])
+        self.assertEqual(registry.allocate_id(), 1)
+        self.assertEqual(registry.allocate_id(), 2)
+        self.assertEqual(registry.allocate_id(), 4)
+
+    def test_snapshot_is_not_changed(self):
+        registry = ClientRegistry()
+        first, second = object(), object()
+        registry.add(registry.allocate_id(), first)
+        registry.add(registry.allocate_id(), second)
+        snapshot = registry.snapshot()
+        self.assertTrue(registry.remove(0, first))
+        self.assertFalse(registry.remove(1, first))
+        self.assertEqual(snapshot, (first, second))
+        self.assertEqual(registry.snapshot(), (second,))
+        self.assertIs(registry.get(1), second)
+        self.assertIsNone(registry.get(0))
+
+    def test_single_to_sender_is_dropped(self):
+        server = CoupServer()
+        sender, other = RecordingClient(0), RecordingClient(1)
+        server.connections.add(0, sender)
+        server.connections.add(1, other)
+        server.route_message(sender, "SINGLE@0@OK\nSINGLE@1@OK")  # type: ignore[arg-type]
+        self.assertEqual(sender.sent, [])
+        self.assertEqual(other.sent, ["SINGLE@0@OK\n"])
+
+
+class TestAsyncCoupServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = AsyncCoupServer("async-coup", 1, transport=INPROC)
+        self.server.start()
+        self.addCleanup(self.server.shutdown)
+        self.sockets = []
+        for i in range(3):
+            sock = get_transport(INPROC).connect("async-coup", 1)
+            sock.settimeout(2.0)
+            self.addCleanup(sock.close)
+            self.sockets.append(sock)
+            self.wait_for(lambda: len(self.server.connections.snapshot()) == i + 1)  # Client i gets ID i
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 2.0
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def receive(self, sock: socket.socket) -> bytes:
+        """Returns what _sock_ received, waiting for a complete line."""
+        data = b""
+        while not data.endswith(b"\n"):
+            data += sock.recv(4096)
+        return data
+
+    def assert_silent(self, *sockets: socket.socket):
+        for sock in sockets:
+            sock.settimeout(0.1)
+            self.assertRaises(socket.timeout, sock.recv, 4096)
+            sock.settimeout(2.0)
+
+    def test_routing(self):
+        root, first, second = self.sockets
+        root.sendall(b"SINGLE@1@PLAYER 1\n")
+        self.assertEqual(self.receive(first), b"SINGLE@0@PLAYER 1\n")
+        root.sendall(b"EXCEPT@2@TURN 1\n")
+        self.assertEqual(self.receive(first), b"SINGLE@0@TURN 1\n")
+        first.sendall(b"ALL@OK\n")
+        self.assertEqual(self.receive(root), b"SINGLE@1@OK\n")
+        self.assertEqual(self.receive(second), b"SINGLE@1@OK\n")
+        self.assert_silent(root, first, second)
+
+    def test_disconnection(self):
+        root, first, second = self.sockets
+        second.close()
+        self.assertEqual(self.receive(root), b"SINGLE@2@DISCONNECT\n")
+        self.wait_for(lambda: self.server.connections.get(2) is None)
+        self.assert_silent(first)
+
+
+class TestTransport(unittest.TestCase):
+
+    def test_inproc_connection(self):
+        transport = get_transport(INPROC)
+        listener = transport.listen("test", 1, 1)
+        listener.settimeout(0)
+        self.assertRaises(TimeoutError, listener.accept)
+        client = transport.connect("test", 1)
+        server, _ = listener.accept()
+        client.sendall(b"HELLO\n")
+        self.assertEqual(server.recv(64), b"HELLO\n")
+        listener.close()
+        self.assertRaises(ConnectionRefusedError, transport.connect, "test", 1)
+        client.close()
+        server.close()
+
+    def test_inproc_serve_forever(self):
+        async def handler(reader, writer):
+            writer.write(await reader.readline())
+            await writer.drain()
+            writer.close()
+
+        async def serve():
+            transport = get_transport(INPROC)
+            server = await transport.start_server(handler, "test", 2, 1)
+            serving = asyncio.create_task(server.serve_forever())
+            reader, writer = await asyncio.open_connection(sock=transport.connect("test", 2))
+            writer.write(b"HELLO\n")
+            self.assertEqual(await reader.readline(), b"HELLO\n")
+            writer.close()
+            self.assertFalse(serving.done())
+            server.close()
+            await asyncio.wait_for(serving, 5)
+            await server.wait_closed()
+
+        asyncio.run(serve())
+
+    def test_ring_wraps_around(self):
+        ring = Ring.create(8)
+        ring.unlink()
+        buffer = bytearray(8)
+        self.assertEqual(ring.write(b"abcdef"), 6)
+        self.assertEqual(ring.read_into(memoryview(buffer)[:4]), 4)
+        self.assertEqual(ring.write(b"ghijklmn"), 6)  # Only 6 bytes are free
+        self.assertEqual(ring.read_into(buffer), 8)
+        self.assertEqual(bytes(buffer), b"efghijkl")
+        self.assertFalse(ring.readable())
+
+    def test_shm_doorbell(self):
+        up, down = Ring.create(1 << 16), Ring.create(1 << 16)
+        up.unlink()
+        down.unlink()
+        a, b = socket.socketpair()
+        writer, reader = ShmSocket(down, up, a), ShmSocket(up, down, b)
+        writer.settimeout(1.0)
+        reader.settimeout(1.0)
+        buffer = bytearray(64)
+
+        # A sleeping reader is woken up
+        waker = threading.Timer(0.05, writer.sendall, (b"HELLO",))
+        waker.start()
+        self.assertEqual(reader.recv_into(buffer), 5)
+        waker.join()
+        self.assertEqual(up.header[WAITING], 0)
+
+        # Wake ups the reader doesn't take never hold the writer up once the doorbell is full
+        up.header[WAITING] = 1
+        start = time.monotonic()
+        for _ in range(10000):
+            writer.sendall(b"x" * 12)
+            self.assertEqual(up.read_into(buffer), 12)
+        self.assertLess(time.monotonic() - start, 1.0)
+        writer.close()
+        reader.close()
+
+    def test_unix_path(self):
+        transport = get_transport(UNIX)
+        self.assertEqual(transport.path("/run/coup.sock", 1), "/run/coup.sock")
+        self.assertTrue(transport.path("localhost", 12345).endswith("coup-12345.sock"))
+
+    def test_unix_path_in_use(self):
+        transport = get_transport(UNIX)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "coup.sock")
+            with open(path, "w") as file:
+                file.write("data")
+            self.assertRaises(OSError, transport.listen, path, 1, 1)
+            self.assertTrue(os.path.isfile(path))  # Not a socket, left alone
+            os.unlink(path)
+
+            listener = transport.listen(path, 1, 5)
+            self.assertRaises(OSError, transport.listen, path, 1, 1)  # A server still listens on it
+            transport.cleanup(path, 1)
+            transport.connect(path, 1).close()
+            listener.close()
+
+            listener = transport.listen(path, 1, 5)  # Left behind by a server that is gone
+            listener.close()
+            transport.cleanup(path, 1)
+            self.assertFalse(os.path.exists(path))
+
+
+class TestEventLoop(unittest.TestCase):
+
+    def setUp(self):
+        self.listener = get_transport(INPROC).listen("event", 1, 1)
+        self.client = EventCoupClient("event", 1, RandomBot(quiet=True), transport=INPROC)
+        self.thread = threading.Thread(target=self.client.run)
+        self.thread.start()
+        self.server, _ = self.listener.accept()
+        self.server.settimeout(5)
+
+    def tearDown(self):
+        self.listener.close()
+        self.server.close()
+
+    def test_exit_closes_connection(self):
+        self.assertEqual(self.server.recv(256), network_proto.SINGLE(0, "HELLO QUIET").encode())
+        self.server.sendall(network_proto.SINGLE(0, EXIT).encode())
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        self.assertEqual(self.server.recv(256), b"")
+
+    def test_stop_wakes_loop_up(self):
+        self.server.recv(256)
+        self.client.stop()
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+
+
+class AsyncRandomBot(AsyncInformedPlayer):
+
+    async def choose_message(self):
+        await asyncio.sleep(0)
+        self.msg = GameMessage(random.choice(self.possible_messages))
+
+
+class TestAsyncPlayer(unittest.TestCase):
+
+    def test_headless_game(self):
+        random.seed(4)
+        game = HeadlessGame.from_classes([AsyncRandomBot, RandomBot, AsyncRandomBot])
+        self.assertEqual(len(game.run()), 1)
+
+    def test_clients_play_room(self):
+        server = AsyncRoomServer("async", 1, transport=INPROC)
+        server.start()
+        try:
+            clients = [AsyncCoupClient("async", 1, AsyncRandomBot(quiet=True), room="table", size=2, transport=INPROC) for _ in range(2)]
+            threads = [threading.Thread(target=client.run) for client in clients]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+                self.assertFalse(thread.is_alive())
+            self.assertEqual([client.played for client in clients], [1, 1])
+        finally:
+            server.shutdown()
+
+
+class OverrunBot(AnytimePlayer):
+    """Publishes a first reply right away, and a second one long after its budget is spent."""
+
+    def __init__(self, **kwargs):
+        self.seen: list[tuple[str, PlayerState]] = []
+        """Last message and state read by each search, once it is done."""
+        super().__init__(**kwargs)
+
+    def choose_message(self, budget):
+        self.publish(self.possible_messages[0])
+        time.sleep(budget * 5)
+        self.publish(self.possible_messages[-1])
+        self.seen.append((str(self.history[-1]), self.state))
+
+
+class FailingBot(AnytimePlayer):
+    """Publishes its last possible reply, then fails."""
+
+    def choose_message(self, budget):
+        self.publish(self.possible_messages[-1])
+        raise ValueError("Search failed")
+
+
+class TestAnytimePlayer(unittest.TestCase):
+
+    def test_reply_at_cutoff(self):
+        bot = OverrunBot(budget=0.02)
+        bot.receive_bundle(["PLAYER 1"])
+        bot.search.result()  # The next reply waits for it
+        start = time.monotonic()
+        bot.receive("ACT 2 S 1")
+        self.assertLess(time.monotonic() - start, 0.06)
+        self.assertEqual(str(bot.msg), bot.possible_messages[0])
+        bot.search.result()
+        self.assertEqual(bot.best, bot.possible_messages[0])  # Published after the cutoff
+        self.assertEqual(bot.time_left(), 0.0)
+
+    def test_search_keeps_its_state(self):
+        bot = OverrunBot(budget=0.02)
+        bot.receive_bundle(["PLAYER 1"])
+        bot.receive("ACT 2 S 1")
+        bot.receive("TURN 2")  # Arrives while the last search runs over its budget
+        bot.search.result()
+        self.assertEqual(bot.seen, [("PLAYER 1", PlayerState.R_PLAYER), ("ACT 2 S 1", PlayerState.R_STEAL_ME), ("TURN 2", PlayerState.R_OTHER_TURN)])
+
+    def test_failed_search(self):
+        bot = FailingBot(budget=1.0)
+        self.assertEqual(bot.checkout.get_nowait(), "HELLO")
+        bot.receive_bundle(["PLAYER 1"])
+        self.assertEqual(bot.checkout.get_nowait(), bot.possible_messages[-1])
+
+    def test_headless_game(self):
+        random.seed(5)
+        game = HeadlessGame([OverrunBot(budget=0.001, quiet=True), RandomBot(quiet=True)])
+        self.assertEqual(len(game.run()), 1)
+
+
+class LastReplyBot(SpeculativePlayer):
+    """Precomputes its last possible reply, and chooses the first one when it wasn't precomputed."""
+
+    def precompute(self, state, possible_messages, message):
+        return possible_messages[-1]
+
+    def choose_message(self):
+        self.msg = GameMessage(self.possible_messages[0])
+
+
+class TestSpeculativePlayer(unittest.TestCase):
+
+    def test_hit_and_miss(self):
+        bot = LastReplyBot()
+        bot.receive_bundle(["PLAYER 1", "PLAYER 2", "TURN 2"])
+        self.assertIn("ACT 2 T", [key[2] for key in bot.speculations])
+        bot.receive("ACT 2 T")
+        self.assertEqual((str(bot.msg), bot.hits), ("CHAL 1", 1))
+        self.assertEqual(bot.speculations, {})
+        bot.receive("TURN 2")
+        bot.receive("ACT 2 S 3")  # Player 3 isn't known, so its steal wasn't predicted
+        self.assertEqual((str(bot.msg), bot.misses), ("OK", 1))
+
+    def test_headless_game(self):
+        random.seed(6)
+        bots = [LastReplyBot(quiet=True), RandomBot(quiet=True), RandomBot(quiet=True)]
+        self.assertEqual(len(HeadlessGame(bots).run()), 1)
+        self.assertGreater(bots[0].hits, 0)
+
+
+class TestRooms(unittest.TestCase):
+
+    def test_parse_join(self):
+        nets = NetworkMessage.from_string(network_proto.JOIN("table1", 4) + network_proto.JOIN("table2"))
+        self.assertEqual([net.msg_type for net in nets], [JOIN, JOIN])
+        self.assertEqual((nets[0].room, int(nets[0].size)), ("table1", 4))
+        self.assertIsNone(nets[1].size)
+
+    def test_seat_messages(self):
+        nets = NetworkMessage.from_string(network_proto.SIT(3, "table1", 4) + network_proto.SEAT(3, "HELLO QUIET"))
+        self.assertEqual([net.msg_type for net in nets], [SIT, SEAT])
+        self.assertEqual((nets[0].seat, nets[0].room, nets[0].size), ("3", "table1", "4"))
+        self.assertEqual((nets[1].seat, nets[1].msg), ("3", "HELLO QUIET"))
+
+        class Connection:
+            id = 7
+        seat = Seat(Connection(), 3)
+        self.assertEqual(seat.id, "7.3")
+        self.assertEqual(seat.wrap([network_proto.SINGLE(0, "START")]), ["SEAT@3@START\n"])
+
+    def test_room_closes_when_full(self):
+        room = Room("table1", Root("auto", 2, NullTerminal()), 2)
+        self.assertEqual(room.members.allocate_id(), 1)
+        room.members.add(1, object())
+        self.assertTrue(room.is_open())
+        room.members.add(room.members.allocate_id(), object())
+        self.assertFalse(room.is_open())
+
+    def test_rooms_are_isolated(self):
+        server = RoomServer()
+        first, second, other = RecordingClient(1), RecordingClient(2), RecordingClient(3)
+        for client, name in ((first, "table1"), (second, "table1"), (other, "table2")):
+            server.route_message(client, network_proto.JOIN(name, 3))  # type: ignore[arg-type]
+        self.assertEqual((first.room_id, second.room_id, other.room_id), (1, 2, 1))
+
+        server.route_message(first, network_proto.ALL("HELLO"))  # type: ignore[arg-type]
+        server.route_message(first, network_proto.SINGLE(1, "OK") + network_proto.SINGLE(2, "OK"))  # type: ignore[arg-type]
+        self.assertEqual(first.sent, [network_proto.SINGLE(ROOT_ADDR, "PLAYER 1")])  # Only the reply of its Root
+        self.assertEqual(second.sent, [network_proto.SINGLE(1, "HELLO"), network_proto.SINGLE(1, "OK")])
+        self.assertEqual(other.sent, [])
+
+        root = server.rooms["table1"].root
+        server.route_message(first, network_proto.SINGLE(ROOT_ADDR, DISCONNECT))  # type: ignore[arg-type]
+        self.assertIn("table1", server.rooms)
+        server.route_message(second, network_proto.SINGLE(ROOT_ADDR, DISCONNECT))  # type: ignore[arg-type]
+        self.assertNotIn("table1", server.rooms)  # Closed by its last leave
+        self.assertIn(root, server.roots.idle)
+        self.assertIsNone(second.room)
+        self.assertIn("table2", server.rooms)
+        self.assertEqual(other.sent, [])
+
+
 if __name__ == "__main__":
     unittest.main()